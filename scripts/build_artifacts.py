@@ -0,0 +1,22 @@
+"""
+Build the artifacts shipped within the `meddle` package, i.e. the precompiled
+parsers loaded by `meddle.parser` and the precompiled schema loaded by
+`meddle.validation`. Run whenever `mdl_grammar.lark` or `validation.json` change,
+`lark` is upgraded, or `SCHEMA_ARTIFACT_FORMAT` is bumped.
+
+Usage: `python3 build_artifacts.py`
+"""
+
+from meddle.parser import PARSER_ARTIFACT_PATH, build_parser_artifact
+from meddle.validation import SCHEMA_ARTIFACT_PATH, build_schema_artifact
+
+
+def main():
+    build_parser_artifact()
+    print(f"Wrote {PARSER_ARTIFACT_PATH}")
+    build_schema_artifact()
+    print(f"Wrote {SCHEMA_ARTIFACT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
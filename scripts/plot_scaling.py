@@ -0,0 +1,72 @@
+"""
+Plot how the time and peak memory of loading, validating and dumping synthetic
+commands scale with their size, out of the results of the scaling benchmarks in
+`tests/test_benchmark.py`, saved with `--benchmark-json`. See `make benchmark_scaling`.
+
+Usage: `python3 plot_scaling.py /path/to/benchmark.json`
+"""
+
+from __future__ import annotations
+
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+# Width of the longest bar
+BAR_WIDTH = 20
+
+
+def bar(value: float, maximum: float) -> str:
+    return "█" * max(round(BAR_WIDTH * value / maximum), 1)
+
+
+def plot(benchmarks: list[dict], group: str) -> Table:
+    """A table of the benchmarks in `group`, one row per size, with bars for the
+    mean time and peak memory.
+    """
+    rows = sorted(
+        (b for b in benchmarks if b["group"] == group),
+        key=lambda b: b["extra_info"]["lines"],
+    )
+    max_time = max(b["stats"]["mean"] for b in rows)
+    max_memory = max(b["extra_info"]["peak_memory_bytes"] for b in rows)
+    table = Table(title=group)
+    table.add_column("Lines", justify="right")
+    table.add_column("Mean time (ms)", justify="right")
+    table.add_column("", no_wrap=True)
+    table.add_column("Peak memory (MiB)", justify="right")
+    table.add_column("", no_wrap=True)
+    for b in rows:
+        mean = b["stats"]["mean"]
+        memory = b["extra_info"]["peak_memory_bytes"]
+        table.add_row(
+            f"{b['extra_info']['lines']:,}",
+            f"{mean * 1_000:,.1f}",
+            bar(mean, max_time),
+            f"{memory / (1 << 20):,.1f}",
+            bar(memory, max_memory),
+        )
+    return table
+
+
+def cli() -> Path:
+    parser = ArgumentParser()
+    parser.add_argument("path", type=Path, help="Output of `--benchmark-json`")
+    return parser.parse_args().path
+
+
+def main(path: Path):
+    benchmarks = json.loads(path.read_text())["benchmarks"]
+    console = Console()
+    groups = sorted(
+        {b["group"] for b in benchmarks if b["group"].startswith("scaling-")}
+    )
+    for group in groups:
+        console.print(plot(benchmarks, group))
+
+
+if __name__ == "__main__":
+    main(cli())
@@ -3,6 +3,11 @@ Scrape metadata used for MDL validation from
 https://developer.veevavault.com/mdl/components/.
 
 Usage: `python3 scrape_components.py`
+
+To keep the current metadata and emit it as a new Vault version instead, e.g.
+`24R2`, run `python3 scrape_components.py --version 24R2`. Only what changed since
+the `--base` version (`validation.json` itself by default) is written, to
+`src/meddle/schemas/24R2.json`. See `meddle.validation.load_schema`.
 """
 # TODO: how worth it is it to make this into a standalone script as per `uv`'s
 # documentation? See https://docs.astral.sh/uv/guides/scripts/#declaring-script-dependencies
@@ -18,6 +23,13 @@ from bs4 import BeautifulSoup, NavigableString, Tag
 import msgspec
 import httpx
 
+from meddle.validation import (
+    DEFAULT_SCHEMA_VERSION,
+    SCHEMAS_DIR,
+    load_schema,
+    schema_delta,
+)
+
 # Represents one row in a tabular data format
 Record: TypeAlias = dict[str, Any]
 
@@ -135,23 +147,36 @@ class ComponentMetadataDict(TypedDict):
     children: NotRequired[list["ComponentMetadataDict"]]
 
 
-def cli() -> Path:
+def cli() -> tuple[Path, str | None, str]:
     argument_parser = ArgumentParser()
     argument_parser.add_argument(
         "-o",
         "--out-path",
         help="Filepath in which to place scrapped component metadata.",
     )
-    arguments = argument_parser.parse_args()
-    out_path = (
-        Path(__file__).parent.parent / "src" / "mdl" / "validation.json"
-        if arguments.out_path is None
-        else Path(arguments.out_path).resolve()
+    argument_parser.add_argument(
+        "--version",
+        help="Emit the scrapped component metadata as this Vault version, e.g. "
+        "24R2, storing only what changed since the base version.",
     )
-    return out_path
-
-
-def main(out_path: Path):
+    argument_parser.add_argument(
+        "--base",
+        default=DEFAULT_SCHEMA_VERSION,
+        help="The version `--version` is based on. Defaults to validation.json.",
+    )
+    arguments = argument_parser.parse_args()
+    if arguments.out_path is not None:
+        out_path = Path(arguments.out_path).resolve()
+    elif arguments.version is not None:
+        out_path = SCHEMAS_DIR / f"{arguments.version}.json"
+    else:
+        out_path = Path(__file__).parent.parent / "src" / "mdl" / "validation.json"
+    return out_path, arguments.version, arguments.base
+
+
+def main(
+    out_path: Path, version: str | None = None, base: str = DEFAULT_SCHEMA_VERSION
+):
     response = httpx.get(URL)
     soup = BeautifulSoup(response.content, "html.parser")
 
@@ -209,9 +234,14 @@ def main(out_path: Path):
 
     # Aaaaaand out it goes
     dumpable = {k: v for k, v in [c.convert() for c in validated]}
+    if version is not None:
+        # Incrementally, on top of the base version
+        changes = schema_delta(load_schema(base).metadata, dumpable)
+        dumpable = {"base": base, "components": changes}
+        out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(dumpable, indent=4))
     print(f"Wrote {out_path}")
 
 
 if __name__ == "__main__":
-    main(cli())
+    main(*cli())
@@ -12,12 +12,12 @@ from base64 import b64decode
 import json
 import os
 from pathlib import Path
-from tempfile import TemporaryDirectory
 from typing import Generator
-from zipfile import ZipFile
 
 import httpx
 
+from meddle.vpk import mdl_members, open_vpk
+
 
 here = Path(__file__).parent
 
@@ -125,20 +125,12 @@ def download_mdl_files_from_vpk(
     vpk_dir.mkdir(exist_ok=True)
     content_response = github_client.get(url)
     vpk_content = b64decode(content_response.json()["content"])
-    with TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir) / Path(path).stem
-        tmp_path.write_bytes(vpk_content)
-        with ZipFile(tmp_path) as zip_file:
-            for file_name in zip_file.namelist():
-                if (not file_name.endswith(".mdl")) or file_name.startswith("__MACOSX"):
-                    # For the second clause above, see
-                    # https://apple.stackexchange.com/questions/373450/why-are-almost-blank-files-being-created-by-macos-and-applications
-                    continue
-                with zip_file.open(file_name) as zipped_mdl_file:
-                    out_path = vpk_dir / Path(file_name).name
-                    out_path.write_bytes(zipped_mdl_file.read())
-                    print(f"Wrote {out_path}")
-                    yield str(out_path.relative_to(out_dir)), url
+    with open_vpk(vpk_content) as vpk:
+        for file_name in mdl_members(vpk):
+            out_path = vpk_dir / Path(file_name).name
+            out_path.write_bytes(vpk.read(file_name))
+            print(f"Wrote {out_path}")
+            yield str(out_path.relative_to(out_dir)), url
 
 
 def main(out_dir: Path):
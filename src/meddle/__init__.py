@@ -1,3 +1,13 @@
-from meddle.parser import Attribute, Component, Command
+from meddle.parser import Attribute, Component, Command, LazyCommand, load_file
+from meddle.loading import load_directory
+from meddle.diffing import diff
 
-__all__ = ["Attribute", "Component", "Command"]
+__all__ = [
+    "Attribute",
+    "Component",
+    "Command",
+    "LazyCommand",
+    "load_file",
+    "load_directory",
+    "diff",
+]
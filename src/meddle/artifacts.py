@@ -0,0 +1,43 @@
+"""
+Helpers to write and read the versioned artifacts `meddle` ships alongside its
+sources, e.g. the precompiled parsers in `parser.py`. An artifact is a pickled
+payload preceded by a key. Readers pass the key they expect, and get nothing back
+when the artifact is missing or was built from different inputs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Any
+
+
+def digest(*parts: str | bytes) -> str:
+    """SHA-256 hex digest of `parts`, taken in order."""
+    hash_ = hashlib.sha256()
+    for part in parts:
+        hash_.update(part.encode() if isinstance(part, str) else part)
+        # Separator, so that e.g. ("ab", "c") and ("a", "bc") hash differently
+        hash_.update(b"\0")
+    return hash_.hexdigest()
+
+
+def dump_artifact(path: Path, key: str, payload: Any) -> None:
+    """Write `payload` to `path`, keyed by `key`."""
+    with path.open("wb") as f:
+        pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_artifact(path: Path, key: str) -> Any | None:
+    """Read the payload in `path` if it was written with key `key`, else return
+    `None`. The key is read first, so stale payloads are never unpickled.
+    """
+    try:
+        with path.open("rb") as f:
+            if pickle.load(f) != key:
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
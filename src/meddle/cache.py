@@ -0,0 +1,254 @@
+"""
+A persistent cache of parsed MDL commands, so that unchanged sources need not be
+parsed again, e.g. across CI runs. Entries are content-addressed: they are keyed by
+a hash of the source along with the grammar and `meddle` version it was parsed
+with, and hence never go stale, they only fall out of use.
+
+Entries are plain JSON, as cache directories are often writable by others than
+whoever reads them, e.g. shared across CI jobs. Reading a tampered entry can thus
+at worst result in the wrong `Command`, but never run any code.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, fields
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from sys import intern
+from time import perf_counter
+from typing import Any
+
+from meddle.artifacts import digest
+from meddle.parser import (
+    MDL_GRAMMAR,
+    Attribute,
+    Command,
+    Component,
+    Engine,
+    NodeList,
+    parse_and_transform,
+)
+
+try:
+    MEDDLE_VERSION = version("meddle")
+except PackageNotFoundError:
+    MEDDLE_VERSION = "unknown"
+# Entries written by other grammars or versions of `meddle` are not reused
+CACHE_NAMESPACE = digest(MDL_GRAMMAR, MEDDLE_VERSION)
+
+
+def encode_attribute(attribute: Attribute) -> tuple:
+    return (
+        attribute.name,
+        attribute.value,
+        attribute.command,
+    )
+
+
+def encode_component(component: Component) -> tuple:
+    return (
+        component.component_type_name,
+        component.component_name,
+        None
+        if component.attributes is None
+        else [encode_attribute(a) for a in component.attributes],
+    )
+
+
+def encode_command(command: Command) -> tuple:
+    """Encode `command` into plain tuples, lists and scalars, i.e. into what JSON
+    can hold, tuples being written as lists.
+    """
+    return (
+        command.command,
+        command.component_type_name,
+        command.component_name,
+        None
+        if command.attributes is None
+        else [encode_attribute(a) for a in command.attributes],
+        None
+        if command.components is None
+        else [encode_component(c) for c in command.components],
+        None
+        if command.commands is None
+        else [encode_command(c) for c in command.commands],
+        command.to_component_name,
+        command.logical_operator,
+    )
+
+
+def decode_attribute(encoded: tuple) -> Attribute:
+    name, value, command = encoded
+    return Attribute(intern(name), value, command)
+
+
+def decode_component(encoded: tuple) -> Component:
+    component_type_name, component_name, attributes = encoded
+    return Component(
+        intern(component_type_name),
+        component_name,
+        None
+        if attributes is None
+        else NodeList(decode_attribute(a) for a in attributes),
+    )
+
+
+def decode_command(encoded: tuple) -> Command:
+    """The inverse of `encode_command`."""
+    (
+        command,
+        component_type_name,
+        component_name,
+        attributes,
+        components,
+        commands,
+        to_component_name,
+        logical_operator,
+    ) = encoded
+    return Command(
+        command,
+        intern(component_type_name),
+        component_name,
+        None
+        if attributes is None
+        else NodeList(decode_attribute(a) for a in attributes),
+        None
+        if components is None
+        else NodeList(decode_component(c) for c in components),
+        None if commands is None else NodeList(decode_command(c) for c in commands),
+        to_component_name,
+        logical_operator,
+    )
+
+
+@dataclass
+class CacheStats:
+    """How useful a `ParseCache` has been. `time_saved` is in seconds: the time it
+    took to parse the sources of the hits, minus the time it took to read them back.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    time_saved: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __add__(self, other: CacheStats) -> CacheStats:
+        return CacheStats(
+            *(getattr(self, f.name) + getattr(other, f.name) for f in fields(self))
+        )
+
+    def __sub__(self, other: CacheStats) -> CacheStats:
+        return CacheStats(
+            *(getattr(self, f.name) - getattr(other, f.name) for f in fields(self))
+        )
+
+
+class ParseCache:
+    """A cache of parsed `Command`s in `directory`, one file per entry, holding at
+    most `max_bytes` of them. When full, the least recently used entries are
+    evicted. Safe to share across processes, as entries are written atomically.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 256 << 20):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        # Total size of the entries, computed on the first write
+        self.size: int | None = None
+
+    def key(self, source: str) -> str:
+        return digest(CACHE_NAMESPACE, source)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def read(self, key: str) -> Any | None:
+        """The entry under `key`, if any, marking it as recently used."""
+        path = self.path(key)
+        try:
+            with path.open(encoding="utf-8") as f:
+                # Same as `meddle.artifacts.load_artifact`, the key comes first
+                if f.readline().rstrip("\n") != key:
+                    return None
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Evicted in the meantime by someone else
+            pass
+        return entry
+
+    def write(self, key: str, entry: Any) -> None:
+        """Store `entry` under `key`, evicting other entries if need be."""
+        path = self.path(key)
+        # Written aside and moved in place, so that no reader ever sees half of it
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.write(f"{key}\n")
+            json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+        size = tmp_path.stat().st_size
+        os.replace(tmp_path, path)
+        if self.size is None:
+            self.size = sum(p.stat().st_size for p in self.directory.glob("*.json"))
+        else:
+            self.size += size
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache is down to 90% of
+        `max_bytes`, to leave room for a few more writes before evicting again.
+        """
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat(), path))
+            except FileNotFoundError:
+                continue
+        entries.sort(key=lambda e: e[0].st_mtime)
+        self.size = sum(stat.st_size for stat, _ in entries)
+        for stat, path in entries:
+            if self.size <= self.max_bytes * 0.9:
+                break
+            path.unlink(missing_ok=True)
+            self.size -= stat.st_size
+
+    def load(self, source: str, engine: Engine = "tree") -> Command:
+        """Deserialize `source` into a `Command`, from the cache if it is there
+        and parsing it with `engine` (and caching the result) otherwise.
+        """
+        key = self.key(source)
+        start = perf_counter()
+        entry = self.read(key)
+        command = None
+        if entry is not None:
+            try:
+                parse_time, encoded = entry
+                parse_time = float(parse_time)
+                command = decode_command(encoded)
+            except (TypeError, ValueError):
+                # Not written by `ParseCache`, e.g. edited by hand
+                command = None
+        if command is not None:
+            self.stats.hits += 1
+            self.stats.time_saved += parse_time - (perf_counter() - start)
+            return command
+        self.stats.misses += 1
+        command = parse_and_transform("mdl_command", source, engine)
+        self.write(key, (perf_counter() - start, encode_command(command)))
+        return command
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+        self.size = 0
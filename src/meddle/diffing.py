@@ -0,0 +1,207 @@
+"""
+Structural diff of two snapshots of a component, i.e. `CREATE` or `RECREATE`
+commands, into the `ALTER` command which turns the first one into the second one.
+
+Attributes are matched by name, and subcomponents by type and name, through the
+indexes of `meddle.parser.index_nodes`, so diffing takes time linear in the size of
+both snapshots, which assumes those names are unique within each of them. Changes
+are written as follows:
+- Attributes which are new, or whose values changed, are set. Multi-value
+  attributes which only lost or gained values have those values `DROP`ped or
+  `ADD`ed instead, provided that appending the latter keeps their order.
+- Attributes which are gone are emptied, e.g. `label()`, as MDL cannot unset them.
+- Subcomponents which are gone are `DROP`ped, new ones are `ADD`ed, and those which
+  changed are `MODIFY`d, setting or emptying their attributes as above (`MODIFY`
+  cannot `ADD` or `DROP` values). A subcomponent which is gone, and a new one of the
+  same type with the very same attributes, are `RENAME`d instead.
+"""
+
+from __future__ import annotations
+
+from copy import deepcopy
+
+from meddle.frozen import freeze_all
+from meddle.parser import (
+    ATTRIBUTE_KEY,
+    COMPONENT_KEY,
+    Attribute,
+    AttributeValue,
+    Command,
+    Component,
+    NodeList,
+    first_node,
+    index_nodes,
+    value_key,
+)
+
+# Commands which are snapshots of a component in full
+SNAPSHOT_COMMANDS = frozenset({"CREATE", "RECREATE"})
+
+
+def as_values(value: AttributeValue | list[AttributeValue]) -> list[AttributeValue]:
+    return value if isinstance(value, list) else [value]
+
+
+def as_value(values: list[AttributeValue]) -> AttributeValue | list[AttributeValue]:
+    """`values` as they are loaded back from MDL, i.e. a single one on its own."""
+    return values[0] if len(values) == 1 else values
+
+
+def diff_values(
+    name: str,
+    old_value: AttributeValue | list[AttributeValue] | None,
+    new_value: AttributeValue | list[AttributeValue] | None,
+    alter: bool = True,
+) -> list[Attribute]:
+    """The attributes turning the value of attribute `name` from `old_value` into
+    `new_value`, which only `ADD` or `DROP` values if `alter`, i.e. within `ALTER`.
+    Values are compared by `value_key`, as e.g. `1` and `True` differ in MDL.
+    """
+    if value_key(old_value) == value_key(new_value):
+        return []
+    if (
+        alter
+        and old_value is not None
+        and new_value is not None
+        # Multi-value attributes with a single value are loaded as just that value
+        and (isinstance(old_value, list) or isinstance(new_value, list))
+    ):
+        old_values, new_values = as_values(old_value), as_values(new_value)
+        old_keys = {value_key(v) for v in old_values}
+        new_keys = {value_key(v) for v in new_values}
+        kept = [v for v in old_values if value_key(v) in new_keys]
+        added = [v for v in new_values if value_key(v) not in old_keys]
+        # Otherwise values were reordered, or replaced altogether
+        if kept and value_key(kept + added) == value_key(new_values):
+            dropped = [v for v in old_values if value_key(v) not in new_keys]
+            return [
+                *([Attribute(name, as_value(dropped), "DROP")] if dropped else []),
+                *([Attribute(name, as_value(added), "ADD")] if added else []),
+            ]
+    return [Attribute(name, deepcopy(new_value))]
+
+
+def diff_attributes(
+    old: list[Attribute] | None, new: list[Attribute] | None, alter: bool = True
+) -> list[Attribute]:
+    """The attributes turning attributes `old` into `new`. See `diff_values`."""
+    old_index = index_nodes(old, ATTRIBUTE_KEY)
+    new_index = index_nodes(new, ATTRIBUTE_KEY)
+    changes = []
+    for attribute in new or []:
+        previous = first_node(old_index.get(attribute.name))
+        changes.extend(
+            diff_values(
+                attribute.name,
+                None if previous is None else previous.value,
+                attribute.value,
+                alter,
+            )
+        )
+    changes.extend(
+        Attribute(a.name)
+        for a in old or []
+        if a.name not in new_index and a.value is not None
+    )
+    return changes
+
+
+def diff_components(
+    old: list[Component] | None,
+    new: list[Component] | None,
+    detect_renames: bool = True,
+) -> list[Command]:
+    """The `ADD`, `MODIFY`, `DROP` and `RENAME` subcommands turning subcomponents
+    `old` into `new`, those of `old` first, in order, and then those `ADD`ed.
+    """
+    old_index = index_nodes(old, COMPONENT_KEY)
+    new_index = index_nodes(new, COMPONENT_KEY)
+    added = [c for c in new or [] if COMPONENT_KEY(c) not in old_index]
+    # The components each component which is gone is renamed to
+    renames: dict[tuple[str, str], Component] = {}
+    if detect_renames and added:
+        gone: dict[tuple, list[Component]] = {}
+        for c in reversed(old or []):
+            if COMPONENT_KEY(c) not in new_index:
+                key = (c.component_type_name, freeze_all(c.attributes))
+                gone.setdefault(key, []).append(c)
+        for c in added:
+            candidates = gone.get((c.component_type_name, freeze_all(c.attributes)))
+            if candidates:
+                renames[COMPONENT_KEY(candidates.pop())] = c
+    renamed = {COMPONENT_KEY(c) for c in renames.values()}
+    commands = []
+    for c in old or []:
+        key = COMPONENT_KEY(c)
+        if key in renames:
+            commands.append(
+                Command(
+                    "RENAME",
+                    c.component_type_name,
+                    c.component_name,
+                    to_component_name=renames[key].component_name,
+                )
+            )
+        elif key not in new_index:
+            commands.append(Command("DROP", c.component_type_name, c.component_name))
+        else:
+            changes = diff_attributes(
+                c.attributes, first_node(new_index[key]).attributes, alter=False
+            )
+            if changes:
+                commands.append(
+                    Command(
+                        "MODIFY",
+                        c.component_type_name,
+                        c.component_name,
+                        NodeList(changes),
+                    )
+                )
+    commands.extend(
+        Command(
+            "ADD",
+            c.component_type_name,
+            c.component_name,
+            deepcopy(c.attributes),
+        )
+        for c in added
+        if COMPONENT_KEY(c) not in renamed
+    )
+    return commands
+
+
+def diff(old: Command, new: Command, detect_renames: bool = True) -> Command:
+    """The `ALTER` command turning snapshot `old` into snapshot `new`, both of them
+    `CREATE` or `RECREATE` commands of the same component, which has neither
+    attributes nor subcommands if there is nothing to change. Subcomponents are
+    `DROP`ped and `ADD`ed rather than `RENAME`d unless `detect_renames`. E.g.
+
+    >>> diff(
+    ...     Command.loads("RECREATE Picklist p__c (label('P'), Picklistentry a__c (order(0)))"),
+    ...     Command.loads("RECREATE Picklist p__c (label('Q'), Picklistentry b__c (order(0)))"),
+    ... ).dumps()
+    ALTER Picklist p__c (
+        label('Q'),
+        RENAME Picklistentry a__c TO b__c;
+    );
+    """
+    for command in (old, new):
+        if command.command.upper() not in SNAPSHOT_COMMANDS:
+            raise ValueError(
+                f"Can only diff 'CREATE' and 'RECREATE' commands, got "
+                f"{command.command!r}."
+            )
+    if COMPONENT_KEY(old) != COMPONENT_KEY(new):
+        raise ValueError(
+            f"Cannot diff component {old.component_type_name}.{old.component_name} "
+            f"against another one, {new.component_type_name}.{new.component_name}."
+        )
+    attributes = diff_attributes(old.attributes, new.attributes)
+    commands = diff_components(old.components, new.components, detect_renames)
+    return Command(
+        "ALTER",
+        new.component_type_name,
+        new.component_name,
+        NodeList(attributes) if attributes else None,
+        commands=NodeList(commands) if commands else None,
+    )
@@ -0,0 +1,411 @@
+"""
+A hand-written recursive descent parser for MDL, selected via `engine="fast"` in
+`Attribute.loads`, `Component.loads`, `Command.loads`, etc. It produces the very
+same `Attribute`s, `Component`s, and `Command`s as the `lark` based engines in
+`parser.py`, only faster, by following `mdl_grammar.lark` rule by rule: every
+public method of `FastParser` is named after, and documented with, the grammar
+rule it implements.
+"""
+
+from __future__ import annotations
+
+import re
+from sys import intern
+from typing import Any
+
+from lark.exceptions import UnexpectedInput
+
+from meddle.parser import (
+    Attribute,
+    AttributeValue,
+    Command,
+    Component,
+    NodeList,
+    Unreachable,
+)
+
+# Terminals of `mdl_grammar.lark`
+WHITESPACE_PATTERN = re.compile(r"[ \t\f\r\n]*")
+COMMAND_KEYWORD_PATTERN = re.compile(r"CREATE|RECREATE|DROP|RENAME|ALTER")
+SUBCOMMAND_KEYWORD_PATTERN = re.compile(r"DROP|MODIFY|RENAME|ADD")
+LOGICAL_OPERATOR_PATTERN = re.compile(r"IF EXISTS|IF NOT EXISTS")
+COMPONENT_TYPE_NAME_PATTERN = re.compile(r"[A-Z][a-z]+")
+COMPONENT_NAME_PATTERN = re.compile(r"[a-z0-9_\.]+")
+ATTRIBUTE_NAME_PATTERN = re.compile(r"[a-z]{1}[a-zA-Z0-9_]+")
+STRING_PATTERN = re.compile(r"([^']|'')+", flags=re.DOTALL)
+XML_PATTERN = re.compile(r"((?!\}).)+", flags=re.DOTALL)
+# `INT` and `DECIMAL` from `lark`'s `common.lark`
+NUMBER_PATTERN = re.compile(r"\d+(\.\d*)?|\.\d+")
+
+
+class FastParserError(UnexpectedInput):
+    """Raised on syntax errors. Being an `lark.exceptions.UnexpectedInput`, syntax
+    errors can be handled the same way regardless of the engine.
+    """
+
+    def __init__(self, source: str, position: int, expected: str):
+        self.pos_in_stream = position
+        self.line = source.count("\n", 0, position) + 1
+        self.column = position - source.rfind("\n", 0, position)
+        self.expected = expected
+        super().__init__(
+            f"Expected {expected} at line {self.line}, column {self.column}. "
+            f"Got {source[position : position + 20]!r}."
+        )
+
+
+class FastParser:
+    """A recursive descent parser for `mdl_grammar.lark`. The state is just the
+    source and the position up to which it has been consumed.
+    """
+
+    __slots__ = ("position", "source")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.position = 0
+
+    def error(self, expected: str) -> FastParserError:
+        return FastParserError(self.source, self.position, expected)
+
+    def peek(self) -> str:
+        """Skip whitespace (as per `%ignore WS`) and return the next character, or
+        an empty string at the end of the source.
+        """
+        position = WHITESPACE_PATTERN.match(self.source, self.position).end()  # type: ignore[union-attr]
+        self.position = position
+        return self.source[position : position + 1]
+
+    def peek_pattern(self, pattern: re.Pattern) -> str | None:
+        """The match of `pattern` at the next token, if any, without consuming it."""
+        self.peek()
+        match_ = pattern.match(self.source, self.position)
+        return None if match_ is None else match_.group()
+
+    def accept(self, literal: str) -> bool:
+        """Consume `literal` if it is the next token."""
+        self.peek()
+        if self.source.startswith(literal, self.position):
+            self.position += len(literal)
+            return True
+        return False
+
+    def expect(self, literal: str) -> None:
+        if not self.accept(literal):
+            raise self.error(repr(literal))
+
+    def expect_pattern(self, pattern: re.Pattern, expected: str) -> str:
+        self.peek()
+        match_ = pattern.match(self.source, self.position)
+        if match_ is None:
+            raise self.error(expected)
+        self.position = match_.end()
+        return match_.group()
+
+    def expect_end(self) -> None:
+        if self.peek():
+            raise self.error("end of input")
+
+    def at_attribute(self) -> bool:
+        return "a" <= self.peek() <= "z"
+
+    def at_component(self) -> bool:
+        """Component type names are capitalized, whereas keywords are upper case."""
+        return self.peek_pattern(COMPONENT_TYPE_NAME_PATTERN) is not None
+
+    # Rules
+
+    def mdl_command(self) -> Command:
+        """mdl_command : create_command | recreate_command | drop_command
+        | rename_command | alter_command
+        """
+        keyword = self.peek_pattern(COMMAND_KEYWORD_PATTERN)
+        if keyword is None:
+            raise self.error("'CREATE', 'RECREATE', 'DROP', 'RENAME', or 'ALTER'")
+        return getattr(self, f"{keyword.lower()}_command")()
+
+    def create_command(self) -> Command:
+        """create_command : "CREATE" component_type_name logical_operator?
+        component_name "(" attributes? components? ")" ";"?
+        """
+        return self.command_with_body("CREATE")
+
+    def recreate_command(self) -> Command:
+        """recreate_command : "RECREATE" component_type_name logical_operator?
+        component_name "(" attributes? components? ")" ";"?
+        """
+        return self.command_with_body("RECREATE")
+
+    def add_command(self) -> Command:
+        """add_command : "ADD" component_type_name logical_operator? component_name
+        "(" attributes? components? ")" ";"?
+        """
+        return self.command_with_body("ADD")
+
+    def modify_command(self) -> Command:
+        """modify_command : "MODIFY" component_type_name logical_operator?
+        component_name "(" attributes? components? ")" ";"?
+        """
+        return self.command_with_body("MODIFY")
+
+    def alter_command(self) -> Command:
+        """alter_command : "ALTER" component_type_name logical_operator?
+        component_name "(" alter_attributes? components? alter_subcommands? ")" ";"?
+        """
+        return self.command_with_body("ALTER")
+
+    def command_with_body(self, keyword: str) -> Command:
+        """The bulk of `create_command`, `recreate_command`, `add_command`,
+        `modify_command`, and `alter_command`.
+        """
+        self.expect(keyword)
+        component_type_name = self.component_type_name()
+        logical_operator = (
+            self.logical_operator()
+            if self.peek_pattern(LOGICAL_OPERATOR_PATTERN)
+            else None
+        )
+        component_name = self.component_name()
+        self.expect("(")
+        is_alter = keyword == "ALTER"
+        attributes, components, commands = None, None, None
+        if self.at_attribute():
+            attributes = self.alter_attributes() if is_alter else self.attributes()
+        if self.at_component():
+            components = self.components()
+        if is_alter and self.peek_pattern(SUBCOMMAND_KEYWORD_PATTERN):
+            commands = self.alter_subcommands()
+        if (
+            not is_alter
+            and attributes is None
+            and components is None
+            and commands is None
+        ):
+            # Same as `command_node_processor_factory`
+            raise Unreachable(f"Got [] for {keyword!r}")
+        self.expect(")")
+        self.accept(";")
+        return Command(
+            command=keyword,
+            component_type_name=component_type_name,
+            component_name=component_name,
+            attributes=attributes,
+            components=components,
+            commands=commands,
+            logical_operator=logical_operator,
+        )
+
+    def drop_command(self) -> Command:
+        """drop_command : "DROP" component_type_name component_name ";"?"""
+        self.expect("DROP")
+        component_type_name = self.component_type_name()
+        component_name = self.component_name()
+        self.accept(";")
+        return Command("DROP", component_type_name, component_name)
+
+    def rename_command(self) -> Command:
+        """rename_command : "RENAME" component_type_name component_name "TO"
+        component_name ";"?
+        """
+        self.expect("RENAME")
+        component_type_name = self.component_type_name()
+        component_name = self.component_name()
+        self.expect("TO")
+        to_component_name = self.component_name()
+        self.accept(";")
+        return Command(
+            "RENAME",
+            component_type_name,
+            component_name,
+            to_component_name=to_component_name,
+        )
+
+    def alter_subcommands(self) -> list[Command]:
+        """alter_subcommands : alter_subcommand (";"? alter_subcommand)* ";"?"""
+        commands = [self.alter_subcommand()]
+        while True:
+            self.accept(";")
+            if not self.peek_pattern(SUBCOMMAND_KEYWORD_PATTERN):
+                return NodeList(commands)
+            commands.append(self.alter_subcommand())
+
+    def alter_subcommand(self) -> Command:
+        """alter_subcommand : drop_command | modify_command | rename_command
+        | add_command
+        """
+        keyword = self.peek_pattern(SUBCOMMAND_KEYWORD_PATTERN)
+        if keyword is None:
+            raise self.error("'DROP', 'MODIFY', 'RENAME', or 'ADD'")
+        return getattr(self, f"{keyword.lower()}_command")()
+
+    def logical_operator(self) -> str:
+        """logical_operator : if_exists | if_not_exists"""
+        return intern(self.expect_pattern(LOGICAL_OPERATOR_PATTERN, "logical operator"))
+
+    def components(self) -> list[Component]:
+        """components : component ("," component)* ","?"""
+        components = [self.component()]
+        while self.accept(","):
+            if not self.at_component():
+                break
+            components.append(self.component())
+        return NodeList(components)
+
+    def component(self) -> Component:
+        """component : component_type_name component_name "(" attributes ")" """
+        component_type_name = self.component_type_name()
+        component_name = self.component_name()
+        self.expect("(")
+        attributes = self.attributes()
+        self.expect(")")
+        return Component(component_type_name, component_name, attributes)
+
+    def component_type_name(self) -> str:
+        """component_type_name : /[A-Z][a-z]+/"""
+        # Names repeat throughout a tree, hence they are interned to share them
+        return intern(
+            self.expect_pattern(COMPONENT_TYPE_NAME_PATTERN, "component type name")
+        )
+
+    def component_name(self) -> str:
+        r"""component_name : /[a-z0-9_\.]+/"""
+        return self.expect_pattern(COMPONENT_NAME_PATTERN, "component name")
+
+    def attributes(self) -> list[Attribute]:
+        """attributes : attribute ("," attribute)* ","?"""
+        attributes = [self.attribute()]
+        while self.accept(","):
+            if not self.at_attribute():
+                break
+            attributes.append(self.attribute())
+        return NodeList(attributes)
+
+    def alter_attributes(self) -> list[Attribute]:
+        """alter_attributes : alter_attribute ("," alter_attribute)* ","?"""
+        attributes = [self.alter_attribute()]
+        while self.accept(","):
+            if not self.at_attribute():
+                break
+            attributes.append(self.alter_attribute())
+        return NodeList(attributes)
+
+    def alter_attribute(self) -> Attribute:
+        """alter_attribute : attribute_name (add | drop)? "(" attribute_value ")" """
+        name = self.attribute_name()
+        command = (
+            "ADD" if self.accept("ADD") else "DROP" if self.accept("DROP") else None
+        )
+        self.expect("(")
+        value = self.attribute_value()
+        self.expect(")")
+        return Attribute(name, value, command)
+
+    def attribute(self) -> Attribute:
+        """attribute : attribute_name "(" attribute_value ")" """
+        name = self.attribute_name()
+        self.expect("(")
+        value = self.attribute_value()
+        self.expect(")")
+        return Attribute(name, value)
+
+    def attribute_name(self) -> str:
+        """attribute_name : /[a-z]{1}[a-zA-Z0-9_]+/"""
+        return intern(self.expect_pattern(ATTRIBUTE_NAME_PATTERN, "attribute name"))
+
+    def attribute_value(self) -> AttributeValue | list[AttributeValue] | None:
+        """attribute_value : value? ("," value)*"""
+        next_ = self.peek()
+        if next_ == ")" or not next_:
+            return None
+        values = [] if next_ == "," else [self.value()]
+        while self.accept(","):
+            values.append(self.value())
+        if len(values) == 1:
+            return values[0]
+        return values
+
+    def value(self) -> AttributeValue:
+        """value : xml | boolean | string | number"""
+        next_ = self.peek()
+        if next_ == "'":
+            return self.string()
+        if next_ == "{":
+            return self.xml()
+        if next_ == "t" or next_ == "f":
+            return self.boolean()
+        return self.number()
+
+    def string(self) -> str:
+        """string : "'" /([^']|'')+/s "'" | "''" """
+        if self.accept("''"):
+            return ""
+        self.expect("'")
+        value = self.expect_pattern(STRING_PATTERN, "string")
+        self.expect("'")
+        return value
+
+    def xml(self) -> str:
+        r"""xml : "{" /((?!\}).)+/s "}" """
+        self.expect("{")
+        value = self.expect_pattern(XML_PATTERN, "XML")
+        self.expect("}")
+        return value
+
+    def boolean(self) -> bool:
+        """boolean : true | false"""
+        if self.accept("true"):
+            return True
+        if self.accept("false"):
+            return False
+        raise self.error("'true' or 'false'")
+
+    def number(self) -> float | int:
+        """number : INT | DECIMAL"""
+        value = self.expect_pattern(NUMBER_PATTERN, "value")
+        if "." in value:
+            return float(value)
+        return int(value)
+
+
+# The grammar rules `parse` can start from
+STARTS = frozenset(
+    {
+        "mdl_command",
+        "create_command",
+        "recreate_command",
+        "drop_command",
+        "rename_command",
+        "alter_command",
+        "alter_subcommands",
+        "alter_subcommand",
+        "add_command",
+        "modify_command",
+        "logical_operator",
+        "components",
+        "component",
+        "attributes",
+        "alter_attributes",
+        "alter_attribute",
+        "attribute",
+        "attribute_name",
+        "attribute_value",
+        "string",
+        "number",
+        "boolean",
+        "xml",
+    }
+)
+
+
+def parse(start: str, source: str) -> Any:
+    """Parse the whole of `source` from grammar rule `start` (see `STARTS`). The
+    fast counterpart of `parse_and_transform`.
+    """
+    if start not in STARTS:
+        raise ValueError(
+            f"Starting symbol {start!r} is not supported by the fast engine."
+        )
+    parser = FastParser(source)
+    parsed = getattr(parser, start)()
+    parser.expect_end()
+    return parsed
@@ -0,0 +1,189 @@
+"""
+Immutable, hashable counterparts of `Attribute`, `Component` and `Command`, e.g. to
+deduplicate commands, or to tell which ones are in a given snapshot, with sets and
+dictionaries.
+
+Each frozen node hashes its structure once, on creation, out of the hashes its
+children have already cached, so hashing is constant time. Equality compares hashes
+first, and only nodes whose hashes are equal are compared in depth. Attribute values
+only compare equal if of the same type, e.g. `1` and `True` do not, as in MDL. Lists, i.e.
+those of multi-value attributes, attributes, components and subcommands, are frozen
+into tuples. See `freeze` and `thaw` to go back and forth.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, overload
+
+from meddle.parser import (
+    Attribute,
+    AttributeValue,
+    Command,
+    Component,
+    NodeList,
+    value_key,
+)
+
+
+class FrozenNode(ABC):
+    """What `FrozenAttribute`, `FrozenComponent` and `FrozenCommand` share."""
+
+    __slots__ = ()
+    structural_hash: int
+
+    def __post_init__(self):
+        # Children have cached their own hashes already
+        object.__setattr__(self, "structural_hash", hash(self.key()))
+
+    @abstractmethod
+    def fields(self) -> tuple:
+        """The values of the fields of `self`, in order, but for its hash."""
+
+    def key(self) -> tuple:
+        """What `self` is hashed and compared by, its `fields` unless overridden."""
+        return self.fields()
+
+    def __hash__(self) -> int:
+        return self.structural_hash
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        return (
+            self.structural_hash == other.structural_hash and self.key() == other.key()
+        )
+
+    def __reduce__(self):
+        # Hashes of strings differ from one process to the next, so they are
+        # computed anew rather than pickled
+        return (type(self), self.fields())
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class FrozenAttribute(FrozenNode):
+    """An immutable `Attribute`."""
+
+    name: str
+    value: AttributeValue | tuple[AttributeValue, ...] | None = None
+    command: str | None = None
+    structural_hash: int = field(init=False, repr=False)
+
+    def fields(self) -> tuple:
+        return (self.name, self.value, self.command)
+
+    def key(self) -> tuple:
+        return (self.name, value_key(self.value), self.command)
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class FrozenComponent(FrozenNode):
+    """An immutable `Component`."""
+
+    component_type_name: str
+    component_name: str
+    attributes: tuple[FrozenAttribute, ...] | None = None
+    structural_hash: int = field(init=False, repr=False)
+
+    def fields(self) -> tuple:
+        return (self.component_type_name, self.component_name, self.attributes)
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class FrozenCommand(FrozenNode):
+    """An immutable `Command`."""
+
+    command: str
+    component_type_name: str
+    component_name: str
+    attributes: tuple[FrozenAttribute, ...] | None = None
+    components: tuple[FrozenComponent, ...] | None = None
+    commands: tuple[FrozenCommand, ...] | None = None
+    to_component_name: str | None = None
+    logical_operator: str | None = None
+    structural_hash: int = field(init=False, repr=False)
+
+    def fields(self) -> tuple:
+        return (
+            self.command,
+            self.component_type_name,
+            self.component_name,
+            self.attributes,
+            self.components,
+            self.commands,
+            self.to_component_name,
+            self.logical_operator,
+        )
+
+
+def freeze_all(nodes: list | None) -> tuple | None:
+    return None if nodes is None else tuple(freeze(n) for n in nodes)
+
+
+def thaw_all(nodes: tuple | None) -> NodeList | None:
+    return None if nodes is None else NodeList(thaw(n) for n in nodes)
+
+
+@overload
+def freeze(node: Attribute) -> FrozenAttribute: ...
+@overload
+def freeze(node: Component) -> FrozenComponent: ...
+@overload
+def freeze(node: Command) -> FrozenCommand: ...
+def freeze(node: Any) -> Any:
+    """The frozen counterpart of `node`. A `LazyCommand` is loaded in full."""
+    if isinstance(node, Attribute):
+        value = tuple(node.value) if isinstance(node.value, list) else node.value
+        return FrozenAttribute(node.name, value, node.command)
+    if isinstance(node, Component):
+        return FrozenComponent(
+            node.component_type_name,
+            node.component_name,
+            freeze_all(node.attributes),
+        )
+    if isinstance(node, Command):
+        return FrozenCommand(
+            node.command,
+            node.component_type_name,
+            node.component_name,
+            freeze_all(node.attributes),
+            freeze_all(node.components),
+            freeze_all(node.commands),
+            node.to_component_name,
+            node.logical_operator,
+        )
+    raise TypeError(f"Cannot freeze {node!r}.")
+
+
+@overload
+def thaw(node: FrozenAttribute) -> Attribute: ...
+@overload
+def thaw(node: FrozenComponent) -> Component: ...
+@overload
+def thaw(node: FrozenCommand) -> Command: ...
+def thaw(node: Any) -> Any:
+    """The mutable counterpart of `node`, such that `thaw(freeze(n)) == n`."""
+    if isinstance(node, FrozenAttribute):
+        value = list(node.value) if isinstance(node.value, tuple) else node.value
+        return Attribute(node.name, value, node.command)
+    if isinstance(node, FrozenComponent):
+        return Component(
+            node.component_type_name,
+            node.component_name,
+            thaw_all(node.attributes),
+        )
+    if isinstance(node, FrozenCommand):
+        return Command(
+            node.command,
+            node.component_type_name,
+            node.component_name,
+            thaw_all(node.attributes),
+            thaw_all(node.components),
+            thaw_all(node.commands),
+            node.to_component_name,
+            node.logical_operator,
+        )
+    raise TypeError(f"Cannot thaw {node!r}.")
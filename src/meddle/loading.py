@@ -0,0 +1,236 @@
+"""
+Bulk loading of MDL files, fanned out over a pool of worker processes since
+parsing is CPU-bound.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, TypeVar
+
+from lark.exceptions import UnexpectedInput, VisitError
+
+from meddle import profiling
+from meddle.parser import Command, Engine, Unreachable, get_parser, load_file
+from meddle.profiling import Profile
+
+if TYPE_CHECKING:
+    from meddle.cache import CacheStats, ParseCache
+
+
+T = TypeVar("T")
+
+# The errors loading a file reports in its `LoadResult`: it could not be read,
+# decoded, parsed, or built into commands even though it parsed, e.g. those with
+# empty bodies, which the "tree" engine raises wrapped in a `VisitError`. Any
+# other is a bug, and raised as such
+LOAD_ERRORS = (OSError, UnicodeDecodeError, UnexpectedInput, VisitError, Unreachable)
+
+
+@dataclass
+class LoadResult:
+    """The outcome of loading the MDL file in `path`: either the `commands` in it
+    or, if loading failed, the `error` explaining why. If loaded through a
+    `ParseCache`, `cache_stats` tells how it fared for this file. If loaded in a
+    worker process while profiling, `profile` is what loading it took there.
+    """
+
+    path: Path
+    commands: list[Command] | None = None
+    error: str | None = None
+    cache_stats: CacheStats | None = None
+    profile: Profile | None = None
+
+
+def load_result(
+    path: Path,
+    load: Callable[[], Iterable[Command]],
+    cache: ParseCache | None = None,
+    profiled: bool = False,
+) -> LoadResult:
+    """Load the commands in `path` with `load`, reporting rather than raising
+    `LOAD_ERRORS`, i.e. those to do with the file itself rather than with `meddle`.
+    If `profiled`, loading is recorded into a `Profile` of its own, e.g. to send it
+    back from a worker process.
+    """
+    stats = None if cache is None else replace(cache.stats)
+    with profiling.profile() if profiled else nullcontext() as profile:
+        try:
+            result = LoadResult(path, commands=list(load()))
+        except LOAD_ERRORS as e:
+            # Exceptions are not necessarily picklable, so they cannot be sent back
+            # from worker processes as they are
+            result = LoadResult(path, error=f"{type(e).__name__}: {e}")
+    result.profile = profile
+    if cache is not None and stats is not None:
+        result.cache_stats = cache.stats - stats
+    return result
+
+
+def load_path(
+    path: Path,
+    engine: Engine = "tree",
+    cache: ParseCache | None = None,
+    profiled: bool = False,
+) -> LoadResult:
+    """Load the MDL file in `path`. See `load_result`."""
+    return load_result(
+        path, lambda: load_file(path, engine, cache=cache), cache, profiled
+    )
+
+
+def decode_source(data: bytes) -> str:
+    """Decode the contents of an MDL file as `open` would have, so that e.g.
+    newlines are translated the same way.
+    """
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def load_source(
+    path: Path,
+    data: bytes,
+    engine: Engine = "tree",
+    cache: ParseCache | None = None,
+    profiled: bool = False,
+) -> LoadResult:
+    """Load the contents `data` of the MDL file in `path`, e.g. read from an
+    archive, decoding them too. See `load_result`.
+    """
+    return load_result(
+        path,
+        lambda: Command.load_many(decode_source(data), engine, cache),
+        cache,
+        profiled,
+    )
+
+
+def load_paths(
+    paths: list[Path],
+    engine: Engine,
+    cache: ParseCache | None = None,
+    profiled: bool = False,
+) -> list[LoadResult]:
+    """Load many MDL files, as a single unit of work of a worker process."""
+    return [load_path(p, engine, cache, profiled) for p in paths]
+
+
+def load_sources(
+    sources: list[tuple[Path, bytes]],
+    engine: Engine,
+    cache: ParseCache | None = None,
+    profiled: bool = False,
+) -> list[LoadResult]:
+    """Load the contents of many MDL files, as a single unit of work of a worker
+    process.
+    """
+    return [load_source(p, d, engine, cache, profiled) for p, d in sources]
+
+
+def chunked(iterable: Iterable[T], size: int) -> Generator[list[T], None, None]:
+    """Lazily split `iterable` into lists of `size` elements (but the last one)."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def warm_up(engine: Engine) -> None:
+    """Worker process initializer, building the parser once upfront."""
+    if engine != "fast":
+        get_parser("mdl_command", engine)
+
+
+def load_in_pool(
+    function: Callable[..., list[LoadResult]],
+    chunks: Iterable[list[T]],
+    engine: Engine,
+    workers: int | None,
+    ordered: bool,
+    cache: ParseCache | None = None,
+) -> Generator[LoadResult, None, None]:
+    """Apply `function` to each of `chunks` over `workers` processes (as many as
+    CPUs if `None`, and none but the current one if 1), yielding results in the
+    order of `chunks` if `ordered` and in order of completion otherwise. Only a
+    few chunks are in flight at any time, so that memory is bounded regardless of
+    how many there are. `cache` is passed on to `function`, and the statistics of
+    the copies of it in worker processes are added up into `cache.stats`. Likewise,
+    what worker processes record while profiling is merged into the active profile.
+    """
+    if workers == 1:
+        for chunk in chunks:
+            yield from function(chunk, engine, cache)
+        return
+    current = profiling.active
+    function = partial(function, cache=cache, profiled=current is not None)
+    for result in load_in_processes(function, chunks, engine, workers, ordered):
+        if cache is not None and result.cache_stats is not None:
+            cache.stats += result.cache_stats
+        if current is not None and result.profile is not None:
+            current.merge(result.profile)
+        yield result
+
+
+def load_in_processes(
+    function: Callable[[list[T], Engine], list[LoadResult]],
+    chunks: Iterable[list[T]],
+    engine: Engine,
+    workers: int | None,
+    ordered: bool,
+) -> Generator[LoadResult, None, None]:
+    """See `load_in_pool`."""
+    # Imported here since `multiprocessing` would otherwise slow `import meddle` down
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    chunks = iter(chunks)
+    executor = ProcessPoolExecutor(workers, initializer=warm_up, initargs=(engine,))
+
+    def submit(chunk: list[T]) -> Future[list[LoadResult]]:
+        return executor.submit(function, chunk, engine)
+
+    try:
+        if ordered:
+            in_order = deque(submit(c) for c in islice(chunks, 2 * workers))
+            while in_order:
+                future = in_order.popleft()
+                in_order.extend(submit(c) for c in islice(chunks, 1))
+                yield from future.result()
+        else:
+            pending = {submit(c) for c in islice(chunks, 2 * workers)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.update(submit(c) for c in islice(chunks, 1))
+                    yield from future.result()
+    finally:
+        # Do not wait for files nobody will consume anymore, e.g. when the caller
+        # breaks out of the loop early
+        executor.shutdown(cancel_futures=True)
+
+
+def load_directory(
+    path: str | Path,
+    workers: int | None = None,
+    ordered: bool = True,
+    pattern: str = "*.mdl",
+    engine: Engine = "tree",
+    chunk_size: int = 16,
+    cache: ParseCache | None = None,
+) -> Generator[LoadResult, None, None]:
+    """Load every MDL file under directory `path` (recursively) matching glob
+    `pattern`, using `workers` processes (see `load_in_pool`). Results are yielded
+    as they come, in the order of the sorted file paths if `ordered` and in order of
+    completion otherwise. Files are sent to workers `chunk_size` at a time to
+    amortize inter-process communication. Commands are parsed through `cache`, if
+    given.
+    """
+    paths = sorted(Path(path).rglob(pattern))
+    yield from load_in_pool(
+        load_paths, chunked(paths, chunk_size), engine, workers, ordered, cache
+    )
@@ -0,0 +1,135 @@
+"""
+Package-level validation, i.e. checking that the components referenced by the MDL
+commands of a whole package (e.g. a VPK or a directory of MDL files) exist within
+it. `Command.validate` only checks that references look right, e.g. that the value
+of an attribute referencing an `Object` starts with `Object.`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from meddle.loading import LoadResult
+from meddle.parser import Command, Component
+from meddle.validation import ComponentSchema, Schema, default_schema
+
+# Attribute kinds (see `meddle.validation.AttributeType`) whose values reference
+# other components
+REFERENCE_KINDS = frozenset({"reference", "generic reference"})
+# Commands which do not leave the component they target in place
+NON_DEFINING_COMMANDS = frozenset({"DROP", "RENAME"})
+
+
+@dataclass
+class Reference:
+    """A reference to component `value`, e.g. `'Objecttype.base__v'`, made by
+    `attribute` of the (sub)component at `path` of a command. `path` is as in
+    `meddle.validation.Violation`, and `source` is the file the command was loaded
+    from, if known.
+    """
+
+    source: Path | None
+    path: tuple[str, ...]
+    attribute: str
+    value: str
+
+
+class PackageIndex:
+    """An index of every component defined across a set of commands, i.e. created,
+    recreated, altered, added, modified or renamed into, along with the references
+    those commands make to components, so that all of them can be resolved in one
+    go. Which attributes are references is looked up in `schema`, which defaults to
+    that of `validation.json`.
+    """
+
+    def __init__(self, schema: Schema | None = None):
+        self.schema = default_schema() if schema is None else schema
+        # `"<component type>.<component name>"` of every component defined, along
+        # with where it was first defined
+        self.definitions: dict[str, tuple[Path | None, tuple[str, ...]]] = {}
+        self.references: list[Reference] = []
+
+    @classmethod
+    def from_commands(
+        cls,
+        commands: Iterable[Command],
+        source: Path | None = None,
+        schema: Schema | None = None,
+    ) -> PackageIndex:
+        index = cls(schema)
+        for command in commands:
+            index.add(command, source)
+        return index
+
+    @classmethod
+    def from_results(
+        cls, results: Iterable[LoadResult], schema: Schema | None = None
+    ) -> PackageIndex:
+        """Index the commands loaded by e.g. `meddle.load_directory` or
+        `meddle.vpk.load_vpk`. Files which failed to load are skipped.
+        """
+        index = cls(schema)
+        for result in results:
+            for command in result.commands or []:
+                index.add(command, result.path)
+        return index
+
+    def add(self, command: Command, source: Path | None = None) -> None:
+        """Index the components `command` defines and the references it makes."""
+        schema = self.schema.component(command.component_type_name)
+        self.visit(command, schema, source, ())
+
+    def define(
+        self, component_type_name: str, name: str, source: Path | None, path: tuple
+    ) -> None:
+        self.definitions.setdefault(f"{component_type_name}.{name}", (source, path))
+
+    def visit(
+        self,
+        node: Command | Component,
+        schema: ComponentSchema | None,
+        source: Path | None,
+        path: tuple[str, ...],
+    ) -> None:
+        ctn = node.component_type_name
+        path = (*path, f"{ctn}.{node.component_name}")
+        if isinstance(node, Command):
+            if node.command not in NON_DEFINING_COMMANDS:
+                self.define(ctn, node.component_name, source, path)
+            elif node.command == "RENAME" and node.to_component_name is not None:
+                self.define(ctn, node.to_component_name, source, path)
+        else:
+            self.define(ctn, node.component_name, source, path)
+        # Without a schema there is no telling which attributes are references.
+        # `Command.validate` reports such component types
+        if schema is None:
+            return
+        for a in node.attributes or []:
+            attribute_type = schema.attributes.get(a.name)
+            if attribute_type is None or attribute_type.kind not in REFERENCE_KINDS:
+                continue
+            for value in a.value if isinstance(a.value, list) else [a.value]:
+                if isinstance(value, str):
+                    self.references.append(Reference(source, path, a.name, value))
+        if isinstance(node, Command):
+            for c in [*(node.components or []), *(node.commands or [])]:
+                self.visit(c, schema.subcomponent(c.component_type_name), source, path)
+
+    def __contains__(self, reference: object) -> bool:
+        """Whether the component `reference`, e.g. `'Objecttype.base__v'`, is
+        defined in the package.
+        """
+        return reference in self.definitions
+
+    def unresolved(self, known: Iterable[str] = ()) -> list[Reference]:
+        """Every reference to a component which is not defined in the package, nor
+        in `known`, e.g. the components already in the target Vault.
+        """
+        known = set(known)
+        return [
+            r
+            for r in self.references
+            if r.value not in self.definitions and r.value not in known
+        ]
@@ -1,17 +1,50 @@
 from __future__ import annotations
 from collections import deque
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from io import BytesIO
+from operator import attrgetter
 from pathlib import Path
-from typing import Any, Callable, Generator, Iterable, Literal, TypeAlias, overload
+import re
+from sys import intern
+from threading import Lock
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Hashable,
+    Iterable,
+    Iterator,
+    Literal,
+    TYPE_CHECKING,
+    TextIO,
+    TypeAlias,
+    overload,
+)
 
+import lark
 from lark import Lark, Transformer, Tree, Token
 
+from meddle import profiling
+from meddle.artifacts import digest, dump_artifact, load_artifact
+from meddle.profiling import Profile, encoded_size, profiled
 from meddle.validation import (
-    ValidationError,
-    component_type_metadata,
-    type_check_attribute,
+    ComponentSchema,
+    Schema,
+    ValidationError as ValidationError,  # Re-exported, formerly raised here
+    ValidationCache,
+    ValidationReport,
+    Violation,
+    as_component_schema,
+    as_schema,
+    default_schema,
+    load_schema,
+    validation_outcome,
 )
 
+if TYPE_CHECKING:
+    from meddle.cache import ParseCache
+
 
 INDENT = " " * 4
 
@@ -23,6 +56,36 @@ class Unreachable(Exception):
 here = Path(__file__).parent
 MDL_GRAMMAR = (here / "mdl_grammar.lark").read_text()
 
+# Precompiled parsers shipped with the package, built by
+# `scripts/build_artifacts.py`. See `build_parser_artifact`.
+PARSER_ARTIFACT_PATH = here / "mdl_parsers.pickle"
+# The starting symbols used by `Attribute.loads`, `Component.loads`, and
+# `Command.loads`. Parsers for any other starting symbol are compiled at runtime.
+PARSER_ARTIFACT_STARTS = ("attribute", "component", "mdl_command")
+# The engines using `lark`, whose parsers are serialized along with their options,
+# e.g. the transformer of the "inline" engine
+PARSER_ARTIFACT_ENGINES = ("tree", "inline")
+# Serialized parsers go stale whenever the grammar or `lark` itself change
+PARSER_ARTIFACT_KEY = digest(MDL_GRAMMAR, lark.__version__, *PARSER_ARTIFACT_ENGINES)
+
+
+# How to go from MDL source to `Attribute`, `Component`, `Command`, etc.:
+# - "tree": parse into a `lark.Tree`, which `MdlTreeTransformer` then walks.
+# - "inline": run the callbacks of `MdlTreeTransformer` during the LALR reductions
+# themselves, so no intermediate tree is ever built.
+# - "fast": the hand-written recursive descent parser in `fast_parser.py`.
+Engine: TypeAlias = Literal["tree", "inline", "fast"]
+
+
+# Commands defining a component in full, which must then set its required attributes
+CREATING_COMMANDS = frozenset({"CREATE", "RECREATE", "ADD"})
+
+
+# Process-wide registry of compiled parsers, one per start symbol and engine. See
+# `get_parser`.
+_parsers: dict[tuple[str, Engine], Lark] = {}
+_parsers_lock = Lock()
+
 
 def first_child_is_token(tree: Tree) -> bool:
     """A small self-descriptive helper function."""
@@ -49,34 +112,402 @@ def mark_first_and_last(
             break
 
 
+def engine_options(engine: Engine) -> dict[str, Any]:
+    """The `lark.Lark` options implementing parsing engine `engine`."""
+    if engine == "tree":
+        return {}
+    if engine == "inline":
+        return {"transformer": MdlTreeTransformer(visit_tokens=True)}
+    if engine == "fast":
+        raise ValueError("The 'fast' engine does not use `lark`.")
+    raise ValueError(
+        f"Unknown engine {engine!r}. Options are: 'tree', 'inline', 'fast'."
+    )
+
+
+def compile_parser(start: str, engine: Engine = "tree") -> Lark:
+    """Compile `MDL_GRAMMAR` into a LALR parser for starting symbol `start`."""
+    return Lark(
+        grammar=MDL_GRAMMAR, start=start, parser="lalr", **engine_options(engine)
+    )
+
+
+def deserialize_parser(serialized: bytes) -> Lark:
+    """Load a parser serialized by `build_parser_artifact`, options and all."""
+    return Lark.load(BytesIO(serialized))
+
+
+def build_parser_artifact(path: Path = PARSER_ARTIFACT_PATH) -> None:
+    """Compile a parser for each of `PARSER_ARTIFACT_STARTS` and
+    `PARSER_ARTIFACT_ENGINES`, and serialize them all to `path`, keyed by
+    `PARSER_ARTIFACT_KEY`.
+    """
+    serialized = {}
+    for start in PARSER_ARTIFACT_STARTS:
+        for engine in PARSER_ARTIFACT_ENGINES:
+            buffer_ = BytesIO()
+            compile_parser(start, engine).save(buffer_)
+            serialized[(start, engine)] = buffer_.getvalue()
+    dump_artifact(path, PARSER_ARTIFACT_KEY, serialized)
+
+
+def load_parser_artifact(
+    path: Path = PARSER_ARTIFACT_PATH,
+) -> dict[tuple[str, Engine], bytes]:
+    """Read the parsers serialized to `path` by `build_parser_artifact`, by
+    starting symbol and engine. Nothing is returned if the artifact is missing or
+    stale.
+    """
+    return load_artifact(path, PARSER_ARTIFACT_KEY) or {}
+
+
+# Deserializing a parser is much cheaper than compiling it, but still not free, so
+# it is deferred to the first use of each starting symbol. See `get_parser`.
+_serialized_parsers = load_parser_artifact()
+
+
+def get_parser(start: str, engine: Engine = "tree") -> Lark:
+    """Fetch the LALR parser for starting symbol `start`. Compiling `MDL_GRAMMAR`
+    is by far the most expensive bit of parsing, hence parsers are built lazily,
+    on first use, and reused thereafter by every thread in the process. Parsers
+    are deserialized from the artifact shipped with the package whenever it is
+    up to date, and compiled otherwise.
+    """
+    key = (start, engine)
+    parser = _parsers.get(key)
+    if parser is None:
+        with _parsers_lock:
+            # Some other thread might have built it while we waited for the lock
+            parser = _parsers.get(key)
+            if parser is None:
+                serialized = _serialized_parsers.get(key)
+                parser = (
+                    compile_parser(start, engine)
+                    if serialized is None
+                    else deserialize_parser(serialized)
+                )
+                _parsers[key] = parser
+    return parser
+
+
+def clear_parsers() -> None:
+    """Empty the registry behind `get_parser`, so that the next parse of each
+    starting symbol builds its parser from scratch.
+    """
+    with _parsers_lock:
+        _parsers.clear()
+
+
+# Characters relevant to finding where an MDL command ends. See `split_commands`
+COMMAND_DELIMITER_PATTERN = re.compile(r"[;(){']")
+NON_WHITESPACE_PATTERN = re.compile(r"\S")
+# The header of an MDL command, i.e. all of it but its body. Possessive quantifiers
+# mimic how `lark` tokenizes greedily, without backtracking. As in the grammar,
+# `DROP` and `RENAME` take no logical operator nor body, and only `RENAME` takes
+# (and requires) `TO`. See `LazyCommand`
+COMMAND_HEADER_PATTERN = re.compile(
+    r"\s*(?P<command>CREATE|RECREATE|ALTER|(?P<bodiless>DROP|(?P<rename>RENAME)))\s*"
+    r"(?P<component_type_name>[A-Z][a-z]++)\s*"
+    r"(?(bodiless)|(?:(?P<logical_operator>IF EXISTS|IF NOT EXISTS)\s*)?)"
+    r"(?P<component_name>[a-z0-9_\.]++)"
+    r"(?(rename)\s*TO\s*(?P<to_component_name>[a-z0-9_\.]++))"
+    r"(?(bodiless)\s*;?\s*\Z)"
+)
+
+
+def split_commands(
+    source: str | TextIO, chunk_size: int = 1 << 16
+) -> Generator[str, None, None]:
+    """Split `source`, which holds any number of MDL commands one after another,
+    into the source of each single command. `source` can be a string or a text
+    stream, the latter read `chunk_size` characters at a time, so that memory is
+    bounded by the largest command rather than by the size of `source`.
+
+    Commands end at a semicolon or at the parenthesis closing their body, outside
+    of strings and XML values. Commands without a body, i.e. `DROP` and `RENAME`,
+    must end with a semicolon if more commands follow them.
+    """
+    chunks = (
+        iter([source])
+        if isinstance(source, str)
+        else iter(lambda: source.read(chunk_size), "")
+    )
+    # The parts of the current command in the chunks before the current one. They
+    # are joined once the command ends, rather than appended to a buffer chunk by
+    # chunk, which would copy a command spanning many chunks over and over again
+    pending: list[str] = []
+    # Parenthesis nesting depth
+    depth = 0
+    # The character closing the string or XML value we are in, if any
+    closer: str | None = None
+    # Whether the body of the current command has been closed
+    closed = False
+    for chunk in chunks:
+        # Where the current command starts in `chunk`
+        start = 0
+        # Where to resume scanning `chunk` from
+        position = 0
+        while True:
+            if closer is not None:
+                end = chunk.find(closer, position)
+                if end == -1:
+                    break
+                closer = None
+                position = end + 1
+            elif closed:
+                # Anything but an optional semicolon belongs to the next command
+                match_ = NON_WHITESPACE_PATTERN.search(chunk, position)
+                if match_ is None:
+                    break
+                end = match_.end() if match_.group() == ";" else match_.start()
+                yield "".join([*pending, chunk[start:end]])
+                pending = []
+                start, position, closed = end, end, False
+            else:
+                match_ = COMMAND_DELIMITER_PATTERN.search(chunk, position)
+                if match_ is None:
+                    break
+                position = match_.end()
+                match match_.group():
+                    case "'":
+                        closer = "'"
+                    case "{":
+                        closer = "}"
+                    case "(":
+                        depth += 1
+                    case ")":
+                        depth -= 1
+                        closed = depth == 0
+                    case ";" if depth == 0:
+                        yield "".join([*pending, chunk[start:position]])
+                        pending = []
+                        start = position
+        # Whatever is left of `chunk` has been scanned, wait for the next one
+        pending.append(chunk[start:])
+    rest = "".join(pending)
+    if rest.strip():
+        yield rest
+
+
 @overload
-def parse_and_transform(start: Literal["attribute"], source: str) -> "Attribute": ...
+def parse_and_transform(
+    start: Literal["attribute"], source: str, engine: Engine = "tree"
+) -> "Attribute": ...
 
 
 @overload
-def parse_and_transform(start: Literal["component"], source: str) -> "Component": ...
+def parse_and_transform(
+    start: Literal["component"], source: str, engine: Engine = "tree"
+) -> "Component": ...
 
 
 @overload
-def parse_and_transform(start: Literal["mdl_command"], source: str) -> "Command": ...
+def parse_and_transform(
+    start: Literal["mdl_command"], source: str, engine: Engine = "tree"
+) -> "Command": ...
 
 
-def parse_and_transform(start: str, source: str):
+def parse_and_transform(start: str, source: str, engine: Engine = "tree"):
     """Parse `source` using `lark.Lark` from starting symbol `start`, and
     transformed the result tree with `MdlTreeTransformer`. Just a convenience
-    function.
+    function. See `Engine` for the available values of `engine`.
     """
-    parser = Lark(grammar=MDL_GRAMMAR, start=start, parser="lalr")
+    current = profiling.active
+    if current is not None:
+        return profiled_parse_and_transform(current, start, source, engine)
+    if engine == "fast":
+        # Imported here since `fast_parser` itself imports from this module
+        from meddle.fast_parser import parse
+
+        return parse(start, source)
+    parser = get_parser(start, engine)
+    if engine == "inline":
+        return parser.parse(source)
     parsed = parser.parse(source)
     transformer = MdlTreeTransformer(visit_tokens=True)
     transformed = transformer.transform(parsed)
     return transformed
 
 
+def profiled_parse_and_transform(
+    profile: Profile, start: str, source: str, engine: Engine = "tree"
+):
+    """`parse_and_transform`, recording into `profile` the time spent in each of
+    lexing, parsing and transforming. Tokens are fed to the parser one at a time,
+    as `lark` itself does, to time the lexer and the parser separately.
+    """
+    size = encoded_size(source)
+    if engine == "fast":
+        from meddle.fast_parser import parse
+
+        clock = perf_counter()
+        result = parse(start, source)
+        profile.record(
+            "parse", component_type_name_of(result), perf_counter() - clock, size
+        )
+        return result
+    interactive = get_parser(start, engine).parse_interactive(source)
+    tokens = interactive.lexer_thread.lex(interactive.parser_state)
+    lex_time = parse_time = 0.0
+    clock = perf_counter()
+    for token in tokens:
+        fed = perf_counter()
+        lex_time += fed - clock
+        interactive.feed_token(token)
+        clock = perf_counter()
+        parse_time += clock - fed
+    lexed = perf_counter()
+    lex_time += lexed - clock
+    result = interactive.feed_eof()
+    clock = perf_counter()
+    parse_time += clock - lexed
+    if engine == "tree":
+        tree = result
+        result = MdlTreeTransformer(visit_tokens=True).transform(tree)
+        transform_time = perf_counter() - clock
+    component_type_name = component_type_name_of(result)
+    profile.record("lex", component_type_name, lex_time, size)
+    profile.record("parse", component_type_name, parse_time, size)
+    if engine == "tree":
+        profile.record("transform", component_type_name, transform_time, size)
+    return result
+
+
+def component_type_name_of(parsed: Any) -> str | None:
+    """The component type of what `parse_and_transform` returned, if any."""
+    return getattr(parsed, "component_type_name", None)
+
+
 AttributeValue: TypeAlias = bool | int | float | str
 
 
-@dataclass
+def value_key(
+    value: AttributeValue | list[AttributeValue] | tuple[AttributeValue, ...] | None,
+) -> tuple:
+    """A hashable stand-in for attribute value `value`, which tells apart values of
+    different types, as opposed to `True == 1 == 1.0`. Multiple values may be in a
+    list or, once frozen, in a tuple.
+    """
+    if isinstance(value, list | tuple):
+        return tuple((type(v), v) for v in value)
+    return (type(value), value)
+
+
+# What `Attribute`s, `Component`s and (sub)`Command`s are indexed by. See
+# `index_nodes`
+ATTRIBUTE_KEY = attrgetter("name")
+COMPONENT_KEY = attrgetter("component_type_name", "component_name")
+COMPONENT_TYPE_KEY = attrgetter("component_type_name")
+# The methods of `list` which mutate it in place
+MUTATING_LIST_METHODS = (
+    "append",
+    "extend",
+    "insert",
+    "remove",
+    "pop",
+    "clear",
+    "sort",
+    "reverse",
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+)
+
+
+class NodeList(list):
+    """The list of `Attribute`s, `Component`s or `Command`s of a node, as built by
+    the parsers, which holds on to the indexes `index_nodes` builds of it, until
+    it is mutated.
+    """
+
+    __slots__ = ("indexes",)
+
+    def __init__(self, iterable: Iterable = ()):
+        super().__init__(iterable)
+        self.indexes: dict[Callable, dict[Hashable, list]] | None = None
+
+    def __reduce__(self):
+        # Indexes are cheaper to rebuild than to copy or pickle
+        return (NodeList, (list(self),))
+
+
+def invalidating(name: str) -> Callable:
+    """`list` method `name`, dropping the indexes of the `NodeList` it is called
+    on beforehand.
+    """
+    method = getattr(list, name)
+
+    def inner(self: NodeList, *args):
+        self.indexes = None
+        return method(self, *args)
+
+    inner.__name__ = name
+    return inner
+
+
+for method_name in MUTATING_LIST_METHODS:
+    setattr(NodeList, method_name, invalidating(method_name))
+
+
+def index_nodes(
+    nodes: list | None, key: Callable[[Any], Hashable]
+) -> dict[Hashable, list]:
+    """`nodes` grouped by `key`, keeping their order. The index of a `NodeList` is
+    built on first use and reused until the list is mutated. Any other list, e.g.
+    one assigned by hand, is indexed anew every time. Renaming a node in place,
+    rather than replacing it, is not picked up either.
+    """
+    if not nodes:
+        return {}
+    if isinstance(nodes, NodeList):
+        if nodes.indexes is None:
+            nodes.indexes = {}
+        index = nodes.indexes.get(key)
+        if index is not None:
+            return index
+    index = {}
+    for node in nodes:
+        index.setdefault(key(node), []).append(node)
+    if isinstance(nodes, NodeList):
+        nodes.indexes[key] = index  # type: ignore[index]
+    return index
+
+
+def contains_node(nodes: list | None, key: Callable[[Any], Hashable], node) -> bool:
+    """Whether `node` is in `nodes`, looked up through the index `index_nodes`
+    builds by `key`. Misses fall back to a scan, as nodes renamed in place are
+    filed under their former key.
+    """
+    return node in index_nodes(nodes, key).get(key(node), ()) or node in (nodes or ())
+
+
+def first_node(nodes: list | None) -> Any:
+    """The first of `nodes`, if any."""
+    return nodes[0] if nodes else None
+
+
+def missing_attribute_violations(
+    schema: ComponentSchema,
+    component_type_name: str,
+    attributes: list[Attribute] | None,
+    path: tuple[str, ...],
+) -> Generator[Violation, None, None]:
+    """A violation for each attribute required by `schema` which is not among
+    `attributes`, those of the component (of type `component_type_name`) at `path`.
+    """
+    for name in schema.missing({a.name for a in attributes or []}):
+        yield Violation(
+            path,
+            name,
+            "required",
+            None,
+            f"Attribute {name!r} is required under component type "
+            f"{component_type_name!r}.",
+        )
+
+
+@dataclass(slots=True)
 class Attribute:
     """A data struct representing an attribute of a Veeva Vault component."""
 
@@ -85,9 +516,9 @@ class Attribute:
     command: str | None = None
 
     @classmethod
-    def loads(cls, source: str) -> Attribute:
+    def loads(cls, source: str, engine: Engine = "tree") -> Attribute:
         """Deserialize `source` into an `Attribute`."""
-        return parse_and_transform("attribute", source)
+        return parse_and_transform("attribute", source, engine)
 
     def __contains__(self, other) -> bool:
         return isinstance(other, AttributeValue | list | None) and (
@@ -123,7 +554,8 @@ class Attribute:
             yield repr(self.value)
         else:
             string_lines = self.value.splitlines()
-            if len(string_lines) == 1:
+            # Empty strings have no lines at all
+            if len(string_lines) <= 1:
                 yield repr(self.value)
             else:
                 for first, last, line in mark_first_and_last(string_lines):
@@ -134,27 +566,52 @@ class Attribute:
         """Serialize an `Attribute`."""
         return "".join(self.__parts__())
 
+    def structural_key(self) -> tuple:
+        """A hashable stand-in for `self`, equal for equal attributes."""
+        return (self.name, value_key(self.value), self.command)
+
     def validate(
         self,
-        metadata: dict,
+        metadata: dict | ComponentSchema,
         parent_component_type_name: str,
-    ) -> bool:
+        collect: bool = False,
+    ) -> bool | ValidationReport:
         """Validate the attribute represented by `self`, according to
         https://developer.veevavault.com/mdl/components/
+
+        Raises on the first violation found, unless `collect`, in which case a
+        report of every violation is returned instead.
         """
-        attribute_metadata = metadata["attributes"].get(self.name)
-        if attribute_metadata is None:
-            options = ", ".join(repr(n) for n in metadata["attributes"].keys())
-            raise ValidationError(
+        return validation_outcome(
+            self.violations(metadata, parent_component_type_name), collect
+        )
+
+    def violations(
+        self,
+        metadata: dict | ComponentSchema,
+        parent_component_type_name: str,
+        path: tuple[str, ...] = (),
+    ) -> Generator[Violation, None, None]:
+        """The violations `validate` reports, found lazily. `path` is that of the
+        (sub)component `self` belongs to.
+        """
+        schema = as_component_schema(metadata)
+        attribute_type = schema.attributes.get(self.name)
+        if attribute_type is None:
+            options = ", ".join(repr(n) for n in schema.attributes.keys())
+            yield Violation(
+                path,
+                self.name,
+                "attribute name",
+                self.value,
                 f"Attribute name {repr(self.name)} is not allowed under component type "
-                f"{repr(parent_component_type_name)}. Options are: {options}."
+                f"{repr(parent_component_type_name)}. Options are: {options}.",
             )
-        return type_check_attribute(
-            self.name, self.value, attribute_metadata["type_data"]
-        )
+            return
+        yield from attribute_type.violations(self.name, self.value, path)
 
 
-@dataclass
+@dataclass(slots=True)
 class Component:
     """A data struct representing a Veeva Vault."""
 
@@ -163,42 +620,117 @@ class Component:
     attributes: list[Attribute] | None = None
 
     @classmethod
-    def loads(cls, source: str) -> Component:
+    def loads(cls, source: str, engine: Engine = "tree") -> Component:
         """Deserialize `source` into a `Component`."""
-        return parse_and_transform("component", source)
+        return parse_and_transform("component", source, engine)
 
     def __contains__(self, other) -> bool:
-        return isinstance(other, Attribute) and (
-            (self.attributes is not None) and (other in self.attributes)
+        return isinstance(other, Attribute) and contains_node(
+            self.attributes, ATTRIBUTE_KEY, other
         )
 
+    def attribute(self, name: str) -> Attribute | None:
+        """The (first) attribute named `name`, if any."""
+        return first_node(index_nodes(self.attributes, ATTRIBUTE_KEY).get(name))
+
     def __parts__(self, indent_level: int = 0) -> Generator[str]:
         """A private method containing the bulk of the serialization logic."""
-        yield f"{INDENT*indent_level}{self.component_type_name} {self.component_name} ("
+        yield f"{INDENT * indent_level}{self.component_type_name} {self.component_name} ("
         for a in self.attributes or []:
-            yield "".join(a.__parts__(indent_level + 1))
-        yield f"{INDENT*indent_level});"
+            yield "".join(a.__parts__(indent_level + 1)) + ","
+        yield f"{INDENT * indent_level})"
 
+    @profiled("dump", encoded_size)
     def dumps(self):
         """Serialize a `Component`."""
         return "\n".join(self.__parts__())
 
-    def validate(self, metadata: dict, parent_component_type_name: str) -> bool:
+    def structural_key(self) -> tuple:
+        """A hashable stand-in for `self`, equal for equal components."""
+        return (
+            self.component_type_name,
+            self.component_name,
+            None
+            if self.attributes is None
+            else tuple(a.structural_key() for a in self.attributes),
+        )
+
+    @profiled("validate")
+    def validate(
+        self,
+        metadata: dict | ComponentSchema,
+        parent_component_type_name: str,
+        collect: bool = False,
+        cache: ValidationCache | None = None,
+    ) -> bool | ValidationReport:
         """Validate the component represented by `self`, according to
         https://developer.veevavault.com/mdl/components/
+
+        Raises on the first violation found, unless `collect`, in which case a
+        report of every violation is returned instead. See `ValidationCache` for
+        `cache`.
+        """
+        return validation_outcome(
+            self.violations(metadata, parent_component_type_name, cache=cache),
+            collect,
+        )
+
+    def violations(
+        self,
+        metadata: dict | ComponentSchema,
+        parent_component_type_name: str,
+        path: tuple[str, ...] = (),
+        cache: ValidationCache | None = None,
+        structural_key: tuple | None = None,
+    ) -> Iterator[Violation]:
+        """The violations `validate` reports, found lazily. `path` is that of the
+        (sub)component `self` belongs to. `structural_key` saves computing that of
+        `self` again, when looking it up in `cache`, if already known.
         """
+        schema = as_component_schema(metadata)
+        if cache is None:
+            return self.find_violations(schema, parent_component_type_name, path)
+        if structural_key is None:
+            structural_key = self.structural_key()
+        return cache.violations(
+            (schema, parent_component_type_name, structural_key),
+            path,
+            lambda: self.find_violations(schema, parent_component_type_name),
+        )
+
+    def find_violations(
+        self,
+        schema: ComponentSchema,
+        parent_component_type_name: str,
+        path: tuple[str, ...] = (),
+    ) -> Generator[Violation, None, None]:
+        """The violations of `self`, found without going through any cache."""
         ctn = self.component_type_name
-        component_metadata = metadata["subcomponents"].get(ctn)
-        if component_metadata is None:
-            options = ", ".join(repr(k) for k in metadata["subcomponents"].keys())
-            raise ValidationError(
+        component_schema = schema.subcomponent(ctn)
+        path = (*path, f"{ctn}.{self.component_name}")
+        if component_schema is None:
+            options = ", ".join(
+                repr(k) for k in schema.metadata["subcomponents"].keys()
+            )
+            yield Violation(
+                path,
+                None,
+                "component type",
+                ctn,
                 f"Component type {repr(ctn)} is not allowed under component type "
-                f"{repr(parent_component_type_name)}. Options are: {options}."
+                f"{repr(parent_component_type_name)}. Options are: {options}.",
             )
-        return all(a.validate(component_metadata, ctn) for a in self.attributes or [])
+            return
+        for a in self.attributes or []:
+            yield from a.violations(component_schema, ctn, path)
+        # Components always define subcomponents in full. Existing ones are changed
+        # through "MODIFY" subcommands instead
+        yield from missing_attribute_violations(
+            component_schema, ctn, self.attributes, path
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class Command:
     """A data struct representing a Veeva Vault MDL command"""
 
@@ -212,24 +744,53 @@ class Command:
     logical_operator: str | None = None
 
     @classmethod
-    def loads(cls, source: str) -> Command:
-        """Deserialize `source` into a `Component`."""
-        return parse_and_transform("mdl_command", source)
+    def loads(
+        cls, source: str, engine: Engine = "tree", cache: ParseCache | None = None
+    ) -> Command:
+        """Deserialize `source` into a `Command`, going through `cache` if given."""
+        if cache is not None:
+            return cache.load(source, engine)
+        return parse_and_transform("mdl_command", source, engine)
+
+    @classmethod
+    def load_many(
+        cls,
+        source: str | TextIO,
+        engine: Engine = "tree",
+        cache: ParseCache | None = None,
+    ) -> Generator[Command, None, None]:
+        """Lazily deserialize the many MDL commands in `source`, one at a time. See
+        `split_commands`.
+        """
+        for command_source in split_commands(source):
+            yield cls.loads(command_source, engine, cache)
 
     def __contains__(self, other) -> bool:
-        return (
-            (
-                isinstance(other, Attribute)
-                and ((self.attributes is not None) and (other in self.attributes))
-            )
-            or (
-                isinstance(other, Component)
-                and ((self.components is not None) and (other in self.components))
-            )
-            or (
-                isinstance(other, Command)
-                and ((self.commands is not None) and (other in self.commands))
-            )
+        if isinstance(other, Attribute):
+            return contains_node(self.attributes, ATTRIBUTE_KEY, other)
+        if isinstance(other, Component):
+            return contains_node(self.components, COMPONENT_KEY, other)
+        if isinstance(other, Command):
+            return contains_node(self.commands, COMPONENT_TYPE_KEY, other)
+        return False
+
+    def attribute(self, name: str) -> Attribute | None:
+        """The (first) attribute named `name`, if any."""
+        return first_node(index_nodes(self.attributes, ATTRIBUTE_KEY).get(name))
+
+    def component(
+        self, component_type_name: str, component_name: str
+    ) -> Component | None:
+        """The (first) component of type `component_type_name` named
+        `component_name`, if any.
+        """
+        index = index_nodes(self.components, COMPONENT_KEY)
+        return first_node(index.get((component_type_name, component_name)))
+
+    def subcommands_by_type(self, component_type_name: str) -> list[Command]:
+        """The subcommands on components of type `component_type_name`, in order."""
+        return list(
+            index_nodes(self.commands, COMPONENT_TYPE_KEY).get(component_type_name, ())
         )
 
     def __parts__(self, indent_level: int = 0) -> Generator[str]:
@@ -249,7 +810,7 @@ class Command:
             for a in self.attributes or []:
                 yield "".join(a.__parts__(indent_level + 1)) + ","
             for comp in self.components or []:
-                yield "\n".join(comp.__parts__(indent_level + 1))
+                yield "\n".join(comp.__parts__(indent_level + 1)) + ","
             for com in self.commands or []:
                 yield (
                     f"{INDENT * indent_level}"
@@ -257,41 +818,292 @@ class Command:
                 )
             yield f"{INDENT * indent_level});"
 
+    @profiled("dump", encoded_size)
     def dumps(self):
         """Serialize a `Command`."""
         return "\n".join(self.__parts__())
 
+    def structural_key(self) -> tuple:
+        """A hashable stand-in for `self`, equal for equal commands."""
+        return (
+            self.command,
+            self.component_type_name,
+            self.component_name,
+            None
+            if self.attributes is None
+            else tuple(a.structural_key() for a in self.attributes),
+            None
+            if self.components is None
+            else tuple(c.structural_key() for c in self.components),
+            None
+            if self.commands is None
+            else tuple(c.structural_key() for c in self.commands),
+            self.to_component_name,
+            self.logical_operator,
+        )
+
+    @profiled("validate")
     def validate(
         self,
-        metadata: dict | None = None,
+        metadata: dict | Schema | ComponentSchema | None = None,
         parent_component_type_name: str | None = None,
-    ) -> bool:
+        collect: bool = False,
+        cache: ValidationCache | None = None,
+        schema: str | None = None,
+    ) -> bool | ValidationReport:
         """Validate the MDL command represented by `self` according to
         https://developer.veevavault.com/mdl/components/
+
+        `metadata` defaults to the (compiled) schema of `validation.json`, or that
+        of Vault version `schema` if given (see `meddle.validation.load_schema`).
+        Top-level commands take the metadata of every component type, and
+        subcommands that of the component type of their parent command.
+
+        Raises on the first violation found, unless `collect`, in which case the
+        whole command is gone through and a report of every violation is returned
+        instead. Identical commands, components and subcommands are validated only
+        once if given a `cache` (see `ValidationCache`).
         """
-        ctn = self.component_type_name
-        metadata_: dict = component_type_metadata if metadata is None else metadata
+        if schema is not None:
+            if metadata is not None:
+                raise ValueError("Pass either `metadata` or `schema`, not both.")
+            metadata = load_schema(schema)
+        return validation_outcome(
+            self.violations(metadata, parent_component_type_name, cache=cache),
+            collect,
+        )
+
+    def violations(
+        self,
+        metadata: dict | Schema | ComponentSchema | None = None,
+        parent_component_type_name: str | None = None,
+        path: tuple[str, ...] = (),
+        cache: ValidationCache | None = None,
+        structural_key: tuple | None = None,
+    ) -> Iterator[Violation]:
+        """The violations `validate` reports, found lazily. `path` is that of the
+        parent command, if any. `structural_key` saves computing that of `self`
+        again, when looking it up in `cache`, if already known.
+        """
+        schema: Schema | ComponentSchema
         # Top-level command
         if parent_component_type_name is None:
-            ctm = metadata_.get(ctn)
+            schema = default_schema() if metadata is None else metadata
+            assert not isinstance(schema, ComponentSchema)
+            schema = as_schema(schema)
+        # We are below another command
+        else:
+            assert metadata is not None and not isinstance(metadata, Schema)
+            schema = as_component_schema(metadata)
+        if cache is None:
+            return self.find_violations(schema, parent_component_type_name, path)
+        key = self.structural_key() if structural_key is None else structural_key
+        return cache.violations(
+            (schema, parent_component_type_name, key),
+            path,
+            lambda: self.find_violations(
+                schema, parent_component_type_name, (), cache, key
+            ),
+        )
+
+    def find_violations(
+        self,
+        schema: Schema | ComponentSchema,
+        parent_component_type_name: str | None,
+        path: tuple[str, ...] = (),
+        cache: ValidationCache | None = None,
+        structural_key: tuple | None = None,
+    ) -> Generator[Violation, None, None]:
+        """The violations of `self`, found without looking `self` up in `cache`,
+        which is only passed on to its components and subcommands, along with
+        their structural keys if that of `self` is given.
+        """
+        ctn = self.component_type_name
+        path = (*path, f"{ctn}.{self.component_name}")
+        ctm: ComponentSchema | None
+        # Top-level command
+        if isinstance(schema, Schema):
+            ctm = schema.component(ctn)
             if ctm is None:
-                raise ValidationError(f"Component type {repr(ctm)} does not exist.")
+                yield Violation(
+                    path,
+                    None,
+                    "component type",
+                    ctn,
+                    f"Component type {repr(ctn)} does not exist.",
+                )
+                return
         # We are below another command
         else:
-            ctm = metadata_["subcomponents"].get(ctn)
+            ctm = schema.subcomponent(ctn)
             if ctm is None:
-                options = ", ".join(repr(k) for k in metadata_["subcomponents"].keys())
-                raise ValidationError(
+                options = ", ".join(
+                    repr(k) for k in schema.metadata["subcomponents"].keys()
+                )
+                yield Violation(
+                    path,
+                    None,
+                    "component type",
+                    ctn,
                     f"Component type {repr(ctn)} is not allowed under component type "
-                    f"{repr(parent_component_type_name)}. Options are: {options}."
+                    f"{repr(parent_component_type_name)}. Options are: {options}.",
+                )
+                return
+        for a in self.attributes or []:
+            yield from a.violations(ctm, ctn, path)
+        if self.command.upper() in CREATING_COMMANDS:
+            yield from missing_attribute_violations(ctm, ctn, self.attributes, path)
+        children = [*(self.components or []), *(self.commands or [])]
+        # See `structural_key` for where those of components and subcommands are
+        keys = (
+            [None] * len(children)
+            if structural_key is None
+            else [*(structural_key[4] or ()), *(structural_key[5] or ())]
+        )
+        current = profiling.active
+        for e, key in zip(children, keys):
+            violations = e.violations(ctm, ctn, path, cache, key)
+            if current is not None:
+                # Already part of the time validating `self`, see `Profile.record`
+                violations = current.timed(
+                    "validate", e.component_type_name, violations, nested=True
                 )
+            yield from violations
+
+
+# The fields of a `LazyCommand` parsed upfront
+LAZY_COMMAND_HEADER = (
+    "command",
+    "component_type_name",
+    "component_name",
+    "to_component_name",
+    "logical_operator",
+)
+
+
+class LazyBodyField:
+    """Stand-in for a field of the body of a `LazyCommand` until it is first
+    accessed, at which point the whole body is parsed and stored in the instance.
+    Being a non-data descriptor, the stored value shadows it from then on, so
+    later accesses cost the same as those of a plain `Command`. So does a value
+    assigned to the field, which parsing the body later on leaves alone.
+    """
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: LazyCommand | None, owner: type | None = None):
+        if instance is None:
+            return self
+        instance.load_body()
+        return instance.__dict__[self.name]
+
+
+class LazyCommand(Command):
+    """A `Command` of which only the header, i.e. `command`, `component_type_name`,
+    `component_name`, `to_component_name` and `logical_operator`, is parsed upfront.
+    Its `source` is kept around, and fully parsed the first time any of
+    `attributes`, `components` or `commands` is accessed. Hence syntax errors in
+    the body are only raised then.
+    """
+
+    attributes = LazyBodyField()
+    components = LazyBodyField()
+    commands = LazyBodyField()
+
+    def __init__(
+        self,
+        source: str,
+        command: str,
+        component_type_name: str,
+        component_name: str,
+        to_component_name: str | None = None,
+        logical_operator: str | None = None,
+        engine: Engine = "tree",
+        cache: ParseCache | None = None,
+    ):
+        self.source: str | None = source
+        self.engine = engine
+        self.cache = cache
+        self.command = command
+        self.component_type_name = component_type_name
+        self.component_name = component_name
+        self.to_component_name = to_component_name
+        self.logical_operator = logical_operator
+
+    @classmethod
+    def loads(
+        cls, source: str, engine: Engine = "tree", cache: ParseCache | None = None
+    ) -> Command:
+        """Deserialize the header of `source` into a `LazyCommand`, which parses
+        the rest of `source` with `engine` (going through `cache` if given) when
+        needed. Should the header not be valid, `source` is parsed right away into
+        a `Command`, so that the appropriate error is raised.
+        """
+        match_ = COMMAND_HEADER_PATTERN.match(source)
+        if match_ is None:
+            return Command.loads(source, engine, cache)
+        return cls(
+            source,
+            **{n: match_.group(n) for n in LAZY_COMMAND_HEADER},
+            engine=engine,
+            cache=cache,
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the body of the command has been parsed already."""
+        return self.source is None
+
+    def load_body(self) -> None:
+        """Parse the body of the command, if not done already."""
+        if self.source is None:
+            return
+        parsed = Command.loads(self.source, self.engine, self.cache)
+        # Fields assigned before the body is parsed are kept
+        for name in ("attributes", "components", "commands"):
+            self.__dict__.setdefault(name, getattr(parsed, name))
+        self.source = None
+
+    def __getstate__(self) -> tuple[dict, dict]:
+        # The `__getstate__` of slotted dataclasses gets every field, which would
+        # parse the body
+        return self.__dict__, {n: getattr(self, n) for n in LAZY_COMMAND_HEADER}
+
+    def __setstate__(self, state: tuple[dict, dict]) -> None:
+        dict_, header = state
+        self.__dict__.update(dict_)
+        for name, value in header.items():
+            setattr(self, name, value)
+
+    def materialize(self) -> Command:
+        """The plain `Command` equivalent to `self`."""
+        return Command(*(getattr(self, f.name) for f in fields(Command)))
+
+    def __eq__(self, other) -> bool:
+        # The `__eq__` generated by `dataclass` only compares instances of the very
+        # same class, and `LazyCommand`s ought to equal their `Command` counterparts
+        if not isinstance(other, Command):
+            return NotImplemented
         return all(
-            e.validate(ctm, ctn)
-            for f in [self.attributes, self.components, self.commands]
-            for e in f or []
+            getattr(self, f.name) == getattr(other, f.name) for f in fields(Command)
         )
 
 
+def load_file(
+    path: str | Path,
+    engine: Engine = "tree",
+    lazy: bool = False,
+    cache: ParseCache | None = None,
+) -> Generator[Command, None, None]:
+    """Lazily deserialize the MDL commands in file `path`, one at a time. See
+    `Command.load_many`. If `lazy`, commands are `LazyCommand`s.
+    """
+    command_class = LazyCommand if lazy else Command
+    with open(path, encoding="utf-8") as f:
+        yield from command_class.load_many(f, engine, cache)
+
+
 def command_node_processor_factory(
     command_name: str,
 ) -> Callable[[MdlTreeTransformer, Any], Command]:
@@ -346,7 +1158,7 @@ def command_node_processor_factory(
         assert isinstance(component_type_name_tree.children[0], Token) and isinstance(
             component_name_tree.children[0], Token
         )
-        component_type_name = component_type_name_tree.children[0].value
+        component_type_name = intern(component_type_name_tree.children[0].value)
         component_name = component_name_tree.children[0].value
         attributes, components, commands = None, None, None
         match rest:
@@ -364,6 +1176,9 @@ def command_node_processor_factory(
                 (components,) = rest
             case [[Command(_), *_]]:
                 (commands,) = rest
+            case [] if command_name == "ALTER":
+                # An `ALTER` changing nothing, e.g. out of `meddle.diff`
+                pass
             case _:
                 raise Unreachable(f"Got {rest} for {repr(command_name)}")
         return Command(
@@ -420,13 +1235,13 @@ class MdlTreeTransformer(Transformer):
         return [c.children[0] for c in children]
 
     def attribute_name(self, children) -> str:
-        return children[0].value
+        return intern(children[0].value)
 
     def attribute(self, children) -> Attribute:
         return Attribute(children[0], children[1])
 
     def attributes(self, children) -> list[Attribute]:
-        return children
+        return NodeList(children)
 
     def alter_attribute(self, children) -> Attribute:
         if len(children) == 2:
@@ -439,22 +1254,22 @@ class MdlTreeTransformer(Transformer):
             )
 
     def alter_attributes(self, children) -> list[Attribute]:
-        return children
+        return NodeList(children)
 
     def logical_operator(self, children):
-        return children[0].data.value.replace("_", " ").upper()
+        return intern(children[0].data.value.replace("_", " ").upper())
 
     def component(self, children) -> Component:
         # TODO: account for no attributes
         component_type_name_tree, component_name_tree, attributes = children
         return Component(
-            component_type_name_tree.children[0].value,
+            intern(component_type_name_tree.children[0].value),
             component_name_tree.children[0].value,
             attributes,
         )
 
     def components(self, children) -> list[Component]:
-        return children
+        return NodeList(children)
 
     create_command = command_node_processor_factory("CREATE")
 
@@ -464,7 +1279,7 @@ class MdlTreeTransformer(Transformer):
         component_type_name_tree, component_name_tree = children
         return Command(
             "DROP",
-            component_type_name_tree.children[0].value,
+            intern(component_type_name_tree.children[0].value),
             component_name_tree.children[0].value,
         )
 
@@ -472,7 +1287,7 @@ class MdlTreeTransformer(Transformer):
         component_type_name_tree, component_name_tree, to_component_name_tree = children
         return Command(
             "RENAME",
-            component_type_name_tree.children[0].value,
+            intern(component_type_name_tree.children[0].value),
             component_name_tree.children[0].value,
             to_component_name=to_component_name_tree.children[0].value,
         )
@@ -484,7 +1299,7 @@ class MdlTreeTransformer(Transformer):
     alter_command = command_node_processor_factory("ALTER")
 
     def alter_subcommands(self, children) -> list[Command]:
-        return children
+        return NodeList(children)
 
     def alter_subcommand(self, children) -> Command:
         return children[0]
@@ -0,0 +1,203 @@
+"""
+Opt-in profiling of where the time goes when loading, validating and dumping MDL,
+broken down by phase and component type:
+- "lex": tokenizing MDL source, i.e. the `lark` lexer.
+- "parse": the LALR parser, which, for the "inline" engine, also builds the
+  `Attribute`s, `Component`s and `Command`s. The "fast" engine lexes and parses in
+  one go, which is all recorded as "parse".
+- "transform": `MdlTreeTransformer`, for the "tree" engine.
+- "validate": `Command.validate` and `Component.validate`, including type checking
+  their attributes. By component type, that of subcomponents and subcommands is
+  recorded under their own type too.
+- "dump": `Command.dumps` and `Component.dumps`.
+
+Nothing is recorded unless within `profile`, and outside of it the only overhead is
+checking whether a profile is active. Worker processes, e.g. those of
+`meddle.load_directory`, record into profiles of their own, which are sent back
+with their results and merged into the active one.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Generator, Iterable, Iterator, TypeVar
+
+
+@dataclass
+class PhaseStats:
+    """Wall time (in seconds) spent in a phase, the number of calls made to it, and
+    the bytes of MDL source it went through (or, for "dump", produced).
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+
+    def __add__(self, other: PhaseStats) -> PhaseStats:
+        return PhaseStats(
+            *(getattr(self, f.name) + getattr(other, f.name) for f in fields(self))
+        )
+
+
+T = TypeVar("T")
+
+
+class Profile:
+    """The `PhaseStats` of each phase, in total and by component type. Shared by
+    every thread recording into the active profile. Worker processes cannot share
+    it, so they record into profiles of their own, which are then `merge`d into it.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, PhaseStats] = {}
+        self.component_types: dict[str, dict[str, PhaseStats]] = {}
+        self.lock = Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Locks cannot be pickled, e.g. to send profiles back from worker processes
+        return {"phases": self.phases, "component_types": self.component_types}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+    def record(
+        self,
+        phase: str,
+        component_type_name: str | None,
+        seconds: float,
+        size: int = 0,
+        nested: bool = False,
+    ) -> None:
+        """Record a call to `phase` for a component of type `component_type_name`,
+        if known, which took `seconds` and went through `size` bytes. If `nested`
+        in another call to `phase`, which the total already accounts for, it is
+        only recorded by component type.
+        """
+        with self.lock:
+            stats = [] if nested else [self.phases.setdefault(phase, PhaseStats())]
+            if component_type_name is not None:
+                by_phase = self.component_types.setdefault(component_type_name, {})
+                stats.append(by_phase.setdefault(phase, PhaseStats()))
+            for s in stats:
+                s.calls += 1
+                s.seconds += seconds
+                s.bytes += size
+
+    def timed(
+        self,
+        phase: str,
+        component_type_name: str | None,
+        iterable: Iterable[T],
+        nested: bool = False,
+    ) -> Generator[T, None, None]:
+        """`iterable`, recording the time spent producing its elements, but not in
+        between them, as a single call to `phase`. See `record`.
+        """
+        seconds = 0.0
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = perf_counter()
+                try:
+                    element = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += perf_counter() - start
+                yield element
+        finally:
+            self.record(phase, component_type_name, seconds, nested=nested)
+
+    def merge(self, other: Profile) -> None:
+        """Add up the stats of `other` into those of `self`."""
+        with self.lock:
+            into_and_from = [
+                (self.phases, other.phases),
+                *(
+                    (self.component_types.setdefault(ctn, {}), by_phase)
+                    for ctn, by_phase in other.component_types.items()
+                ),
+            ]
+            for into, from_ in into_and_from:
+                for phase, stats in from_.items():
+                    into[phase] = into.get(phase, PhaseStats()) + stats
+
+    def as_dict(self) -> dict[str, Any]:
+        """The profile as plain dictionaries, e.g. to feed into metrics, like
+        `{"phases": {"parse": {"calls": 1, "seconds": 0.01, "bytes": 512}, ...},
+        "component_types": {"Picklist": {"parse": {...}, ...}, ...}}`.
+        """
+        with self.lock:
+            return {
+                "phases": {p: asdict(s) for p, s in self.phases.items()},
+                "component_types": {
+                    ctn: {p: asdict(s) for p, s in by_phase.items()}
+                    for ctn, by_phase in self.component_types.items()
+                },
+            }
+
+
+def encoded_size(s: str) -> int:
+    """The size of `s` in bytes, as encoded in MDL files."""
+    return len(s.encode("utf-8"))
+
+
+# The profile being recorded into, if any. See `profile`
+active: Profile | None = None
+
+
+@contextmanager
+def profile(into: Profile | None = None) -> Iterator[Profile]:
+    """Profile every load, validation and dump within the context, process-wide,
+    into a new `Profile` or `into`, to accumulate over several contexts. E.g.
+
+    >>> with profile() as p:
+    ...     Command.loads(source).validate()
+    >>> p.as_dict()["phases"]["validate"]["calls"]
+    1
+    """
+    global active
+    previous = active
+    active = current = Profile() if into is None else into
+    try:
+        yield current
+    finally:
+        active = previous
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def profiled(phase: str, size: Callable[[Any], int] | None = None) -> Callable[[F], F]:
+    """Record calls to the decorated method under `phase`, by the component type
+    of the instance it is called on, if any. `size` gives the bytes processed out
+    of what the method returns.
+    """
+
+    def decorator(method: F) -> F:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            current = active
+            if current is None:
+                return method(self, *args, **kwargs)
+            start = perf_counter()
+            result = None
+            try:
+                result = method(self, *args, **kwargs)
+                return result
+            finally:
+                current.record(
+                    phase,
+                    getattr(self, "component_type_name", None),
+                    perf_counter() - start,
+                    0 if size is None or result is None else size(result),
+                )
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
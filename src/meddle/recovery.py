@@ -0,0 +1,249 @@
+"""
+An error-recovering parse mode, reporting every syntax error in MDL source in a
+single pass rather than stopping at the first one.
+
+Source is split into commands (see `meddle.parser.split_commands`), and each of
+them is parsed with `lark`'s `on_error` hook. On a syntax error, tokens are skipped
+until one fits again, which resynchronizes at the next attribute or component
+boundary. Should a top-level command keyword turn up where it does not belong, e.g.
+due to a missing closing parenthesis, the current command is closed and parsing
+resumes from the keyword.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TextIO
+
+from lark import Lark, Token, Tree
+from lark.exceptions import (
+    UnexpectedCharacters,
+    UnexpectedInput,
+    UnexpectedToken,
+    VisitError,
+)
+from lark.lexer import PatternStr
+
+from meddle.parser import Command, MdlTreeTransformer, get_parser, split_commands
+
+# How `lark` names the end of the input, which depends on where the error is found
+END_TERMINALS = frozenset({"$END", "<END-OF-FILE>"})
+# Keywords which can only start a top-level command
+TOP_LEVEL_KEYWORDS = frozenset({"CREATE", "RECREATE", "ALTER"})
+# Characters to skip to when the lexer finds no token at all
+BOUNDARY_PATTERN = re.compile(r"[,();]")
+# What is skipped on an unexpected token. See `CommandRecovery.skip_word`
+WORD_PATTERN = re.compile(r"[^\s,();']+|\S")
+# Give up closing a command after this many tokens
+MAX_CLOSING_TOKENS = 64
+
+
+@dataclass
+class Diagnostic:
+    """A syntax error at `line` and `column` (both starting at 1) of the source."""
+
+    line: int
+    column: int
+    message: str
+    expected: list[str] = field(default_factory=list)
+
+
+@dataclass
+class RecoveryResult:
+    """The outcome of `parse_with_recovery`: the `commands` which could be built,
+    partially at times, along with every syntax error found.
+    """
+
+    commands: list[Command] = field(default_factory=list)
+    errors: list[Diagnostic] = field(default_factory=list)
+
+
+class Resync(Exception):
+    """Raised from within `on_error` to stop parsing the current command, which
+    was closed into `tree` (if possible), and start over from `position`.
+    """
+
+    def __init__(self, position: int | None, tree: Tree | None):
+        self.position = position
+        self.tree = tree
+
+
+def describe_terminal(parser: Lark, name: str) -> str:
+    """A human-readable description of terminal `name`, e.g. `')'` for `RPAR`."""
+    if name in END_TERMINALS:
+        return "end of command"
+    try:
+        pattern = parser.get_terminal(name).pattern
+    except KeyError:
+        return name
+    if isinstance(pattern, PatternStr):
+        return repr(pattern.value)
+    return f"/{pattern.value}/"
+
+
+def close_command(interactive_parser: Any) -> Tree | None:
+    """Feed `interactive_parser` with closing parentheses and semicolons until the
+    command parses, returning the resulting tree, or `None` if that is not enough.
+    """
+    for _ in range(MAX_CLOSING_TOKENS):
+        accepts = interactive_parser.accepts()
+        if "$END" in accepts:
+            return interactive_parser.feed_eof()
+        for type_, value in [("RPAR", ")"), ("SEMICOLON", ";")]:
+            if type_ in accepts:
+                interactive_parser.feed_token(Token(type_, value))
+                break
+        else:
+            return None
+    return None
+
+
+class CommandRecovery:
+    """Parse the source of a single command, starting at character `offset` of
+    `text`, recording syntax errors rather than raising them.
+    """
+
+    def __init__(self, parser: Lark, text: str, offset: int):
+        self.parser = parser
+        self.text = text
+        self.offset = offset
+        # Absolute positions (within `text`) and messages of the errors found
+        self.errors: list[tuple[int, str, list[str]]] = []
+        # The top of the value stack at the last error. Tokens are being skipped,
+        # rather than new errors found, for as long as it remains the same
+        self.last_top: Any = None
+
+    def record(self, error: UnexpectedInput, position: int, message: str) -> None:
+        value_stack = error.interactive_parser.parser_state.value_stack
+        top = value_stack[-1] if value_stack else None
+        if self.errors and top is self.last_top:
+            return
+        self.last_top = top
+        expected = sorted(
+            describe_terminal(self.parser, t)
+            for t in getattr(error, "expected", None) or getattr(error, "allowed", ())
+        )
+        self.errors.append((self.offset + position, message, expected))
+
+    def skip_word(self, error: UnexpectedToken) -> str:
+        """Move the lexer right past the word the unexpected token starts with, and
+        return that word. Unexpected tokens might span much more than a word, since
+        `lark` falls back to lexing them with every terminal of the grammar, e.g. a
+        stray comma followed by a string content-like stretch of text.
+        """
+        token = error.token
+        assert token.start_pos is not None
+        match_ = WORD_PATTERN.match(self.text, self.offset + token.start_pos)
+        word = "" if match_ is None else match_.group()
+        line_counter = error.interactive_parser.lexer_thread.state.line_ctr
+        line_counter.char_pos = token.start_pos
+        line_counter.line = token.line
+        line_counter.column = token.column
+        line_counter.line_start_pos = token.start_pos - token.column + 1
+        line_counter.feed(word)
+        return word
+
+    def on_error(self, error: UnexpectedInput) -> bool:
+        if isinstance(error, UnexpectedToken):
+            token = error.token
+            if token.type == "$END" or token.start_pos is None:
+                self.record(
+                    error, len(self.text) - self.offset, "Unexpected end of command"
+                )
+                raise Resync(None, close_command(error.interactive_parser))
+            if END_TERMINALS & set(error.expected):
+                # The command is complete, and another one follows it, e.g. due to
+                # a missing closing parenthesis earlier on
+                tree = error.interactive_parser.feed_eof()
+                raise Resync(token.start_pos, tree)
+            word = self.skip_word(error)
+            self.record(error, token.start_pos, f"Unexpected {word!r}")
+            if word in TOP_LEVEL_KEYWORDS:
+                tree = close_command(error.interactive_parser)
+                raise Resync(token.start_pos, tree)
+            return True
+        if isinstance(error, UnexpectedCharacters):
+            position = error.pos_in_stream
+            self.record(error, position, f"Unexpected {error.char!r}")
+            # Skip to the next boundary, rather than one character at a time
+            match_ = BOUNDARY_PATTERN.search(self.text, self.offset + position + 1)
+            end = len(self.text) if match_ is None else match_.start()
+            state = error.interactive_parser.lexer_thread.state
+            state.line_ctr.feed(self.text[self.offset + position : end])
+            return True
+        return False
+
+    def parse(self) -> tuple[Tree | None, int | None]:
+        """The (partial) tree of the command, and where to resume parsing from, if
+        anywhere, relative to `offset`.
+        """
+        try:
+            return self.parser.parse(
+                self.text[self.offset :], on_error=self.on_error
+            ), None
+        except Resync as resync:
+            return resync.tree, resync.position
+        except UnexpectedInput as e:
+            self.record(e, e.pos_in_stream or 0, str(e).splitlines()[0])
+            return None, None
+
+
+def line_and_column(
+    text: str, position: int, line: int, column: int
+) -> tuple[int, int]:
+    """The line and column of `position` in `text`, which starts at `line` and
+    `column`.
+    """
+    newlines = text.count("\n", 0, position)
+    if newlines == 0:
+        return line, column + position
+    return line + newlines, position - text.rindex("\n", 0, position)
+
+
+def parse_with_recovery(source: str | TextIO) -> RecoveryResult:
+    """Parse the MDL commands in `source`, a string or text stream, recovering from
+    syntax errors. Unlike `Command.load_many`, which raises on the first error,
+    this goes through the whole of `source` and reports every error found, along
+    with whichever commands (or parts of them) could be parsed nonetheless.
+    """
+    parser = get_parser("mdl_command")
+    transformer = MdlTreeTransformer(visit_tokens=True)
+    result = RecoveryResult()
+    line, column = 1, 1
+    for text in split_commands(source):
+        offset: int | None = 0
+        while offset is not None and text[offset:].strip():
+            recovery = CommandRecovery(parser, text, offset)
+            tree, resume = recovery.parse()
+            errors = [
+                Diagnostic(
+                    *line_and_column(text, position, line, column), message, expected
+                )
+                for position, message, expected in recovery.errors
+            ]
+            if tree is not None:
+                try:
+                    result.commands.append(transformer.transform(tree))
+                except VisitError as e:
+                    if not errors:
+                        # Syntactically valid yet impossible to build, e.g. empty
+                        # bodies
+                        first = (
+                            offset + len(text[offset:]) - len(text[offset:].lstrip())
+                        )
+                        position = line_and_column(text, first, line, column)
+                        errors.append(
+                            Diagnostic(*position, f"Invalid command: {e.orig_exc}")
+                        )
+            result.errors.extend(errors)
+            offset = None if resume is None else offset + resume
+        line, column = line_and_column(text, len(text), line, column)
+    return result
+
+
+def load_file_with_recovery(path: str | Path) -> RecoveryResult:
+    """`parse_with_recovery` the MDL file in `path`."""
+    with open(path, encoding="utf-8") as f:
+        return parse_with_recovery(f)
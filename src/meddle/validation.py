@@ -2,12 +2,34 @@
 This file uses https://developer.veevavault.com/mdl/components/ to do type,
 constraint, etc. checking on MDL attribute values. The contents of above the link
 are scrapped via `scripts/scrape_components` and saved in `validation.json`.
+
+Since `validation.json` is sizeable, and only needed to validate, it is not read on
+import. See `default_schema`.
 """
 
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from functools import cache, cached_property, lru_cache
 import json
+import pickle
 import re
 from pathlib import Path
-from typing import Any, Callable, Literal, TypeAlias, TypedDict
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Hashable,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    TypeAlias,
+    TypedDict,
+)
+
+from meddle.artifacts import digest, dump_artifact, load_artifact
 
 
 # Type hint for the work-horse of `type_check_attribute`
@@ -52,15 +74,86 @@ class ImpossibleComponent(Exception):
     pass
 
 
-component_type_metadata: dict = json.loads(
-    (Path(__file__).parent / "validation.json").read_text()
-)
+@dataclass
+class Violation:
+    """A single validation error: `value`, of `attribute` (if any) of the
+    (sub)component at `path`, breaks `rule`. `path` is made of the
+    `"<component type>.<component name>"` of every (sub)component from the
+    top-level command down.
+    """
+
+    path: tuple[str, ...]
+    attribute: str | None
+    # E.g. 'enum', 'type', 'maximum length', 'reference' or 'attribute name'
+    rule: str
+    value: Any
+    message: str
+
+    def exception(self) -> ValidationError | ImpossibleComponent:
+        """The exception `validate` raises for this violation, unless collecting."""
+        if self.rule == "impossible":
+            return ImpossibleComponent(self.message)
+        return ValidationError(self.message)
+
+
+@dataclass
+class ValidationReport:
+    """Every `Violation` found by `validate(collect=True)`. Truthy if there are
+    none, same as `validate` returns `True` on success.
+    """
+
+    violations: list[Violation] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.violations
+
+    def __bool__(self) -> bool:
+        return self.valid
+
+    def __len__(self) -> int:
+        return len(self.violations)
+
+    def __iter__(self) -> Iterator[Violation]:
+        return iter(self.violations)
+
+
+here = Path(__file__).parent
+VALIDATION_JSON_PATH = here / "validation.json"
+# The compiled form of `validation.json` shipped with the package, built by
+# `scripts/build_artifacts.py`. See `build_schema_artifact`.
+SCHEMA_ARTIFACT_PATH = here / "validation.pickle"
+# The version of the layout of the classes pickled in the schema artifact, i.e.
+# `ComponentTypeIndex` and what it holds. Bump it whenever they change, so that
+# artifacts pickled beforehand are not loaded
+SCHEMA_ARTIFACT_FORMAT = "1"
+# Other versions of `validation.json`, as emitted by `scripts/scrape_components.py`.
+# See `load_schema`
+SCHEMAS_DIR = here / "schemas"
+# The name of the version of `validation.json` itself
+DEFAULT_SCHEMA_VERSION = "default"
+
+
+@cache
+def load_component_type_metadata() -> dict:
+    """The contents of `validation.json`, read the first time they are needed
+    rather than on import. Validation itself goes through `default_schema`.
+    """
+    return json.loads(VALIDATION_JSON_PATH.read_text())
+
+
+def __getattr__(name: str) -> Any:
+    # `component_type_metadata` used to be a module-level constant
+    if name == "component_type_metadata":
+        return load_component_type_metadata()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Miscellaneous patterns to match attribute value constraints
 TYPE_PATTERN = re.compile(r"Type : (.*)")
 ENUM_PATTERN = re.compile(r"Allowed values : (.*)", flags=re.MULTILINE)
 MULTI_VALUE_PATTERN = re.compile(r"Allows multiple values")
+REQUIRED_PATTERN = re.compile(r"^Required$", flags=re.MULTILINE)
 MAX_LEN_PATTERN = re.compile(r"Maximum length : (.*)")
 MIN_VAL_PATTERN = re.compile(r"Minimum value : (.*)")
 MAX_VAL_PATTERN = re.compile(r"Maximum value : (.*)")
@@ -129,21 +222,16 @@ def is_generic_component_reference(matched_type_name: str | int) -> bool:
     )
 
 
-def is_component_reference(matched_type_name: str | int) -> bool:
+def is_component_reference(
+    matched_type_name: str | int, index: ComponentTypeIndex | None = None
+) -> bool:
     """An attribute value can be a reference to a specific component. This is a
     helper method to check whether the match of `TYPE_PATTERN` is such a reference,
-    and it does so by checking the match is specified as a component in
-    `validation.json`.
+    and it does so by checking the match is specified as a component (or
+    subcomponent) type in `index`, which defaults to that of `validation.json`.
+    See `ComponentTypeIndex`.
     """
-    return (
-        # Is it a component type?
-        (matched_type_name in component_type_metadata.keys())
-        # Is it a subcomponent type?
-        or any(
-            matched_type_name in v["subcomponents"].keys()
-            for v in component_type_metadata.values()
-        )
-    )
+    return matched_type_name in (default_schema().index if index is None else index)
 
 
 def is_enum(s: str | int) -> bool:
@@ -160,28 +248,252 @@ def is_multi_value(s: str | int) -> bool:
     return MULTI_VALUE_PATTERN.search(str(s)) is not None
 
 
-# Ideally we would pass the whole attribute, but type hinting it would cause
-# a circular import
-def type_check_attribute(name: str, value: Any, type_data: str):
-    """Type and constraint check an attribute `value` by fetching that sort of
-    information from `type_data`. `name` is necessary as the attribute value's
-    type and constraints depend on it.
+AttributeKind: TypeAlias = Literal[
+    "enum",
+    "constrained",
+    "plain",
+    "reference",
+    "generic reference",
+    "impossible",
+]
+
+
+@dataclass(frozen=True)
+class AttributeType:
+    """The type and constraints of the values of an attribute, compiled from the
+    `type_data` describing it in `validation.json`. See `compile_attribute_type`.
     """
-    if value is None:
-        # All attribute values seem to be nullable. Find examples under
-        # `tests/mdl_examples/scrapped`.
+
+    # The type as per Veeva documentation, e.g. 'String' or 'Picklist'
+    type_name: str
+    # Which of the cases of `violations` applies
+    kind: AttributeKind
+    python_type: Any
+    multi_value: bool
+    # Whether components of the type the attribute belongs to must set it on creation
+    required: bool
+    allowed_values: frozenset[str]
+    # Name, bound and check function of each constraint
+    constraints: tuple[tuple[str, int, Callable[[Any], bool]], ...]
+    # For references to specific components
+    reference_pattern: re.Pattern | None
+    # The first five elements of the `MatchTuple` the type was compiled from, only
+    # needed to report impossible types
+    flags: tuple[bool, bool, bool, bool, bool]
+
+    def check(self, name: str, value: Any) -> bool:
+        """Type and constraint check attribute `value`, raising on the first
+        violation. `name` is only needed for error messages.
+        """
+        for violation in self.violations(name, value):
+            raise violation.exception()
+        # We gucci if no error was raised
         return True
-    # Fetch type and constraint metadata from `type_data` so we can match on it
+
+    def violations(
+        self, name: str, value: Any, path: tuple[str, ...] = ()
+    ) -> Generator[Violation, None, None]:
+        """The type and constraint violations of attribute `value`, one per faulty
+        element for multi-value attributes. `name` and `path` are only needed to
+        report them.
+        """
+        if value is None:
+            # All attribute values seem to be nullable. Find examples under
+            # `tests/mdl_examples/scrapped`.
+            return
+        match self.kind:
+            # Enum: single and multi-value
+            case "enum":
+                for e in value if isinstance(value, list) else [value]:
+                    if e not in self.allowed_values:
+                        yield Violation(
+                            path,
+                            name,
+                            "enum",
+                            e,
+                            f"Attribute {repr(name)} is {'a multi-value' if self.multi_value else 'an'} enum with allowed values {', '.join(repr(v) for v in self.allowed_values)}. Got {repr(e)}.",
+                        )
+            # Constraints
+            case "constrained":
+                if type(value) is not self.python_type:
+                    # No point in checking constraints against the wrong type
+                    yield Violation(
+                        path,
+                        name,
+                        "type",
+                        value,
+                        f"Attribute {repr(name)} ought to be of type {repr(self.type_name)}. Got {repr(value)} which is of type {repr(type(value))}.",
+                    )
+                    return
+                for k, bound, f in self.constraints:
+                    if not f(value):
+                        yield Violation(
+                            path,
+                            name,
+                            k,
+                            value,
+                            f"Attribute {repr(name)} is constrained to {k} {bound}. Got {repr(value)}.",
+                        )
+            # Generic non-enum: single and multi-value
+            case "plain":
+                for e in value if isinstance(value, list) else [value]:
+                    if type(e) is not self.python_type:
+                        yield Violation(
+                            path,
+                            name,
+                            "type",
+                            e,
+                            f"Attribute {repr(name)} {'is a multi-value and' if self.multi_value else ''} ought to be of type {repr(self.type_name)}. Got {repr(e)} which is of type {repr(type(e))}.",
+                        )
+            # Multi-value reference to other components
+            case "reference" if self.multi_value:
+                assert self.reference_pattern is not None
+                for e in value if isinstance(value, list) else [value]:
+                    if self.reference_pattern.match(e) is None:
+                        yield Violation(
+                            path,
+                            name,
+                            "reference",
+                            e,
+                            f"Attribute {repr(name)} is multi-value and ought to be a reference to component {repr(self.type_name)}. Got {repr(e)}.",
+                        )
+            # Reference to other components
+            case "reference":
+                assert self.reference_pattern is not None
+                if self.reference_pattern.match(value) is None:
+                    yield Violation(
+                        path,
+                        name,
+                        "reference",
+                        value,
+                        f"Attribute {repr(name)} ought to be a reference to component {repr(self.type_name)}. Got {repr(value)}.",
+                    )
+            # A generic reference to other components, i.e. the referenced component
+            # is not explicitly mentioned
+            case "generic reference":
+                # TODO: try to improve error message by pointing to specific component
+                # it should refer to. That info is most often available in the
+                # `Description` field
+                if not GENERIC_REFERENCE_PATTERN.match(value):
+                    yield Violation(
+                        path,
+                        name,
+                        "reference",
+                        value,
+                        f"Attribute {repr(name)} ought to be a reference to a component (`ComponentReference` of `SubcomponentReference`). Got {repr(value)}.",
+                    )
+            case _:
+                yield Violation(
+                    path,
+                    name,
+                    "impossible",
+                    value,
+                    f"{repr(self.flags)}. Attribute name: {repr(name)}. Attribute value: {repr(value)}.",
+                )
+
+
+class ValidationCache:
+    """An opt-in cache of the violations of commands, components and subcommands,
+    so that identical ones, e.g. subcomponents copied between packages, are only
+    validated once. Entries are keyed by the schema validated against, which stands
+    for both the version of the schema and the parent component type, the name of
+    the latter, and the `structural_key` of what is validated. At most `max_size`
+    entries are kept, evicting the least recently used ones first.
+    """
+
+    def __init__(self, max_size: int = 1 << 16):
+        self.max_size = max_size
+        # Violations are stored with paths relative to the parent of the subtree
+        self.entries: OrderedDict[Hashable, tuple[Violation, ...]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def violations(
+        self,
+        key: Hashable,
+        path: tuple[str, ...],
+        find: Callable[[], Iterable[Violation]],
+    ) -> Generator[Violation, None, None]:
+        """The violations cached under `key`, prefixed with `path`, finding them
+        with `find` (relative to the parent of the subtree) on misses.
+        """
+        found = self.entries.get(key)
+        if found is None:
+            self.misses += 1
+            found = self.entries[key] = tuple(find())
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        for violation in found:
+            yield (
+                replace(violation, path=(*path, *violation.path)) if path else violation
+            )
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def validation_outcome(
+    violations: Iterable[Violation], collect: bool
+) -> bool | ValidationReport:
+    """What `validate` returns: a report of every violation in `violations` if
+    `collect`, and `True` otherwise, raising on the first violation instead (if
+    any). Since `violations` is consumed lazily, nothing past the first one is
+    looked for in the latter case.
+    """
+    if collect:
+        return ValidationReport(list(violations))
+    for violation in violations:
+        raise violation.exception()
+    return True
+
+
+GENERIC_REFERENCE_PATTERN = re.compile(r"^[A-Z][a-z]+\.")
+
+
+@lru_cache(maxsize=None)
+def attribute_type_name(type_data: str) -> str:
+    """The type name in `type_data`, e.g. 'String' or 'Picklist'."""
     type_match = TYPE_PATTERN.search(type_data)
-    assert (
-        type_match is not None
-    ), "Attribute value type info should always be provided in Veeva documentation"
-    matched_type_name = str(type_match.groups(0)[0])
+    assert type_match is not None, (
+        "Attribute value type info should always be provided in Veeva documentation"
+    )
+    return str(type_match.groups(0)[0])
+
+
+def compile_attribute_type(
+    type_data: str, index: ComponentTypeIndex | None = None
+) -> AttributeType:
+    """Fetch type and constraint metadata from `type_data` once and for all, where
+    references to specific components are to the component types in `index`, which
+    defaults to that of `validation.json`. See `compile_type_data`.
+    """
+    return compile_type_data(
+        type_data, is_component_reference(attribute_type_name(type_data), index)
+    )
+
+
+@lru_cache(maxsize=None)
+def compile_type_data(type_data: str, is_reference: bool) -> AttributeType:
+    """See `compile_attribute_type`. Many attributes share the very same
+    `type_data`, hence the cache, which is keyed by whether the type is that of a
+    component rather than by the schema itself, so that schema versions share it.
+    """
+    matched_type_name = attribute_type_name(type_data)
     enum_match = ENUM_PATTERN.search(type_data)
     allowed_values = (
-        set()
+        frozenset()
         if enum_match is None
-        else {s for s in str(enum_match.groups(0)[0]).split("|") if s}
+        else frozenset(s for s in str(enum_match.groups(0)[0]).split("|") if s)
     )
     type_ = VEEVA_DOC_TO_PYTHON_TYPE.get(matched_type_name)
     is_type_supported = type_ is not None
@@ -189,7 +501,7 @@ def type_check_attribute(name: str, value: Any, type_data: str):
     match_tuple: MatchTuple = (
         is_type_supported,
         is_generic_component_reference(matched_type_name),
-        is_component_reference(matched_type_name),
+        is_reference,
         is_enum(type_data),
         is_multi_value(type_data),
         (
@@ -198,64 +510,373 @@ def type_check_attribute(name: str, value: Any, type_data: str):
             ("maximum value", MAX_VAL_PATTERN.search(type_data)),
         ),
     )
+    kind: AttributeKind
     match match_tuple:
-        # Enum: single and multi-value
-        case (True, False, False, True, multi_value, _):
-            for e in value if isinstance(value, list) else [value]:
-                if e not in allowed_values:
-                    raise ValidationError(
-                        f"Attribute {repr(name)} is {'a multi-value' if multi_value else 'an'} enum with allowed values {', '.join(repr(v) for v in allowed_values)}. Got {repr(e)}."
-                    )
-        # Constraints
+        case (True, False, False, True, _, _):
+            kind = "enum"
         case (True, False, False, False, False, constraints) if any(
             m is not None for _, m in constraints
         ):
-            for k, match_ in constraints:
-                if match_ is None:
-                    continue
-                if type(value) is not type_:
-                    raise ValidationError(
-                        f"Attribute {repr(name)} ought to be of type {repr(matched_type_name)}. Got {repr(value)} which is of type {repr(type(value))}."
-                    )
-                bound = int(match_.groups(0)[0])
-                f = CONSTRAINT_FUNCTIONS[k](bound)
-                if not f(value):
-                    raise ValidationError(
-                        f"Attribute {repr(name)} is constrained to {k} {bound}. Got {repr(value)}."
-                    )
-        # Generic non-enum: single and multi-value
-        case (True, False, False, False, multi_value, _):
-            for e in value if isinstance(value, list) else [value]:
-                if type(e) is not type_:
-                    raise ValidationError(
-                        f"Attribute {repr(name)} {'is a multi-value and' if multi_value else ''} ought to be of type {repr(matched_type_name)}. Got {repr(e)} which is of type {repr(type(e))}."
-                    )
-        # Multi-value reference to other components
-        case (False, False, True, False, True, _):
-            for e in value if isinstance(value, list) else [value]:
-                if re.match(rf"^{matched_type_name}\.", e) is None:
-                    raise ValidationError(
-                        f"Attribute {repr(name)} is multi-value and ought to be a reference to component {repr(matched_type_name)}. Got {repr(e)}."
-                    )
-        # Reference to other components
-        case (False, False, True, False, False, _):
-            if re.match(rf"^{matched_type_name}\.", value) is None:
-                raise ValidationError(
-                    f"Attribute {repr(name)} ought to be a reference to component {repr(matched_type_name)}. Got {repr(value)}."
-                )
-        # A generic reference to other components, i.e. the referenced component
-        # is not explicitly mentioned
+            kind = "constrained"
+        case (True, False, False, False, _, _):
+            kind = "plain"
+        case (False, False, True, False, _, _):
+            kind = "reference"
         case (False, True, False, False, False, _):
-            # TODO: try to improve error message by pointing to specific component
-            # it should refer to. That info is most often available in the
-            # `Description` field
-            if not re.match(r"^[A-Z][a-z]+\.", value):
-                raise ValidationError(
-                    f"Attribute {repr(name)} ought to be a reference to a component (`ComponentReference` of `SubcomponentReference`). Got {repr(value)}."
-                )
-        case _ as wildcard_value:
-            raise ImpossibleComponent(
-                f"{repr(wildcard_value[:-1])}. Attribute name: {repr(name)}. Attribute value: {repr(value)}."
-            )
-    # We gucci if no error was raised
-    return True
+            kind = "generic reference"
+        case _:
+            kind = "impossible"
+    constraints = []
+    for k, match_ in match_tuple[-1]:
+        if match_ is None:
+            continue
+        bound = int(match_.groups(0)[0])
+        constraints.append((k, bound, CONSTRAINT_FUNCTIONS[k](bound)))
+    return AttributeType(
+        type_name=matched_type_name,
+        kind=kind,
+        python_type=type_,
+        multi_value=match_tuple[4],
+        required=REQUIRED_PATTERN.search(type_data) is not None,
+        allowed_values=allowed_values,
+        constraints=tuple(constraints),
+        reference_pattern=(
+            re.compile(rf"^{matched_type_name}\.") if kind == "reference" else None
+        ),
+        flags=match_tuple[:5],
+    )
+
+
+# Ideally we would pass the whole attribute, but type hinting it would cause
+# a circular import
+def type_check_attribute(name: str, value: Any, type_data: str):
+    """Type and constraint check an attribute `value` by fetching that sort of
+    information from `type_data`. `name` is necessary as the attribute value's
+    type and constraints depend on it. See `AttributeType.check`.
+    """
+    return compile_attribute_type(type_data).check(name, value)
+
+
+class ComponentSchema:
+    """The validation schema of a component type, compiled from its `metadata` in
+    `validation.json`, or in the schema with component types `index`. The schemas
+    of its subcomponent types are compiled the first time they are needed.
+    """
+
+    def __init__(self, metadata: dict, index: ComponentTypeIndex | None = None):
+        self.metadata = metadata
+        self.index = index
+        self.attributes: dict[str, AttributeType] = {
+            n: compile_attribute_type(a["type_data"], index)
+            for n, a in metadata["attributes"].items()
+        }
+        self.subcomponents: dict[str, ComponentSchema] = {}
+        self.required = frozenset(n for n, t in self.attributes.items() if t.required)
+
+    def missing(self, names: Iterable[str]) -> list[str]:
+        """The required attributes not in attribute `names`, sorted."""
+        return sorted(self.required.difference(names))
+
+    def subcomponent(self, name: str) -> ComponentSchema | None:
+        """The schema of subcomponent type `name`, if allowed under this one."""
+        schema = self.subcomponents.get(name)
+        if schema is None:
+            metadata = self.metadata["subcomponents"].get(name)
+            if metadata is None:
+                return None
+            schema = self.subcomponents[name] = ComponentSchema(metadata, self.index)
+        return schema
+
+
+@dataclass(frozen=True)
+class ComponentTypeIndex:
+    """Indexes of the component types in metadata following the structure of
+    `validation.json`, for constant-time lookups.
+    """
+
+    # Top-level component types
+    component_types: frozenset[str]
+    # Subcomponent types, at any depth
+    subcomponent_types: frozenset[str]
+    # The component types each subcomponent type is allowed under
+    parents: dict[str, tuple[str, ...]]
+
+    @classmethod
+    def from_metadata(cls, metadata: Mapping[str, dict]) -> ComponentTypeIndex:
+        parents: dict[str, list[str]] = {}
+
+        def visit(name: str, component_metadata: dict):
+            for sub_name, sub_metadata in component_metadata["subcomponents"].items():
+                parents.setdefault(sub_name, []).append(name)
+                visit(sub_name, sub_metadata)
+
+        for name, component_metadata in metadata.items():
+            visit(name, component_metadata)
+        return cls(
+            component_types=frozenset(metadata),
+            subcomponent_types=frozenset(parents),
+            parents={k: tuple(v) for k, v in parents.items()},
+        )
+
+    def __contains__(self, name: object) -> bool:
+        """Whether `name` is a component or subcomponent type."""
+        return name in self.component_types or name in self.subcomponent_types
+
+    def types(self) -> frozenset[str]:
+        """Component and subcomponent types alike."""
+        return self.component_types | self.subcomponent_types
+
+
+def mentions_types(metadata: dict, types: frozenset[str]) -> bool:
+    """Whether any attribute in component type `metadata`, or in its subcomponent
+    types, is of one of `types`.
+    """
+    return any(
+        attribute_type_name(a["type_data"]) in types
+        for a in metadata["attributes"].values()
+    ) or any(mentions_types(m, types) for m in metadata["subcomponents"].values())
+
+
+class Schema:
+    """The validation schema of the component types in `metadata`, which follows
+    the structure of `validation.json`. Each component type is compiled into a
+    `ComponentSchema` the first time it is needed. Those a schema `version` shares
+    with its `base` version (see `load_schema`) are compiled once, by the latter.
+    """
+
+    def __init__(
+        self,
+        metadata: Mapping[str, dict],
+        index: ComponentTypeIndex | None = None,
+        version: str | None = None,
+        base: Schema | None = None,
+    ):
+        self.metadata = metadata
+        self.version = version
+        self.base = base
+        self.components: dict[str, ComponentSchema] = {}
+        if index is not None:
+            self.index = index
+
+    @cached_property
+    def index(self) -> ComponentTypeIndex:
+        return ComponentTypeIndex.from_metadata(self.metadata)
+
+    @cached_property
+    def retyped(self) -> frozenset[str]:
+        """The component types which are in either this version or its base, but
+        not in both, to which references compile differently in each of them.
+        """
+        if self.base is None:
+            return frozenset()
+        return self.index.types() ^ self.base.index.types()
+
+    def component(self, name: str) -> ComponentSchema | None:
+        """The schema of component type `name`, if it exists."""
+        schema = self.components.get(name)
+        if schema is None:
+            metadata = self.metadata.get(name)
+            if metadata is None:
+                return None
+            if (
+                self.base is not None
+                and self.base.metadata.get(name) is metadata
+                and not (self.retyped and mentions_types(metadata, self.retyped))
+            ):
+                schema = self.base.component(name)
+                assert schema is not None
+            else:
+                schema = ComponentSchema(metadata, self.index)
+            self.components[name] = schema
+        return schema
+
+
+class LazyMetadata(Mapping):
+    """Metadata following the structure of `validation.json`, made of component
+    types pickled one by one, each of which is only unpickled when first accessed.
+    """
+
+    def __init__(self, serialized: dict[str, bytes]):
+        self.serialized = serialized
+        self.loaded: dict[str, dict] = {}
+
+    def __getitem__(self, name: str) -> dict:
+        metadata = self.loaded.get(name)
+        if metadata is None:
+            metadata = self.loaded[name] = pickle.loads(self.serialized[name])
+        return metadata
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.serialized)
+
+    def __len__(self) -> int:
+        return len(self.serialized)
+
+
+def schema_artifact_key() -> str:
+    # The artifact goes stale whenever `validation.json` or its format change
+    return digest(SCHEMA_ARTIFACT_FORMAT, VALIDATION_JSON_PATH.read_bytes())
+
+
+def build_schema_artifact(path: Path = SCHEMA_ARTIFACT_PATH) -> None:
+    """Serialize `validation.json` to `path`, one component type at a time, along
+    with its `ComponentTypeIndex`, keyed by `schema_artifact_key`.
+    """
+    metadata = load_component_type_metadata()
+    serialized = {
+        n: pickle.dumps(m, protocol=pickle.HIGHEST_PROTOCOL)
+        for n, m in metadata.items()
+    }
+    index = ComponentTypeIndex.from_metadata(metadata)
+    dump_artifact(path, schema_artifact_key(), (serialized, index))
+
+
+def load_schema_artifact(path: Path = SCHEMA_ARTIFACT_PATH) -> Schema | None:
+    """The schema serialized to `path` by `build_schema_artifact`, if the artifact
+    is there and up to date.
+    """
+    artifact = load_artifact(path, schema_artifact_key())
+    if artifact is None:
+        return None
+    serialized, index = artifact
+    return Schema(LazyMetadata(serialized), index, DEFAULT_SCHEMA_VERSION)
+
+
+@cache
+def default_schema() -> Schema:
+    """The schema of `validation.json`, loaded from its precompiled artifact
+    whenever it is up to date. Only the component types validated against are ever
+    deserialized.
+    """
+    return load_schema_artifact() or Schema(
+        load_component_type_metadata(), version=DEFAULT_SCHEMA_VERSION
+    )
+
+
+class VersionedMetadata(Mapping):
+    """The metadata of a schema version: that of its `base` version, with the
+    component types in `changes` added or replaced, or removed if `None`.
+    """
+
+    def __init__(self, base: Mapping[str, dict], changes: dict[str, dict | None]):
+        self.base = base
+        self.changes = changes
+
+    def __getitem__(self, name: str) -> dict:
+        if name in self.changes:
+            metadata = self.changes[name]
+            if metadata is None:
+                raise KeyError(name)
+            return metadata
+        return self.base[name]
+
+    def __iter__(self) -> Iterator[str]:
+        for name in self.base:
+            if name not in self.changes:
+                yield name
+        for name, metadata in self.changes.items():
+            if metadata is not None:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def share(new: Any, old: Any) -> Any:
+    """`new`, made of the very same objects as `old` wherever they are equal, so
+    that both are stored only once.
+    """
+    if new == old:
+        return old
+    if isinstance(new, dict) and isinstance(old, dict):
+        return {k: share(v, old.get(k)) for k, v in new.items()}
+    return new
+
+
+def schema_delta(
+    base: Mapping[str, dict], new: Mapping[str, dict]
+) -> dict[str, dict | None]:
+    """The component types in `new` which are not in `base` or differ from it,
+    along with those in `base` which are not in `new`, as `None`. The changes
+    stored in schema version files, see `load_schema`.
+    """
+    changes: dict[str, dict | None] = {
+        name: metadata for name, metadata in new.items() if base.get(name) != metadata
+    }
+    changes.update({name: None for name in base if name not in new})
+    return changes
+
+
+def schema_versions(directory: Path | None = None) -> list[str]:
+    """The names of the schema versions available in `directory`, which defaults to
+    `SCHEMAS_DIR`, along with `DEFAULT_SCHEMA_VERSION`.
+    """
+    directory = SCHEMAS_DIR if directory is None else directory
+    return [DEFAULT_SCHEMA_VERSION, *sorted(p.stem for p in directory.glob("*.json"))]
+
+
+def load_schema(
+    version: str = DEFAULT_SCHEMA_VERSION, directory: Path | None = None
+) -> Schema:
+    """The schema of component types of Vault `version`, read from
+    `<directory>/<version>.json`, where `directory` defaults to `SCHEMAS_DIR`.
+
+    Version files only hold what changed since their `"base"` version, see
+    `schema_delta`, which is loaded too. Versions share what they have in common
+    with their base, be it the metadata or the compiled schemas of component types,
+    so that loading many of them at once takes little more memory than loading
+    one. `DEFAULT_SCHEMA_VERSION` stands for `validation.json`.
+    """
+    return load_schema_version(version, SCHEMAS_DIR if directory is None else directory)
+
+
+@cache
+def load_schema_version(version: str, directory: Path) -> Schema:
+    """See `load_schema`. Every version is loaded only once."""
+    if version == DEFAULT_SCHEMA_VERSION:
+        return default_schema()
+    path = directory / f"{version}.json"
+    if not path.exists():
+        options = ", ".join(repr(v) for v in schema_versions(directory))
+        raise ValueError(f"Unknown schema version {version!r}. Options are: {options}.")
+    version_data = json.loads(path.read_text())
+    base = load_schema_version(version_data["base"], directory)
+    changes = {
+        name: share(metadata, base.metadata.get(name))
+        for name, metadata in version_data["components"].items()
+    }
+    return Schema(VersionedMetadata(base.metadata, changes), version=version, base=base)
+
+
+def as_schema(metadata: Mapping[str, dict] | Schema) -> Schema:
+    return metadata if isinstance(metadata, Schema) else Schema(metadata)
+
+
+# How many of the schemas `as_component_schema` compiles from metadata to keep
+COMPILED_COMPONENT_SCHEMAS_SIZE = 256
+# The schemas `as_component_schema` compiled, by the identity of their metadata,
+# least recently used first. Each holds on to its metadata, whose identity thus
+# cannot be reused while it is cached
+compiled_component_schemas: OrderedDict[int, ComponentSchema] = OrderedDict()
+compiled_component_schemas_lock = Lock()
+
+
+def as_component_schema(metadata: dict | ComponentSchema) -> ComponentSchema:
+    """`metadata` compiled into a `ComponentSchema`, if not one already. The
+    schemas of the latest metadata dicts are kept, so that validating against the
+    same dict over and over again compiles it only once. Hence a dict mutated in
+    place after being validated against is not picked up.
+    """
+    if isinstance(metadata, ComponentSchema):
+        return metadata
+    with compiled_component_schemas_lock:
+        schema = compiled_component_schemas.get(id(metadata))
+        if schema is not None:
+            compiled_component_schemas.move_to_end(id(metadata))
+            return schema
+    schema = ComponentSchema(metadata)
+    with compiled_component_schemas_lock:
+        compiled_component_schemas[id(metadata)] = schema
+        if len(compiled_component_schemas) > COMPILED_COMPONENT_SCHEMAS_SIZE:
+            compiled_component_schemas.popitem(last=False)
+    return schema
@@ -0,0 +1,62 @@
+"""
+Reading MDL straight out of VPK files, the zip archives Veeva Vault packages are
+distributed as, without extracting them to disk first.
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Generator
+from zipfile import ZipFile
+
+from meddle.loading import LoadResult, chunked, load_in_pool, load_sources
+from meddle.parser import Engine
+
+if TYPE_CHECKING:
+    from meddle.cache import ParseCache
+
+
+def open_vpk(source: str | Path | bytes | IO[bytes]) -> ZipFile:
+    """Open the VPK in `source`, be it a path, the VPK contents themselves, or a
+    binary file object.
+    """
+    return ZipFile(BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def is_mdl_member(name: str) -> bool:
+    """Whether VPK member `name` is an MDL file."""
+    # For the second clause, see
+    # https://apple.stackexchange.com/questions/373450/why-are-almost-blank-files-being-created-by-macos-and-applications
+    return name.endswith(".mdl") and not name.startswith("__MACOSX")
+
+
+def mdl_members(vpk: ZipFile) -> list[str]:
+    """The names of the MDL files within `vpk`."""
+    return [n for n in vpk.namelist() if is_mdl_member(n)]
+
+
+def read_mdl_members(vpk: ZipFile) -> Generator[tuple[Path, bytes], None, None]:
+    """Lazily read the MDL files within `vpk`, one at a time. They are decoded by
+    whichever worker loads them, see `meddle.loading.load_source`.
+    """
+    for name in mdl_members(vpk):
+        yield Path(name), vpk.read(name)
+
+
+def load_vpk(
+    source: str | Path | bytes | IO[bytes],
+    workers: int | None = None,
+    ordered: bool = True,
+    engine: Engine = "tree",
+    chunk_size: int = 16,
+    cache: ParseCache | None = None,
+) -> Generator[LoadResult, None, None]:
+    """Load every MDL file within the VPK in `source` (see `open_vpk`), the same
+    as `meddle.load_directory` does with directories. MDL files are decompressed
+    in memory, only as workers are ready to parse them. Those which are not valid
+    UTF-8 are reported as errors, like those which fail to parse.
+    """
+    with open_vpk(source) as vpk:
+        chunks = chunked(read_mdl_members(vpk), chunk_size)
+        yield from load_in_pool(load_sources, chunks, engine, workers, ordered, cache)
@@ -0,0 +1,227 @@
+"""
+A seeded generator of synthetic, schema-valid MDL commands of configurable size,
+driven by `validation.json` (or any other `meddle.validation.Schema`), to measure
+how loading, validating and dumping scale beyond the scrapped examples.
+
+Generated commands `Command.validate` and round-trip, i.e.
+`Command.loads(command.dumps()) == command`. Attributes of impossible kinds (see
+`meddle.validation.AttributeType`) are left out, unless required, in which case
+they are left empty, as all attribute values are nullable.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import string
+from dataclasses import dataclass
+
+from meddle.parser import Attribute, AttributeValue, Command, Component
+from meddle.validation import AttributeType, ComponentSchema, Schema, default_schema
+
+# What generated strings are made of. Quotes and braces are left out, since they
+# close string and XML values
+WORD_ALPHABET = string.ascii_lowercase + string.digits
+# Component type names `mdl_grammar.lark` can load, which some documented ones,
+# e.g. `WorkflowCancelationAction`, are not
+COMPONENT_TYPE_NAME_PATTERN = re.compile(r"^[A-Z][a-z]+$")
+# Where to wrap multi-line string values
+MAX_LINE_LENGTH = 80
+
+
+@dataclass
+class CorpusShape:
+    """The size of generated commands."""
+
+    # At most how many of the attributes of a component type to set, on top of the
+    # required ones
+    attributes: int = 8
+    # How many subcomponents of each subcomponent type
+    fan_out: int = 4
+    # At most how many subcomponent types to generate subcomponents of
+    subcomponent_types: int = 4
+    # Length of string values, capped by the maximum length of each attribute
+    string_length: int = 32
+    # Length of multi-line, i.e. `LongString`, values
+    long_string_length: int = 1_024
+    # Length of XML values
+    xml_length: int = 2_048
+    # Number of values of multi-value attributes, at least two so that they are
+    # loaded back as lists
+    list_length: int = 4
+
+
+class CommandGenerator:
+    """Generate commands of component types in `schema`, which defaults to that of
+    `validation.json`, of the size given by `shape`. The same `seed` and `shape`
+    generate the very same commands.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        shape: CorpusShape | None = None,
+        schema: Schema | None = None,
+    ):
+        self.random = random.Random(seed)
+        self.shape = CorpusShape() if shape is None else shape
+        self.schema = default_schema() if schema is None else schema
+        self.names = 0
+
+    def name(self, prefix: str = "synthetic") -> str:
+        """A component name unique within the generator."""
+        self.names += 1
+        return f"{prefix}_{self.names}__c"
+
+    def word(self, length: int) -> str:
+        return "".join(self.random.choices(WORD_ALPHABET, k=max(length, 1)))
+
+    def text(self, length: int) -> str:
+        """Words separated by spaces, wrapped into lines for longer `length`."""
+        lines, line = [], []
+        size = line_size = 0
+        while size < length:
+            word = self.word(min(self.random.randint(1, 12), length - size))
+            line.append(word)
+            size += len(word) + 1
+            line_size += len(word) + 1
+            if line_size >= MAX_LINE_LENGTH:
+                lines.append(" ".join(line))
+                line, line_size = [], 0
+        if line:
+            lines.append(" ".join(line))
+        return "\n".join(lines)[:length].strip()
+
+    def xml(self, length: int) -> str:
+        """Vault XML-like markup, e.g. that of `Pagelayout` components."""
+        elements = []
+        size = 0
+        while size < length:
+            element = (
+                f'<vault:field reference="{self.word(12)}__c" label="{self.word(8)}"/>'
+            )
+            elements.append(element)
+            size += len(element) + 1
+        return "\n".join(["<vault:page>", *elements, "</vault:page>"])
+
+    def string(self, attribute_type: AttributeType) -> str:
+        bounds = [b for k, b, _ in attribute_type.constraints if k == "maximum length"]
+        match attribute_type.type_name:
+            case "XMLString":
+                length = self.shape.xml_length
+            case "LongString":
+                length = self.shape.long_string_length
+            case _:
+                length = self.shape.string_length
+        if bounds:
+            length = min(length, *bounds)
+        if attribute_type.type_name == "XMLString" and not bounds:
+            return self.xml(length)
+        if attribute_type.type_name == "LongString":
+            return self.text(length)
+        return self.text(length).replace("\n", " ")
+
+    def number(self, attribute_type: AttributeType) -> int:
+        bounds = {k: b for k, b, _ in attribute_type.constraints}
+        low = bounds.get("minimum value", 0)
+        return self.random.randint(low, bounds.get("maximum value", low + 1_000))
+
+    def scalar(self, attribute_type: AttributeType) -> AttributeValue:
+        match attribute_type.kind:
+            case "enum":
+                return self.random.choice(sorted(attribute_type.allowed_values))
+            case "reference":
+                return f"{attribute_type.type_name}.{self.name()}"
+            case "generic reference":
+                return f"Object.{self.name()}"
+        if attribute_type.python_type is bool:
+            return self.random.choice([True, False])
+        if attribute_type.python_type is int:
+            return self.number(attribute_type)
+        return self.string(attribute_type)
+
+    def value(
+        self, attribute_type: AttributeType
+    ) -> AttributeValue | list[AttributeValue] | None:
+        """A value which complies with `attribute_type`."""
+        if attribute_type.kind == "impossible":
+            return None
+        if not attribute_type.multi_value:
+            return self.scalar(attribute_type)
+        if attribute_type.kind == "enum":
+            allowed_values = sorted(attribute_type.allowed_values)
+            k = min(self.shape.list_length, len(allowed_values))
+            if k < 2:
+                return allowed_values[0]
+            return self.random.sample(allowed_values, k)
+        # Each value on its own line would make for very long lines otherwise
+        return [
+            self.scalar(attribute_type).replace("\n", " ")  # type: ignore[union-attr]
+            if attribute_type.python_type is str
+            else self.scalar(attribute_type)
+            for _ in range(max(self.shape.list_length, 2))
+        ]
+
+    def attributes(self, schema: ComponentSchema) -> list[Attribute]:
+        """The required attributes of `schema`, and up to `shape.attributes` more,
+        in the order they are documented in.
+        """
+        optional = [
+            n
+            for n, t in schema.attributes.items()
+            if not t.required and t.kind != "impossible"
+        ]
+        # Components cannot be loaded without attributes
+        k = max(self.shape.attributes, 0 if schema.required else 1)
+        chosen = set(self.random.sample(optional, min(k, len(optional))))
+        return [
+            Attribute(n, self.value(t))
+            for n, t in schema.attributes.items()
+            if t.required or n in chosen
+        ]
+
+    def component(self, component_type_name: str, schema: ComponentSchema) -> Component:
+        return Component(component_type_name, self.name(), self.attributes(schema))
+
+    def command(self, component_type_name: str | None = None) -> Command:
+        """A `RECREATE` command of `component_type_name`, or of a component type
+        chosen at random among those with subcomponent types.
+        """
+        if component_type_name is None:
+            component_type_name = self.random.choice(
+                sorted(
+                    n
+                    for n, m in self.schema.metadata.items()
+                    if m["subcomponents"] and COMPONENT_TYPE_NAME_PATTERN.match(n)
+                )
+            )
+        schema = self.schema.component(component_type_name)
+        if schema is None:
+            raise ValueError(f"Component type {component_type_name!r} does not exist.")
+        subcomponent_types = sorted(
+            n
+            for n in schema.metadata["subcomponents"]
+            if COMPONENT_TYPE_NAME_PATTERN.match(n)
+        )
+        subcomponent_types = self.random.sample(
+            subcomponent_types,
+            min(self.shape.subcomponent_types, len(subcomponent_types)),
+        )
+        components = []
+        for name in sorted(subcomponent_types):
+            subschema = schema.subcomponent(name)
+            assert subschema is not None
+            components.extend(
+                self.component(name, subschema) for _ in range(self.shape.fan_out)
+            )
+        return Command(
+            "RECREATE",
+            component_type_name,
+            self.name(),
+            self.attributes(schema),
+            components or None,
+        )
+
+    def commands(self, n: int) -> list[Command]:
+        """`n` commands of component types chosen at random."""
+        return [self.command() for _ in range(n)]
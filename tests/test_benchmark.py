@@ -1,9 +1,32 @@
+from copy import deepcopy
+from functools import cache
+from io import BytesIO, StringIO
 from operator import attrgetter
+import os
 from pathlib import Path
+import shutil
+import subprocess
+import sys
+import tracemalloc
 
+from lark import Lark
 import pytest
 
-from meddle import Command
+from meddle import Attribute, Command, Component, diff, load_directory, load_file
+from meddle.cache import ParseCache
+from meddle.frozen import freeze
+from meddle.package import PackageIndex
+from meddle.recovery import parse_with_recovery
+from meddle.validation import ValidationCache
+from meddle.parser import (
+    clear_parsers,
+    compile_parser,
+    get_parser,
+    load_parser_artifact,
+    split_commands,
+)
+
+from synthetic import CommandGenerator, CorpusShape
 
 
 path_name = attrgetter("name")
@@ -13,15 +36,407 @@ mdl_files = sorted(
     scrapped_mdl_dir.rglob("*.mdl"),
     key=path_name,
 )
+# See `error_on_validation_mdl_files` in `conftest.py`
+invalid_mdl_file_names = {
+    "Doclifecycle.vsdk_document_lifecycle__c.mdl",
+    "Object.vsdk_create_product_application__c.mdl",
+    "Object.vsdk_product_application__c.mdl",
+    "Object.vsdk_setting__c.mdl",
+}
 
 
+@pytest.mark.benchmark(group="loading-warm")
 @pytest.mark.parametrize("path", mdl_files, ids=path_name)
 def test_loading(path, benchmark):
+    # Make sure the parser is compiled before the timer starts
+    get_parser("mdl_command")
     benchmark(Command.loads, path.read_text())
     assert True
 
 
+@pytest.mark.benchmark(group="loading-cold")
+@pytest.mark.parametrize("path", mdl_files, ids=path_name)
+def test_loading_cold(path, benchmark):
+    # Every round compiles the parser from scratch, as `Command.loads` used to do
+    benchmark.pedantic(
+        Command.loads, args=(path.read_text(),), setup=clear_parsers, rounds=5
+    )
+    assert True
+
+
+@pytest.mark.benchmark(group="loading-engine")
+@pytest.mark.parametrize("engine", ["tree", "inline", "fast"])
+def test_loading_corpus(engine, benchmark):
+    sources = [p.read_text() for p in mdl_files]
+    if engine != "fast":
+        get_parser("mdl_command", engine)
+
+    def load_all():
+        return [Command.loads(s, engine) for s in sources]
+
+    tracemalloc.start()
+    load_all()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_memory_bytes"] = peak
+    # Files per second are OPS times this
+    benchmark.extra_info["files"] = len(sources)
+    benchmark(load_all)
+
+
+@pytest.mark.benchmark(group="loading-engine")
+def test_loading_corpus_cached(tmp_path, benchmark):
+    """Loading the corpus, every command of which is already in a `ParseCache`"""
+    sources = [p.read_text() for p in mdl_files]
+    cache = ParseCache(tmp_path)
+    for s in sources:
+        Command.loads(s, cache=cache)
+
+    def load_all():
+        return [Command.loads(s, cache=cache) for s in sources]
+
+    benchmark.extra_info["files"] = len(sources)
+    benchmark(load_all)
+    benchmark.extra_info["hit_rate"] = cache.stats.hit_rate
+    benchmark.extra_info["time_saved"] = cache.stats.time_saved
+
+
+@pytest.mark.benchmark(group="loading-engine")
+def test_loading_corpus_with_recovery(benchmark):
+    """Loading the corpus, as one source, with a syntax error in every 10th file"""
+    texts = [p.read_text() for p in mdl_files]
+    for i in range(0, len(texts), 10):
+        texts[i] = texts[i].replace("active(true)", "active(ture)", 1)
+    source = "\n".join(texts)
+    get_parser("mdl_command")
+    result = benchmark(parse_with_recovery, source)
+    benchmark.extra_info["files"] = len(texts)
+    benchmark.extra_info["errors"] = len(result.errors)
+
+
+@pytest.mark.benchmark(group="loading-engine-peak-memory")
+@pytest.mark.parametrize("engine", ["tree", "inline", "fast"])
+@pytest.mark.parametrize("path", mdl_files, ids=path_name)
+def test_loading_peak_memory(path, engine, benchmark):
+    source = path.read_text()
+    if engine != "fast":
+        get_parser("mdl_command", engine)
+    tracemalloc.start()
+    Command.loads(source, engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_memory_bytes"] = peak
+    benchmark(Command.loads, source, engine)
+
+
 @pytest.mark.parametrize("path", mdl_files, ids=path_name)
 def test_validating(path, benchmark):
     command = benchmark(Command.loads, path.read_text())
     assert command.validate()
+
+
+@pytest.mark.benchmark(group="validating-corpus")
+def test_validating_corpus(benchmark):
+    """Validating every command in the corpus which is valid, parsed beforehand"""
+    commands = [
+        Command.loads(p.read_text())
+        for p in mdl_files
+        if p.name not in invalid_mdl_file_names
+    ]
+    benchmark.extra_info["files"] = len(commands)
+    assert benchmark(lambda: all(c.validate() for c in commands))
+
+
+@pytest.mark.benchmark(group="validating-corpus")
+def test_validating_corpus_cached(benchmark):
+    """Validating every command in the corpus, through a `ValidationCache` already
+    holding all of them, and reporting the hit rate of a first, cold pass
+    """
+    commands = [Command.loads(p.read_text()) for p in mdl_files]
+    cache = ValidationCache()
+    for c in commands:
+        c.validate(collect=True, cache=cache)
+    benchmark.extra_info["files"] = len(commands)
+    benchmark.extra_info["cold_hit_rate"] = cache.hit_rate
+    benchmark(lambda: [c.validate(collect=True, cache=cache) for c in commands])
+
+
+@pytest.mark.benchmark(group="validating-collect")
+def test_validating_collect(benchmark):
+    """Collecting the violations of a command with thousands of them"""
+    command = Command(
+        "RECREATE",
+        "Picklist",
+        "vmdml_options__c",
+        attributes=[Attribute("label", 1)],
+        components=[
+            Component("Picklistentry", f"entry_{i}__c", [Attribute("order", str(i))])
+            for i in range(5_000)
+        ],
+    )
+    report = benchmark(command.validate, collect=True)
+    benchmark.extra_info["violations"] = len(report)
+
+
+@pytest.mark.benchmark(group="package-references")
+def test_resolving_package_references(benchmark):
+    """Resolving the references of a package of 20,000 components"""
+    commands = []
+    for i in range(10_000):
+        commands.append(
+            Command(
+                "RECREATE",
+                "Objectlifecycle",
+                f"lifecycle_{i}__c",
+                [Attribute("starting_state", f"Objectlifecyclestate.state_{i}__c")],
+                [Component("Objectlifecyclestate", f"state_{i}__c", [])],
+            )
+        )
+        commands.append(
+            Command(
+                "RECREATE",
+                "Object",
+                f"object_{i}__c",
+                [
+                    Attribute(
+                        "available_lifecycles", f"Objectlifecycle.lifecycle_{i}__c"
+                    ),
+                    Attribute("default_obj_type", "Objecttype.base__v"),
+                ],
+            )
+        )
+
+    def resolve():
+        return PackageIndex.from_commands(commands).unresolved()
+
+    unresolved = benchmark(resolve)
+    assert len(unresolved) == 10_000
+    benchmark.extra_info["commands"] = len(commands)
+
+
+# Subcomponents of each subcomponent type of the synthetic commands scaled over.
+# The largest ones dump into about 50,000 lines
+fan_outs = [10, 100, 1_000, 2_500]
+
+
+@cache
+def synthetic_command(fan_out: int) -> Command:
+    """A synthetic `Object` command, the size of which grows linearly with
+    `fan_out`. See `tests/synthetic.py`.
+    """
+    return CommandGenerator(seed=fan_out, shape=CorpusShape(fan_out=fan_out)).command(
+        "Object"
+    )
+
+
+def scale(benchmark, f, *args):
+    """Benchmark `f(*args)`, reporting its peak memory and the size of the
+    synthetic command at hand in `extra_info`, so that time and memory can be
+    plotted against size. See `scripts/plot_scaling.py`.
+    """
+    tracemalloc.start()
+    f(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_memory_bytes"] = peak
+    benchmark.pedantic(f, args=args, rounds=3, warmup_rounds=1)
+
+
+@pytest.mark.benchmark(group="scaling-loads")
+@pytest.mark.parametrize("fan_out", fan_outs, ids=lambda f: f"fan_out={f}")
+def test_scaling_loads(fan_out, benchmark):
+    source = synthetic_command(fan_out).dumps()
+    benchmark.extra_info["lines"] = source.count("\n") + 1
+    get_parser("mdl_command")
+    scale(benchmark, Command.loads, source)
+
+
+@pytest.mark.benchmark(group="scaling-validate")
+@pytest.mark.parametrize("fan_out", fan_outs, ids=lambda f: f"fan_out={f}")
+def test_scaling_validate(fan_out, benchmark):
+    command = synthetic_command(fan_out)
+    benchmark.extra_info["lines"] = command.dumps().count("\n") + 1
+    scale(benchmark, command.validate)
+
+
+@pytest.mark.benchmark(group="scaling-dumps")
+@pytest.mark.parametrize("fan_out", fan_outs, ids=lambda f: f"fan_out={f}")
+def test_scaling_dumps(fan_out, benchmark):
+    command = synthetic_command(fan_out)
+    benchmark.extra_info["lines"] = command.dumps().count("\n") + 1
+    scale(benchmark, command.dumps)
+
+
+@pytest.mark.benchmark(group="scaling-diff")
+@pytest.mark.parametrize("fan_out", fan_outs, ids=lambda f: f"fan_out={f}")
+def test_scaling_diff(fan_out, benchmark):
+    """Diffing a synthetic command against a copy of itself with every tenth
+    component renamed, and the first one moved last
+    """
+    old = synthetic_command(fan_out)
+    new = deepcopy(old)
+    assert new.components is not None
+    new.components = new.components[1:] + new.components[:1]
+    for c in new.components[::10]:
+        c.component_name = f"renamed_{c.component_name}"
+    benchmark.extra_info["lines"] = old.dumps().count("\n") + 1
+    scale(benchmark, diff, old, new)
+
+
+@pytest.mark.benchmark(group="scaling-split")
+@pytest.mark.parametrize("fan_out", fan_outs, ids=lambda f: f"fan_out={f}")
+def test_scaling_split(fan_out, benchmark):
+    """Splitting a stream of as many small commands as the components of a
+    synthetic command
+    """
+    command = "RECREATE Picklist p_{0}__c (label('Option {0}'), active(true));\n"
+    source = "".join(command.format(i) for i in range(fan_out * 10))
+    benchmark.extra_info["lines"] = source.count("\n") + 1
+    scale(benchmark, lambda: list(split_commands(StringIO(source))))
+
+
+@pytest.mark.benchmark(group="scaling-split-large")
+@pytest.mark.parametrize("fan_out", fan_outs, ids=lambda f: f"fan_out={f}")
+def test_scaling_split_large(fan_out, benchmark):
+    """Splitting a stream holding a single synthetic command, read in small chunks"""
+    source = synthetic_command(fan_out).dumps()
+    benchmark.extra_info["lines"] = source.count("\n") + 1
+    scale(benchmark, lambda: list(split_commands(StringIO(source), chunk_size=1024)))
+
+
+@pytest.mark.benchmark(group="lookups")
+@pytest.mark.parametrize("indexed", [True, False], ids=["indexed", "scan"])
+def test_component_lookups(indexed, benchmark):
+    """Looking up every tenth component of a command with 5,000 of them by name"""
+    command = Command.loads(synthetic_command(2_500).dumps())
+    keys = [(c.component_type_name, c.component_name) for c in command.components]
+
+    def look_up_indexed():
+        return [command.component(*k) for k in keys[::10]]
+
+    def look_up_scan():
+        return [
+            next(
+                c
+                for c in command.components
+                if (c.component_type_name, c.component_name) == k
+            )
+            for k in keys[::10]
+        ]
+
+    benchmark.extra_info["lookups"] = len(keys[::10])
+    benchmark(look_up_indexed if indexed else look_up_scan)
+
+
+@pytest.mark.benchmark(group="deduplication")
+@pytest.mark.parametrize("frozen", [True, False], ids=["frozen", "structural_key"])
+def test_deduplication(frozen, benchmark):
+    """Deduplicating the scrapped corpus, loaded twice over"""
+    commands = [Command.loads(p.read_text()) for p in mdl_files * 2]
+    if frozen:
+        frozen_commands = [freeze(c) for c in commands]
+        benchmark(lambda: len(set(frozen_commands)))
+    else:
+        benchmark(lambda: len({c.structural_key() for c in commands}))
+
+
+@pytest.mark.benchmark(group="parser-building")
+def test_parser_compilation(benchmark):
+    benchmark(compile_parser, "mdl_command")
+
+
+@pytest.mark.benchmark(group="parser-building")
+def test_parser_deserialization(benchmark):
+    serialized = load_parser_artifact()[("mdl_command", "tree")]
+    benchmark(lambda: Lark.load(BytesIO(serialized)))
+
+
+@pytest.mark.benchmark(group="import")
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import meddle",
+        f"from meddle import Command; Command.loads({mdl_files[0].read_text()!r})",
+    ],
+    ids=["import", "import-and-first-parse"],
+)
+def test_import(code, benchmark):
+    # A fresh interpreter each round, so nothing is cached in-process
+    benchmark.pedantic(subprocess.run, args=([sys.executable, "-c", code],), rounds=5)
+
+
+@pytest.mark.benchmark(group="import")
+def test_import_time(benchmark):
+    """`python -X importtime -c "import meddle"`, reporting the self and cumulative
+    import times (in microseconds) of every `meddle` module in `extra_info`
+    """
+
+    def import_meddle():
+        return subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import meddle"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    result = benchmark.pedantic(import_meddle, rounds=5)
+    for line in result.stderr.splitlines():
+        # E.g. "import time:      6425 |       9251 |     meddle.validation"
+        self_time, cumulative_time, module = line.split(":", 1)[1].split("|")
+        if module.strip().startswith("meddle"):
+            benchmark.extra_info[module.strip()] = {
+                "self": int(self_time),
+                "cumulative": int(cumulative_time),
+            }
+
+
+@pytest.fixture(scope="module")
+def mdl_corpus_dir(tmp_path_factory):
+    """A corpus made of several copies of the scrapped MDL files"""
+    corpus_dir = tmp_path_factory.mktemp("corpus")
+    for i in range(8):
+        shutil.copytree(scrapped_mdl_dir, corpus_dir / str(i))
+    return corpus_dir
+
+
+@pytest.mark.benchmark(group="loading-directory")
+@pytest.mark.parametrize(
+    "workers", sorted({1, 2, 4, os.cpu_count() or 1}), ids=lambda w: f"workers={w}"
+)
+def test_load_directory_scaling(workers, mdl_corpus_dir, benchmark):
+    benchmark.extra_info["files"] = len(list(mdl_corpus_dir.rglob("*.mdl")))
+    benchmark.pedantic(
+        lambda: list(load_directory(mdl_corpus_dir, workers=workers)), rounds=3
+    )
+
+
+@pytest.fixture(scope="module")
+def mdl_corpus_10k(tmp_path_factory):
+    """A corpus of 10,000 MDL files, made of as many copies of the scrapped ones"""
+    corpus_dir = tmp_path_factory.mktemp("corpus_10k")
+    paths = []
+    for i in range(10_000):
+        path = corpus_dir / f"{i}.mdl"
+        shutil.copyfile(mdl_files[i % len(mdl_files)], path)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.benchmark(group="listing-corpus")
+@pytest.mark.parametrize(
+    "engine,lazy",
+    [("tree", False), ("fast", False), ("tree", True)],
+    ids=["tree", "fast", "lazy"],
+)
+def test_listing_corpus(engine, lazy, mdl_corpus_10k, benchmark):
+    """What commands are in the corpus, going by their headers alone"""
+
+    def list_corpus():
+        return [
+            (c.command, c.component_type_name, c.component_name)
+            for p in mdl_corpus_10k
+            for c in load_file(p, engine, lazy)
+        ]
+
+    benchmark.extra_info["files"] = len(mdl_corpus_10k)
+    benchmark.pedantic(list_corpus, rounds=1)
@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+from conftest import path_name, scrapped_mdl_dir, scrapped_mdl_files
+from lark.exceptions import UnexpectedInput
+
+from meddle import Attribute, Command, Component, load_directory, load_file
+from meddle import cache as cache_module
+from meddle.cache import CacheStats, ParseCache, decode_command, encode_command
+
+SOURCE = "RECREATE Picklist one__c (label('One'), active(true));"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(tmp_path / "cache")
+
+
+@pytest.mark.parametrize("path", scrapped_mdl_files, ids=path_name)
+def test_encoding(path):
+    for command in load_file(path):
+        assert decode_command(encode_command(command)) == command
+
+
+def test_encoding_components_without_attributes(cache):
+    command = Command(
+        "RECREATE",
+        "Picklist",
+        "one__c",
+        [Attribute("label", "One")],
+        [Component("Picklistentry", "two__c")],
+    )
+    assert decode_command(encode_command(command)) == command
+    key = cache.key(command.dumps())
+    cache.write(key, (0.0, encode_command(command)))
+    assert decode_command(cache.read(key)[1]) == command
+
+
+def test_loads(cache):
+    command = Command.loads(SOURCE)
+    assert Command.loads(SOURCE, cache=cache) == command
+    assert (cache.stats.hits, cache.stats.misses) == (0, 1)
+    assert Command.loads(SOURCE, cache=cache) == command
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert cache.stats.hit_rate == 0.5
+    # Entries outlive the `ParseCache` that wrote them
+    other_cache = ParseCache(cache.directory)
+    assert Command.loads(SOURCE, cache=other_cache) == command
+    assert other_cache.stats.hits == 1
+
+
+def test_errors_are_not_cached(cache):
+    for _ in range(2):
+        with pytest.raises(UnexpectedInput):
+            Command.loads("DROP Picklist One__c;", cache=cache)
+    assert cache.stats == CacheStats(misses=2)
+    assert list(cache.directory.iterdir()) == []
+
+
+def test_namespace(cache, monkeypatch):
+    Command.loads(SOURCE, cache=cache)
+    monkeypatch.setattr(cache_module, "CACHE_NAMESPACE", "another grammar")
+    Command.loads(SOURCE, cache=cache)
+    assert cache.stats.misses == 2
+
+
+def test_corrupted_entry(cache):
+    Command.loads(SOURCE, cache=cache)
+    cache.path(cache.key(SOURCE)).write_bytes(b"garbage")
+    assert Command.loads(SOURCE, cache=cache) == Command.loads(SOURCE)
+    assert cache.stats.misses == 2
+
+
+def test_tampered_entry(cache):
+    Command.loads(SOURCE, cache=cache)
+    path = cache.path(cache.key(SOURCE))
+    key, entry = path.read_text().split("\n", 1)
+    # Entries are plain JSON, which reads back into no more than data
+    assert json.loads(entry)[1][1] == "Picklist"
+    path.write_text(f"{key}\n{json.dumps([0.0, ['not', 'a', 'command']])}")
+    assert Command.loads(SOURCE, cache=cache) == Command.loads(SOURCE)
+    assert cache.stats.misses == 2
+
+
+def test_eviction(cache):
+    sources = [f"DROP Picklist p{i}__c;" for i in range(4)]
+    for i, source in enumerate(sources):
+        Command.loads(source, cache=cache)
+        path = cache.path(cache.key(source))
+        os.utime(path, (i, i))
+    entry_size = path.stat().st_size
+    # Using the first entry makes the second one the least recently used
+    Command.loads(sources[0], cache=cache)
+    cache.max_bytes = 4 * entry_size
+    Command.loads("DROP Picklist p4__c;", cache=cache)
+    assert cache.size is not None and cache.size <= cache.max_bytes
+    cached = {p.name for p in cache.directory.iterdir()}
+    assert cache.path(cache.key(sources[0])).name in cached
+    assert cache.path(cache.key(sources[1])).name not in cached
+
+
+def test_clear(cache):
+    Command.loads(SOURCE, cache=cache)
+    cache.clear()
+    assert list(cache.directory.iterdir()) == []
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_directory(workers, cache):
+    expected = list(load_directory(scrapped_mdl_dir, workers=1))
+    commands = sum(len(r.commands or []) for r in expected)
+    results = list(load_directory(scrapped_mdl_dir, workers=workers, cache=cache))
+    assert [r.commands for r in results] == [r.commands for r in expected]
+    # The scrapped files hold a few duplicates, hence not all are misses
+    assert cache.stats.hits + cache.stats.misses == commands
+    misses = cache.stats.misses
+    results = list(load_directory(scrapped_mdl_dir, workers=workers, cache=cache))
+    assert [r.commands for r in results] == [r.commands for r in expected]
+    assert (cache.stats.hits, cache.stats.misses) == (2 * commands - misses, misses)
+    assert all(r.cache_stats is not None and r.cache_stats.misses == 0 for r in results)
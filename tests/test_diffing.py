@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import random
+from copy import deepcopy
+
+import pytest
+from conftest import path_name, scrapped_mdl_files
+from synthetic import CommandGenerator
+
+import meddle
+from meddle import Attribute, Command, Component, diff, diffing
+
+
+def apply_attributes(
+    attributes: list[Attribute] | None, changes: list[Attribute] | None
+) -> list[Attribute]:
+    """How MDL applies the attributes `changes` of `ALTER` and `MODIFY` commands,
+    as assumed by `meddle.diff`.
+    """
+    attributes = deepcopy(attributes or [])
+    for change in changes or []:
+        current = next((a for a in attributes if a.name == change.name), None)
+        if current is None:
+            current = Attribute(change.name)
+            attributes.append(current)
+        values = [] if current.value is None else current.value
+        values = values if isinstance(values, list) else [values]
+        changed = change.value if isinstance(change.value, list) else [change.value]
+        match change.command:
+            case "ADD":
+                values = values + changed
+            case "DROP":
+                values = [v for v in values if v not in changed]
+            case None:
+                current.value = change.value
+                continue
+        current.value = values[0] if len(values) == 1 else values
+    return attributes
+
+
+def apply(old: Command, alter: Command) -> Command:
+    """`old` once `alter` is applied to it."""
+    new = deepcopy(old)
+    new.attributes = apply_attributes(old.attributes, alter.attributes)
+    components = {
+        (c.component_type_name, c.component_name): c for c in new.components or []
+    }
+    for command in alter.commands or []:
+        key = (command.component_type_name, command.component_name)
+        match command.command:
+            case "ADD":
+                components[key] = Component(*key, deepcopy(command.attributes))
+            case "DROP":
+                del components[key]
+            case "RENAME":
+                component = components.pop(key)
+                component.component_name = command.to_component_name
+                components[(key[0], command.to_component_name)] = component
+            case "MODIFY":
+                component = components[key]
+                component.attributes = apply_attributes(
+                    component.attributes, command.attributes
+                )
+    new.components = list(components.values()) or None
+    return new
+
+
+def normalized(command: Command) -> tuple:
+    """`command` regardless of the order of attributes and components, and of
+    emptied attributes.
+    """
+
+    def attributes(attributes: list[Attribute] | None) -> list:
+        return sorted(
+            (a.name, repr(a.value)) for a in attributes or [] if a.value is not None
+        )
+
+    return (
+        attributes(command.attributes),
+        sorted(
+            (c.component_type_name, c.component_name, attributes(c.attributes))
+            for c in command.components or []
+        ),
+    )
+
+
+def check(old: Command, new: Command, **kwargs) -> Command:
+    alter = diff(old, new, **kwargs)
+    assert alter.command == "ALTER"
+    assert normalized(apply(old, alter)) == normalized(new)
+    for engine in ["tree", "inline", "fast"]:
+        assert Command.loads(alter.dumps(), engine) == alter
+    return alter
+
+
+old_source = """RECREATE Picklist vmdl_options__c (
+    label('vMDL Options'),
+    active(true),
+    tags('a', 'b', 'c'),
+    order('x', 'y'),
+    help_content('Going away'),
+    Picklistentry hello_world__c (value('hello world'), order(0)),
+    Picklistentry goodbye__c (value('goodbye'), order(1)),
+    Picklistentry old_name__c (value('renamed'), order(2)),
+    Picklistentry unchanged__c (value('same'), order(3))
+);"""
+new_source = """RECREATE Picklist vmdl_options__c (
+    label('vMDL Options'),
+    active(false),
+    tags('a', 'c', 'd'),
+    order('y', 'x'),
+    description('New'),
+    Picklistentry unchanged__c (value('same'), order(3)),
+    Picklistentry hello_world__c (value('Hello World.'), order(0)),
+    Picklistentry new_name__c (value('renamed'), order(2)),
+    Picklistentry hello_worldv2__c (value('ENTER ANY VALUE'), order(4))
+);"""
+
+
+def test_diff():
+    old, new = Command.loads(old_source), Command.loads(new_source)
+    assert check(old, new) == Command.loads(
+        """ALTER Picklist vmdl_options__c (
+        active(false),
+        tags DROP ('b'),
+        tags ADD ('d'),
+        order('y', 'x'),
+        description('New'),
+        help_content(),
+        MODIFY Picklistentry hello_world__c (value('Hello World.'));
+        DROP Picklistentry goodbye__c;
+        RENAME Picklistentry old_name__c TO new_name__c;
+        ADD Picklistentry hello_worldv2__c (value('ENTER ANY VALUE'), order(4));
+    );"""
+    )
+    commands = check(old, new, detect_renames=False).commands
+    assert commands is not None
+    assert [c.command for c in commands] == ["MODIFY", "DROP", "DROP", "ADD", "ADD"]
+    unchanged = diff(new, new)
+    assert unchanged == Command("ALTER", "Picklist", "vmdl_options__c")
+    for engine in ["tree", "inline", "fast"]:
+        assert Command.loads(unchanged.dumps(), engine) == unchanged
+
+
+@pytest.mark.parametrize(
+    "old_values,new_values,expected",
+    [
+        ("order(1)", "order(true)", "order(true)"),
+        ("order(1)", "order(1.0)", "order(1.0)"),
+        ("order(true)", "order(1)", "order(1)"),
+        ("tags('a', 1)", "tags('a', true)", "tags DROP (1), tags ADD (true)"),
+        ("tags(1, 'a')", "tags(1.0, 'a')", "tags(1.0, 'a')"),
+    ],
+)
+def test_diff_value_types(old_values, new_values, expected):
+    """Values which are equal in Python, but of different types, in MDL"""
+    old = Command.loads(f"RECREATE Picklist p__c ({old_values});")
+    new = Command.loads(f"RECREATE Picklist p__c ({new_values});")
+    expected = Command.loads(f"ALTER Picklist p__c ({expected});")
+    # Rather than `Command`s, since `1 == True == 1.0`
+    assert check(old, new).dumps() == expected.dumps()
+
+
+def test_diff_does_not_share_values():
+    old, new = Command.loads(old_source), Command.loads(new_source)
+    alter = diff(old, new)
+    assert alter.commands is not None
+    alter.commands[-1].attributes[0].value = "changed"  # type: ignore[index]
+    assert new == Command.loads(new_source)
+
+
+@pytest.mark.parametrize(
+    "path", sorted(scrapped_mdl_files, key=path_name), ids=path_name
+)
+def test_diff_scrapped(path):
+    old = Command.loads(path.read_text())
+    if old.command not in {"CREATE", "RECREATE"}:
+        pytest.skip(f"{path_name(path)} is not a snapshot")
+    assert diff(old, deepcopy(old)) == Command(
+        "ALTER", old.component_type_name, old.component_name
+    )
+    new = deepcopy(old)
+    new.components = [
+        *(new.components or [])[1:],
+        Component("Field", "added__c", [Attribute("label", "Added")]),
+    ]
+    new.attributes = [*(new.attributes or [])[:-1], Attribute("diffed", "Changed")]
+    check(old, new)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_diff_synthetic(seed):
+    """Diffing synthetic snapshots against randomly edited copies of themselves"""
+    generator = CommandGenerator(seed=seed)
+    rng = random.Random(seed)
+    old = generator.command()
+    new = deepcopy(old)
+    components = []
+    for c in new.components or []:
+        match rng.choice(["keep", "drop", "rename", "modify"]):
+            case "keep":
+                components.append(c)
+            case "rename":
+                c.component_name = generator.name("renamed")
+                components.append(c)
+            case "modify" if c.attributes:
+                c.attributes[0].value = generator.word(8)
+                components.append(c)
+    components.extend(generator.command(old.component_type_name).components or [])
+    new.components = components or None
+    new.attributes = (new.attributes or [])[1:]
+    check(old, new)
+
+
+def test_diff_errors():
+    old = Command.loads(old_source)
+    with pytest.raises(ValueError, match="'CREATE' and 'RECREATE'"):
+        diff(old, Command("DROP", "Picklist", "vmdl_options__c"))
+    with pytest.raises(ValueError, match="another one"):
+        diff(old, Command("RECREATE", "Picklist", "other__c"))
+
+
+def test_diff_does_not_shadow_its_module():
+    assert meddle.diff is diffing.diff
+    assert callable(meddle.diff)
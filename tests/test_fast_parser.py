@@ -0,0 +1,107 @@
+import pytest
+from conftest import here, path_name, scrapped_mdl_files
+from lark.exceptions import UnexpectedInput, VisitError
+
+from meddle import Command
+from meddle.fast_parser import STARTS, FastParserError
+from meddle.parser import Unreachable, parse_and_transform
+
+mdl_example_files = sorted((here / "mdl_examples").glob("*.mdl"), key=path_name)
+
+
+def outcome(start, source, engine):
+    """What parsing `source` from `start` with `engine` results in: either the
+    parsed object, or the fact that it failed, be it to parse it or to build the
+    object (see `meddle.loading.LOAD_ERRORS`).
+    """
+    try:
+        return parse_and_transform(start, source, engine)
+    except (UnexpectedInput, VisitError, Unreachable):
+        return "error"
+
+
+@pytest.mark.parametrize("path", scrapped_mdl_files, ids=path_name)
+def test_scrapped_files(path):
+    source = path.read_text()
+    assert Command.loads(source, engine="fast") == Command.loads(source)
+
+
+@pytest.mark.parametrize("path", mdl_example_files, ids=path_name)
+@pytest.mark.parametrize("start", sorted(STARTS))
+def test_mdl_examples(path, start):
+    source = path.read_text()
+    assert outcome(start, source, "fast") == outcome(start, source, "tree")
+
+
+@pytest.mark.parametrize(
+    "start,source",
+    [
+        ("attribute_value", "'  leading whitespace is ignored, trailing is not '"),
+        ("attribute_value", "{  <a>leading whitespace is ignored</a> }"),
+        ("attribute_value", "'It''s'"),
+        ("attribute_value", "''"),
+        ("attribute_value", "'''a'"),
+        ("attribute_value", "'   '"),
+        ("attribute_value", "'a', ''"),
+        ("attribute_value", "'multi\nline'"),
+        ("attribute_value", "1."),
+        ("attribute_value", ".5"),
+        ("attribute_value", "1.5, 2, 3"),
+        ("attribute_value", ", 'a'"),
+        ("attribute_value", "true, false"),
+        ("attribute_value", "tru"),
+        ("attribute_value", ""),
+        ("attribute", "a('too short a name')"),
+        ("attribute", "label ('spaced')"),
+        ("alter_attribute", "label ADD ('a')"),
+        ("alter_attribute", "label DROP('a')"),
+        ("alter_attribute", "labelADD('a')"),
+        ("attributes", "label('a'),"),
+        ("attributes", "label('a'),,"),
+        ("component", "Picklistentry one__c ()"),
+        ("component", "Picklistentry one__c (value('a'),)"),
+        (
+            "components",
+            "Picklistentry one__c (value('a')) Picklistentry two__c (value('b'))",
+        ),
+        ("mdl_command", "RECREATE Picklist one__c ()"),
+        ("mdl_command", "RECREATE Picklist IF NOT EXISTS one__c (label('a'))"),
+        ("mdl_command", "RECREATE Picklist IF  EXISTS one__c (label('a'))"),
+        (
+            "mdl_command",
+            "RECREATE Picklist one__c (label('a') Picklistentry two__c (value('b')));",
+        ),
+        ("mdl_command", "RECREATE Picklist one__c (label('a'));;"),
+        ("mdl_command", "DROP Picklist one__c"),
+        ("mdl_command", "DROP Picklist IF EXISTS one__c"),
+        ("mdl_command", "RENAME Picklist one__c TO two__c;"),
+        (
+            "mdl_command",
+            "ALTER Picklist one__c (DROP Picklistentry two__c RENAME Picklistentry three__c TO four__c)",
+        ),
+        (
+            "mdl_command",
+            "ALTER Picklist one__c (DROP Picklistentry two__c;; ADD Picklistentry three__c (value('a')))",
+        ),
+        (
+            "mdl_command",
+            "ALTER Picklist one__c (ALTER Picklistentry two__c (value('a')))",
+        ),
+        ("mdl_command", "MODIFY Picklist one__c (label('a'))"),
+        ("mdl_command", "DROP Picklist one__c; DROP Picklist two__c"),
+    ],
+)
+def test_edge_cases(start, source):
+    assert outcome(start, source, "fast") == outcome(start, source, "tree")
+
+
+def test_unsupported_start():
+    with pytest.raises(ValueError):
+        parse_and_transform("component_name", "one__c", "fast")
+
+
+def test_syntax_error():
+    with pytest.raises(UnexpectedInput) as exception_info:
+        Command.loads("RECREATE Picklist one__c (\n    label('a'),\n    1\n)", "fast")
+    assert isinstance(exception_info.value, FastParserError)
+    assert (exception_info.value.line, exception_info.value.column) == (3, 5)
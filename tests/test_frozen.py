@@ -0,0 +1,96 @@
+import pickle
+import subprocess
+import sys
+from dataclasses import FrozenInstanceError
+
+import pytest
+from conftest import path_name, scrapped_mdl_files
+from synthetic import CommandGenerator
+
+from meddle import Attribute, Command, Component, LazyCommand
+from meddle.frozen import (
+    FrozenAttribute,
+    FrozenCommand,
+    FrozenComponent,
+    FrozenNode,
+    freeze,
+    thaw,
+)
+
+
+@pytest.mark.parametrize(
+    "path", sorted(scrapped_mdl_files, key=path_name), ids=path_name
+)
+def test_freeze_and_thaw(path):
+    source = path.read_text()
+    command = Command.loads(source)
+    frozen = freeze(command)
+    assert isinstance(frozen, FrozenCommand)
+    assert thaw(frozen) == command
+    assert thaw(frozen).dumps() == command.dumps()
+    assert frozen == freeze(Command.loads(source))
+    assert hash(frozen) == hash(freeze(Command.loads(source)))
+    assert freeze(LazyCommand.loads(source)) == frozen
+
+
+def test_frozen_nodes():
+    attribute = freeze(Attribute("a", ["x", "y"]))
+    assert attribute == FrozenAttribute("a", ("x", "y"))
+    assert attribute != FrozenAttribute("a", ("y", "x"))
+    assert thaw(attribute).value == ["x", "y"]
+    component = freeze(Component("Field", "f__c", [Attribute("a", 1)]))
+    assert component == FrozenComponent("Field", "f__c", (FrozenAttribute("a", 1),))
+    assert component != FrozenComponent("Field", "g__c", (FrozenAttribute("a", 1),))
+    # Same fields, different node types
+    assert FrozenAttribute("a") != FrozenComponent("a", "a")
+    with pytest.raises(FrozenInstanceError):
+        attribute.name = "b"  # type: ignore[misc]
+    with pytest.raises(TypeError):
+        freeze("a(1)")  # type: ignore[call-overload]
+    with pytest.raises(TypeError):
+        thaw(Attribute("a", 1))  # type: ignore[call-overload]
+
+
+def test_frozen_value_types():
+    """Values which are equal in Python, but of different types, in MDL"""
+    values = [1, True, 1.0]
+    attributes = {freeze(Attribute("a", v)) for v in values}
+    assert len(attributes) == 3
+    assert len({freeze(Attribute("a", [v, "x"])) for v in values}) == 3
+    assert {type(thaw(a).value) for a in attributes} == {int, bool, float}
+    components = {
+        freeze(Component("Field", "f__c", [Attribute("a", v)])) for v in values
+    }
+    assert len(components) == 3
+
+
+def test_frozen_node_fields_are_abstract():
+    with pytest.raises(TypeError, match="abstract"):
+        FrozenNode()  # type: ignore[abstract]
+
+
+def test_deduplication():
+    commands = CommandGenerator(seed=0).commands(20)
+    copies = [Command.loads(c.dumps()) for c in commands]
+    frozen = {freeze(c) for c in commands + copies}
+    assert len(frozen) == len(commands)
+    assert all(freeze(c) in frozen for c in copies)
+    changed = copies[0]
+    changed.attributes = [*(changed.attributes or []), Attribute("label", "changed")]
+    assert freeze(changed) not in frozen
+
+
+def test_pickling_rehashes():
+    """Hashes of strings differ across processes, so those cached by frozen nodes
+    do not survive pickling.
+    """
+    frozen = freeze(CommandGenerator(seed=0).command())
+    pickled = pickle.dumps(frozen)
+    assert pickle.loads(pickled) == frozen
+    script = (
+        "import pickle, sys\n"
+        "frozen = pickle.loads(sys.stdin.buffer.read())\n"
+        "assert hash(frozen) == hash(pickle.loads(pickle.dumps(frozen)))\n"
+        "assert frozen in {pickle.loads(pickle.dumps(frozen))}\n"
+    )
+    subprocess.run([sys.executable, "-c", script], input=pickled, check=True)
@@ -0,0 +1,91 @@
+import subprocess
+import sys
+
+import pytest
+from conftest import scrapped_mdl_dir, scrapped_mdl_files
+
+from meddle import load_directory, load_file, loading
+from meddle.loading import LoadResult
+
+
+@pytest.fixture
+def expected_results():
+    return [
+        LoadResult(p, commands=list(load_file(p))) for p in sorted(scrapped_mdl_files)
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_directory(workers, expected_results):
+    assert list(load_directory(scrapped_mdl_dir, workers=workers)) == expected_results
+
+
+def test_load_directory_unordered(expected_results):
+    results = list(load_directory(scrapped_mdl_dir, workers=2, ordered=False))
+    assert sorted(results, key=lambda r: r.path) == expected_results
+
+
+@pytest.mark.parametrize("engine", ["inline", "fast"])
+def test_load_directory_engine(engine, expected_results):
+    results = load_directory(scrapped_mdl_dir, workers=2, engine=engine)
+    assert list(results) == expected_results
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_directory_errors(workers, tmp_path):
+    (tmp_path / "good.mdl").write_text("DROP Picklist one__c;")
+    (tmp_path / "bad.mdl").write_text("DROP Picklist One__c;")
+    (tmp_path / "ignored.txt").write_text("DROP Picklist One__c;")
+    bad, good = load_directory(tmp_path, workers=workers)
+    assert bad.path.name == "bad.mdl"
+    assert bad.commands is None
+    assert bad.error is not None and bad.error.startswith("Unexpected")
+    assert good.path.name == "good.mdl"
+    assert good.error is None
+    assert good.commands is not None and len(good.commands) == 1
+
+
+def test_load_directory_unreadable_files(tmp_path):
+    (tmp_path / "directory.mdl").mkdir()
+    (tmp_path / "latin1.mdl").write_bytes("DROP Picklist ñ__c;".encode("latin-1"))
+    directory, latin1 = load_directory(tmp_path, workers=1)
+    assert directory.error is not None and directory.error.startswith(
+        "IsADirectoryError"
+    )
+    assert latin1.error is not None and latin1.error.startswith("UnicodeDecodeError")
+
+
+@pytest.mark.parametrize("engine", ["tree", "inline", "fast"])
+def test_load_directory_invalid_commands(engine, tmp_path):
+    """Commands which parse, but cannot be built, are reported too"""
+    (tmp_path / "empty.mdl").write_text("RECREATE Picklist one__c ();")
+    (empty,) = load_directory(tmp_path, workers=1, engine=engine)
+    assert empty.commands is None and empty.error is not None
+
+
+def test_load_directory_raises_bugs(tmp_path, monkeypatch):
+    """Errors which have nothing to do with the files are raised, not reported"""
+    (tmp_path / "good.mdl").write_text("DROP Picklist one__c;")
+
+    def load_file(*args, **kwargs):
+        raise RuntimeError("A bug")
+
+    monkeypatch.setattr(loading, "load_file", load_file)
+    with pytest.raises(RuntimeError, match="A bug"):
+        list(load_directory(tmp_path, workers=1))
+
+
+def test_load_directory_early_exit():
+    results = load_directory(scrapped_mdl_dir, workers=2, chunk_size=1)
+    assert next(results).error is None
+    results.close()
+
+
+def test_multiprocessing_is_not_imported_on_import():
+    code = (
+        "import sys\n"
+        "import meddle\n"
+        "assert 'multiprocessing' not in sys.modules\n"
+        "assert 'concurrent.futures.process' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,127 @@
+"""
+Memory benchmarks of loading, validating and dumping the scrapped and synthetic
+corpora. Peak and retained memory are measured with `tracemalloc`, and retained
+memory per node (i.e. per `Attribute`, `Component` and `Command`) is checked
+against the baselines in `memory_baselines.json`, which are per Python version
+since object sizes differ across them. Run with `MEDDLE_UPDATE_MEMORY_BASELINES=1`
+to rewrite the baselines, e.g. after making nodes smaller.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from conftest import error_on_validation_mdl_files, path_name, scrapped_mdl_files
+from synthetic import CommandGenerator, CorpusShape
+
+from meddle import Command
+
+here = Path(__file__).parent
+BASELINES_PATH = here / "memory_baselines.json"
+PYTHON_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+UPDATE_BASELINES = os.environ.get("MEDDLE_UPDATE_MEMORY_BASELINES") == "1"
+# How much retained memory per node can grow over its baseline before failing,
+# relative to it and in bytes, the latter for measurements close to zero
+TOLERANCE = 0.05
+SLACK = 1.0
+
+
+def load_baselines() -> dict:
+    if not BASELINES_PATH.exists():
+        return {}
+    return json.loads(BASELINES_PATH.read_text())
+
+
+def count_nodes(command: Command) -> int:
+    """The number of `Attribute`s, `Component`s and `Command`s in `command`."""
+    return (
+        1
+        + len(command.attributes or [])
+        + sum(1 + len(c.attributes or []) for c in command.components or [])
+        + sum(count_nodes(c) for c in command.commands or [])
+    )
+
+
+def measure(f, *args) -> tuple[object, int, int]:
+    """The result of `f(*args)`, along with the peak memory allocated while
+    running it and the memory still allocated afterwards, i.e. retained by the
+    result or leaked, both in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = f(*args)
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak - before, after - before
+
+
+def scrapped_sources() -> list[str]:
+    return [p.read_text() for p in sorted(scrapped_mdl_files, key=path_name)]
+
+
+def synthetic_sources() -> list[str]:
+    generator = CommandGenerator(seed=0, shape=CorpusShape(fan_out=250))
+    return [generator.command("Object").dumps()]
+
+
+corpora = {"scrapped": scrapped_sources, "synthetic": synthetic_sources}
+
+
+@pytest.fixture(scope="module")
+def baselines():
+    """The baselines of the running Python version, written back at the end of the
+    module when updating them.
+    """
+    all_baselines = load_baselines()
+    current = all_baselines.setdefault(PYTHON_VERSION, {})
+    yield current
+    if UPDATE_BASELINES:
+        BASELINES_PATH.write_text(
+            json.dumps(all_baselines, indent=4, sort_keys=True) + "\n"
+        )
+
+
+@pytest.mark.parametrize("operation", ["loads", "validate", "dumps"])
+@pytest.mark.parametrize("corpus", sorted(corpora))
+def test_memory(corpus, operation, baselines):
+    sources = corpora[corpus]()
+    commands = [Command.loads(s) for s in sources]
+    invalid = {p.read_text() for p in error_on_validation_mdl_files}
+    valid = [c for c, s in zip(commands, sources) if s not in invalid]
+    operations = {
+        "loads": lambda: [Command.loads(s) for s in sources],
+        "validate": lambda: all(c.validate() for c in valid),
+        "dumps": lambda: [c.dumps() for c in commands],
+    }
+    # Warm up parsers, schemas and whatever else is cached process-wide, which
+    # would otherwise count as retained
+    operations[operation]()
+    _, peak, retained = measure(operations[operation])
+    nodes = sum(count_nodes(c) for c in commands)
+    measured = {
+        "nodes": nodes,
+        "peak_per_node": round(peak / nodes, 1),
+        "retained_per_node": round(retained / nodes, 1),
+    }
+    key = f"{corpus}-{operation}"
+    if UPDATE_BASELINES:
+        baselines[key] = measured
+        return
+    baseline = baselines.get(key)
+    if baseline is None:
+        pytest.skip(f"No memory baseline for {key} on Python {PYTHON_VERSION}")
+    limit = baseline["retained_per_node"] * (1 + TOLERANCE) + SLACK
+    assert measured["retained_per_node"] <= limit, (
+        f"Retained memory per node of {key} regressed from "
+        f"{baseline['retained_per_node']} to {measured['retained_per_node']} bytes"
+    )
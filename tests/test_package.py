@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from conftest import scrapped_mdl_dir
+
+from meddle import Command, load_directory
+from meddle.package import PackageIndex, Reference
+
+package_mdl = """
+RECREATE Objectlifecycle order_lifecycle__c (
+    label('Order lifecycle'),
+    starting_state('Objectlifecyclestate.draft__c'),
+    labeled_states('Objectlifecyclestate.shipped__c'),
+    Objectlifecyclestate draft__c (label('Draft'))
+);
+RECREATE Object order__c (
+    label('Order'),
+    available_lifecycles('Objectlifecycle.order_lifecycle__c'),
+    default_obj_type('Objecttype.base__v'),
+    user_role_setup_object('Object.customer__c')
+);
+RENAME Object client__c TO customer__c;
+DROP Object legacy_order__c;
+"""
+
+
+def test_unresolved_references():
+    index = PackageIndex.from_commands(
+        Command.load_many(package_mdl), source=Path("package.mdl")
+    )
+    assert "Objectlifecyclestate.draft__c" in index
+    assert "Object.customer__c" in index
+    assert "Object.client__c" not in index
+    assert "Object.legacy_order__c" not in index
+    assert index.unresolved() == [
+        Reference(
+            Path("package.mdl"),
+            ("Objectlifecycle.order_lifecycle__c",),
+            "labeled_states",
+            "Objectlifecyclestate.shipped__c",
+        ),
+        Reference(
+            Path("package.mdl"),
+            ("Object.order__c",),
+            "default_obj_type",
+            "Objecttype.base__v",
+        ),
+    ]
+    assert [r.value for r in index.unresolved(known={"Objecttype.base__v"})] == [
+        "Objectlifecyclestate.shipped__c"
+    ]
+
+
+def test_package_index_from_results():
+    package_dir = scrapped_mdl_dir / "vsdk-object-sample-components"
+    index = PackageIndex.from_results(load_directory(package_dir, workers=1))
+    assert index.references
+    for reference in index.unresolved():
+        assert reference.source is not None
+        assert reference.source.parent == package_dir
+        assert reference.value not in index
+    resolved = [r for r in index.references if r.value in index]
+    assert resolved
+    for reference in resolved:
+        source, path = index.definitions[reference.value]
+        assert source is not None and path[-1] == reference.value
+
+
+def test_package_index_skips_unknown_component_types():
+    index = PackageIndex.from_commands(
+        Command.load_many("RECREATE Nope one__c (label('One'));")
+    )
+    assert "Nope.one__c" in index
+    assert index.references == []
@@ -1,10 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from dataclasses import asdict
+from io import StringIO
+from itertools import product
 import json
+import pickle
+import subprocess
+import sys
 
-import pytest
+from lark.exceptions import UnexpectedInput
 import msgspec
+import pytest
 
-from meddle import Attribute, Component, Command
-from meddle.parser import parse_and_transform, ValidationError
+from meddle import Attribute, Component, Command, LazyCommand, load_file
+from meddle.artifacts import digest, dump_artifact
+from meddle.parser import (
+    PARSER_ARTIFACT_ENGINES,
+    PARSER_ARTIFACT_STARTS,
+    NodeList,
+    build_parser_artifact,
+    clear_parsers,
+    compile_parser,
+    deserialize_parser,
+    get_parser,
+    load_parser_artifact,
+    parse_and_transform,
+    split_commands,
+    ValidationError,
+)
+from meddle import validation
+from meddle.validation import (
+    ComponentTypeIndex,
+    Schema,
+    ValidationCache,
+    as_component_schema,
+    build_schema_artifact,
+    compile_attribute_type,
+    default_schema,
+    load_schema,
+    load_schema_artifact,
+    load_schema_version,
+    schema_delta,
+    schema_versions,
+)
 
 from conftest import path_name, scrapped_mdl_files, error_on_validation_mdl_files
 
@@ -12,7 +50,7 @@ from conftest import path_name, scrapped_mdl_files, error_on_validation_mdl_file
 @pytest.fixture
 def component_metadata(root_test_dir):
     return json.loads(
-        (root_test_dir.parent / "src" / "mdl" / "validation.json").read_text()
+        (root_test_dir.parent / "src" / "meddle" / "validation.json").read_text()
     )
 
 
@@ -269,6 +307,46 @@ def test_component(component_parser):
     )
 
 
+def test_dumps_components():
+    command = Command(
+        "RECREATE",
+        "Picklist",
+        "colors__c",
+        [Attribute("label", "Colors"), Attribute("active", True)],
+        [
+            Component(
+                "Picklistentry",
+                f"{color}__c",
+                [Attribute("value", color.title()), Attribute("order", i)],
+            )
+            for i, color in enumerate(["red", "green"])
+        ],
+    )
+    assert (
+        command.dumps()
+        == """RECREATE Picklist colors__c (
+    label('Colors'),
+    active(true),
+    Picklistentry red__c (
+        value('Red'),
+        order(0),
+    ),
+    Picklistentry green__c (
+        value('Green'),
+        order(1),
+    ),
+);"""
+    )
+    assert Command.loads(command.dumps()) == command
+    assert Component.loads(command.components[0].dumps()) == command.components[0]
+
+
+def test_dumps_empty_string():
+    command = Command.loads("RECREATE Picklist colors__c (label(''));")
+    assert command.dumps() == "RECREATE Picklist colors__c (\n    label(''),\n);"
+    assert Command.loads(command.dumps()) == command
+
+
 @pytest.mark.parametrize("s", ["IF EXISTS", "IF NOT EXISTS"])
 def test_logical_operator(s, logical_operator_parser):
     assert logical_operator_parser(s) == s
@@ -469,6 +547,432 @@ def test_error_on_validaton(path):
         Command.loads(path.read_text()).validate()
 
 
+@pytest.mark.parametrize(
+    "path", scrapped_mdl_files - error_on_validation_mdl_files, ids=path_name
+)
+def test_collecting_validation(path):
+    report = Command.loads(path.read_text()).validate(collect=True)
+    assert report and report.violations == []
+
+
+@pytest.mark.parametrize("path", error_on_validation_mdl_files, ids=path_name)
+def test_collecting_validation_errors(path):
+    command = Command.loads(path.read_text())
+    report = command.validate(collect=True)
+    assert not report
+    with pytest.raises(ValidationError) as error:
+        command.validate()
+    assert report.violations[0].message == str(error.value)
+
+
+def test_collecting_every_validation_error():
+    command = Command(
+        "RECREATE",
+        "Picklist",
+        "vmdml_options__c",
+        attributes=[Attribute("label", 1), Attribute("labell", "Options")],
+        components=[
+            Component(
+                "Picklistentry",
+                "one__c",
+                [Attribute("value", "One"), Attribute("order", "1")],
+            ),
+            Component("Picklistentri", "two__c", [Attribute("value", "Two")]),
+        ],
+    )
+    report = command.validate(collect=True)
+    assert [(v.path, v.attribute, v.rule, v.value) for v in report] == [
+        (("Picklist.vmdml_options__c",), "label", "type", 1),
+        (("Picklist.vmdml_options__c",), "labell", "attribute name", "Options"),
+        (("Picklist.vmdml_options__c",), "active", "required", None),
+        (
+            ("Picklist.vmdml_options__c", "Picklistentry.one__c"),
+            "order",
+            "type",
+            "1",
+        ),
+        (
+            ("Picklist.vmdml_options__c", "Picklistentry.one__c"),
+            "active",
+            "required",
+            None,
+        ),
+        (
+            ("Picklist.vmdml_options__c", "Picklistentri.two__c"),
+            None,
+            "component type",
+            "Picklistentri",
+        ),
+    ]
+    with pytest.raises(ValidationError, match=report.violations[0].message):
+        command.validate()
+
+
+def test_structural_key():
+    source = (
+        "RECREATE Picklist one__c (label('One'), "
+        "Picklistentry one__c (value('One'), order(0)));"
+    )
+    command = Command.loads(source)
+    assert command.structural_key() == Command.loads(source).structural_key()
+    assert command.structural_key() == LazyCommand.loads(source).structural_key()
+    assert hash(command.structural_key()) == hash(
+        Command.loads(source).structural_key()
+    )
+    other = Command.loads(source.replace("order(0)", "order(1)"))
+    assert command.structural_key() != other.structural_key()
+    assert (
+        Attribute("a", ["x", "y"]).structural_key()
+        != Attribute("a", ["y", "x"]).structural_key()
+    )
+    # Even though `1 == True == 1.0`
+    keys = {Attribute("a", v).structural_key() for v in [1, True, 1.0]}
+    assert len(keys) == 3
+    keys = {Attribute("a", [v, "x"]).structural_key() for v in [1, True, 1.0]}
+    assert len(keys) == 3
+
+
+@pytest.mark.parametrize("path", scrapped_mdl_files, ids=path_name)
+def test_validation_cache(path):
+    command = Command.loads(path.read_text())
+    cache = ValidationCache()
+    expected = command.validate(collect=True)
+    assert command.validate(collect=True, cache=cache) == expected
+    misses = cache.misses
+    assert command.validate(collect=True, cache=cache) == expected
+    assert cache.misses == misses and cache.hits > 0
+
+
+def test_validation_cache_paths():
+    cache = ValidationCache()
+    bad_entry = "Picklistentry bad__c (value('Bad'), order('1'), active(true))"
+    first = Command.loads(
+        f"RECREATE Picklist one__c (label('One'), active(true), {bad_entry});"
+    )
+    second = Command.loads(
+        f"RECREATE Picklist two__c (label('Two'), active(true), {bad_entry});"
+    )
+    assert [v.path for v in first.validate(collect=True, cache=cache)] == [
+        ("Picklist.one__c", "Picklistentry.bad__c")
+    ]
+    assert [v.path for v in second.validate(collect=True, cache=cache)] == [
+        ("Picklist.two__c", "Picklistentry.bad__c")
+    ]
+    assert cache.hits == 1
+    with pytest.raises(ValidationError, match="ought to be of type 'Number'"):
+        second.validate(cache=cache)
+
+
+def test_validation_cache_value_types():
+    """Values which are equal in Python, but of different types, in MDL"""
+    cache = ValidationCache()
+    for value in ["1", "true", "1.0", "1", "true"]:
+        command = Command.loads(
+            "RECREATE Picklist one__c (label('One'), active(true), "
+            f"Picklistentry a__c (value('A'), order({value}), active(true)));"
+        )
+        expected = command.validate(collect=True)
+        assert command.validate(collect=True, cache=cache) == expected
+    assert cache.hits > 0
+
+
+def test_validation_cache_is_bounded():
+    cache = ValidationCache(max_size=2)
+    for name in ["one__c", "two__c", "three__c"]:
+        command = Command.loads(
+            f"RECREATE Picklist {name} (label('One'), active(true));"
+        )
+        command.validate(cache=cache)
+    assert len(cache.entries) == 2
+    assert cache.misses == 3 and cache.hit_rate == 0.0
+
+
+def test_required_attributes():
+    schema = default_schema().component("Picklist")
+    assert schema is not None
+    assert schema.required == {"label", "active"}
+    assert schema.missing(["label"]) == ["active"]
+    assert compile_attribute_type("Type : Boolean\nRequired").required
+    assert not compile_attribute_type("Type : Boolean").required
+
+
+@pytest.mark.parametrize(
+    "source,missing",
+    [
+        ("CREATE Picklist one__c (label('One'));", [("Picklist.one__c", "active")]),
+        ("RECREATE Picklist one__c (active(true));", [("Picklist.one__c", "label")]),
+        (
+            (
+                "RECREATE Picklist one__c (label('One'), active(true), "
+                "Picklistentry a__c (value('A')));"
+            ),
+            [("Picklistentry.a__c", "active"), ("Picklistentry.a__c", "order")],
+        ),
+        ("ALTER Picklist one__c (label('One'));", []),
+        (
+            (
+                "ALTER Picklist one__c (MODIFY Picklistentry a__c (order(1)); "
+                "ADD Picklistentry b__c (value('B'), order(2)));"
+            ),
+            [("Picklistentry.b__c", "active")],
+        ),
+        ("DROP Picklist one__c;", []),
+    ],
+)
+def test_missing_required_attributes(source, missing):
+    report = Command.loads(source).validate(collect=True)
+    assert [(v.path[-1], v.attribute) for v in report] == missing
+    assert all(v.rule == "required" and v.value is None for v in report)
+
+
+def test_compile_attribute_type_is_cached():
+    type_data = "Type : String\nMaximum length : 60"
+    assert compile_attribute_type(type_data) is compile_attribute_type(type_data)
+
+
+@pytest.mark.parametrize(
+    "type_data,kind",
+    [
+        ("Type : Boolean", "plain"),
+        ("Type : String\nAllows multiple values", "plain"),
+        ("Type : String\nMaximum length : 60", "constrained"),
+        ("Type : Enum\nAllowed values : a|b", "enum"),
+        ("Type : Object", "reference"),
+        ("Type : Picklist\nAllows multiple values", "reference"),
+        ("Type : ComponentReference", "generic reference"),
+        ("Type : SdkCode", "impossible"),
+    ],
+)
+def test_compile_attribute_type(type_data, kind):
+    assert compile_attribute_type(type_data).kind == kind
+
+
+def test_compiled_attribute_type_values():
+    attribute_type = compile_attribute_type(
+        "Type : Enum\nAllows multiple values\nAllowed values : a|b|"
+    )
+    assert attribute_type.allowed_values == frozenset({"a", "b"})
+    assert attribute_type.multi_value
+    attribute_type = compile_attribute_type("Type : Number\nMinimum value : 1")
+    assert attribute_type.python_type is int
+    assert [(k, b) for k, b, _ in attribute_type.constraints] == [("minimum value", 1)]
+    with pytest.raises(
+        ValidationError,
+        match="Attribute 'order' is constrained to minimum value 1. Got 0.",
+    ):
+        attribute_type.check("order", 0)
+
+
+def test_schema_is_compiled_lazily(component_metadata):
+    schema = Schema(component_metadata)
+    command = Command.loads(
+        "RECREATE Picklist one__c (label('One'), active(true), "
+        "Picklistentry one__c (value('One'), order(0), active(true)));"
+    )
+    assert command.validate(schema)
+    assert list(schema.components) == ["Picklist"]
+    assert list(schema.components["Picklist"].subcomponents) == ["Picklistentry"]
+
+
+def test_component_metadata_is_compiled_once(component_metadata, monkeypatch):
+    metadata = component_metadata["Picklist"]
+    schema = as_component_schema(metadata)
+    assert as_component_schema(metadata) is schema
+    assert as_component_schema(schema) is schema
+    assert as_component_schema(dict(metadata)) is not schema
+    compiled = []
+    monkeypatch.setattr(
+        validation.ComponentSchema, "__init__", lambda *args: compiled.append(args)
+    )
+    for _ in range(3):
+        assert Attribute("label", "One").validate(metadata, "Picklist")
+    assert compiled == []
+
+
+def test_schema_artifact_is_up_to_date(component_metadata):
+    # Run `scripts/build_artifacts.py` if this fails
+    schema = load_schema_artifact()
+    assert schema is not None
+    assert dict(schema.metadata) == component_metadata
+    assert schema.index == ComponentTypeIndex.from_metadata(component_metadata)
+
+
+def test_stale_schema_artifact_is_ignored(tmp_path):
+    path = tmp_path / "validation.pickle"
+    build_schema_artifact(path)
+    assert load_schema_artifact(path) is not None
+    dump_artifact(path, digest("some other validation.json"), ({}, None))
+    assert load_schema_artifact(path) is None
+    assert load_schema_artifact(tmp_path / "missing.pickle") is None
+
+
+def test_schema_artifact_of_other_format_is_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "validation.pickle"
+    build_schema_artifact(path)
+    monkeypatch.setattr(validation, "SCHEMA_ARTIFACT_FORMAT", "some other format")
+    assert load_schema_artifact(path) is None
+
+
+def test_schema_artifact_is_deserialized_lazily():
+    schema = load_schema_artifact()
+    assert schema is not None
+    command = Command.loads("RECREATE Picklist one__c (label('One'), active(true));")
+    assert command.validate(schema)
+    assert list(schema.metadata.loaded) == ["Picklist"]
+
+
+def test_validation_json_is_not_loaded_on_import():
+    code = (
+        "from meddle import Command\n"
+        "from meddle.validation import default_schema, load_component_type_metadata\n"
+        "Command.loads('DROP Picklist one__c;').dumps()\n"
+        "assert default_schema.cache_info().currsize == 0\n"
+        "assert load_component_type_metadata.cache_info().currsize == 0\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_component_type_metadata(component_metadata):
+    assert validation.component_type_metadata == component_metadata
+    with pytest.raises(AttributeError):
+        _ = validation.nope
+
+
+@pytest.fixture
+def schemas_dir(tmp_path, component_metadata, monkeypatch):
+    """Two schema versions: `v2`, based on `validation.json`, with a shorter
+    `Picklist` label, `Accountmessage` removed and `Newcomponent` added, which the
+    new `Picklist` attribute `newcomponent` references, and `v3`, based on `v2`,
+    with a changed `Object` description.
+    """
+    v2 = json.loads(json.dumps(component_metadata))
+    picklist_label = v2["Picklist"]["attributes"]["label"]
+    picklist_label["type_data"] = "Type : String\nMaximum length : 10"
+    del v2["Accountmessage"]
+    v2["Newcomponent"] = {"attributes": {}, "subcomponents": {}}
+    v2["Picklist"]["attributes"]["newcomponent"] = {
+        "type_data": "Type : Newcomponent",
+        "description": "Added.",
+    }
+    v3 = json.loads(json.dumps(v2))
+    v3["Object"]["attributes"]["label"]["description"] = "Changed."
+    for version, base, metadata, base_metadata in [
+        ("v2", "default", v2, component_metadata),
+        ("v3", "v2", v3, v2),
+    ]:
+        changes = schema_delta(base_metadata, metadata)
+        (tmp_path / f"{version}.json").write_text(
+            json.dumps({"base": base, "components": changes})
+        )
+    monkeypatch.setattr(validation, "SCHEMAS_DIR", tmp_path)
+    load_schema_version.cache_clear()
+    yield tmp_path
+    load_schema_version.cache_clear()
+
+
+def test_schema_versions(schemas_dir, component_metadata):
+    assert schema_versions() == ["default", "v2", "v3"]
+    v2 = load_schema("v2")
+    assert v2.version == "v2" and v2.base is default_schema()
+    assert v2.component("Accountmessage") is None
+    assert v2.component("Newcomponent") is not None
+    assert set(v2.metadata) == set(component_metadata) - {"Accountmessage"} | {
+        "Newcomponent"
+    }
+    assert len(v2.metadata) == len(component_metadata)
+    v3_object = load_schema("v3").metadata["Object"]
+    assert v3_object["attributes"]["label"]["description"] == "Changed."
+    with pytest.raises(ValueError, match="Options are: 'default', 'v2', 'v3'"):
+        load_schema("v4")
+
+
+def test_validating_against_schema_versions(schemas_dir):
+    command = Command.loads(
+        "RECREATE Picklist one__c (label('Longer than ten'), active(true));"
+    )
+    assert command.validate()
+    assert command.validate(schema="default")
+    with pytest.raises(ValidationError, match="maximum length 10"):
+        command.validate(schema="v3")
+    with pytest.raises(ValueError):
+        command.validate(default_schema(), schema="v2")
+
+
+def test_references_to_schema_version_components(schemas_dir):
+    """References to component types which only some versions have"""
+    default, v2 = default_schema(), load_schema("v2")
+    assert v2.component("Picklist").attributes["newcomponent"].kind == "reference"
+    command = Command.loads(
+        "RECREATE Picklist one__c (label('One'), active(true), "
+        "newcomponent('Newcomponent.one__c'));"
+    )
+    assert command.validate(schema="v2")
+    assert command.validate(schema="v3")
+    command.attributes[-1].value = "Other.one__c"  # type: ignore[index]
+    with pytest.raises(ValidationError, match="'Newcomponent'"):
+        command.validate(schema="v2")
+    # And the other way around, for component types only in `validation.json`
+    type_data = "Type : Accountmessage"
+    assert compile_attribute_type(type_data, default.index).kind == "reference"
+    assert compile_attribute_type(type_data, v2.index).kind == "impossible"
+
+
+def test_schema_versions_share_storage(schemas_dir):
+    default, v2, v3 = default_schema(), load_schema("v2"), load_schema("v3")
+    # Unchanged component types, compiled once
+    assert v3.component("Picklist") is v2.component("Picklist")
+    assert v3.component("Doctype") is v2.component("Doctype")
+    assert v2.component("Doctype") is default.component("Doctype")
+    # Changed component types, sharing what did not change
+    assert v2.metadata["Picklist"] is not default.metadata["Picklist"]
+    assert (
+        v2.metadata["Picklist"]["subcomponents"]
+        is default.metadata["Picklist"]["subcomponents"]
+    )
+    assert (
+        v2.metadata["Picklist"]["attributes"]["active"]
+        is default.metadata["Picklist"]["attributes"]["active"]
+    )
+    assert (
+        v2.component("Picklist").attributes["active"]
+        is default.component("Picklist").attributes["active"]
+    )
+
+
+def test_component_type_index():
+    index = default_schema().index
+    assert "Picklist" in index.component_types
+    assert "Picklistentry" in index.subcomponent_types
+    assert index.parents["Picklistentry"] == ("Picklist",)
+    assert "Picklist" in index and "Picklistentry" in index
+    assert "String" not in index
+
+
+def test_component_type_index_nested():
+    index = ComponentTypeIndex.from_metadata(
+        {
+            "A": {"attributes": {}, "subcomponents": {"B": {"subcomponents": {}}}},
+            "C": {
+                "attributes": {},
+                "subcomponents": {"B": {"subcomponents": {"D": {"subcomponents": {}}}}},
+            },
+        }
+    )
+    assert index.component_types == {"A", "C"}
+    assert index.subcomponent_types == {"B", "D"}
+    assert index.parents == {"B": ("A", "C"), "D": ("B",)}
+
+
+@pytest.mark.parametrize("path", error_on_validation_mdl_files, ids=path_name)
+def test_validation_with_raw_metadata(path, component_metadata):
+    command = Command.loads(path.read_text())
+    with pytest.raises(ValidationError) as raw_error:
+        command.validate(component_metadata)
+    with pytest.raises(ValidationError) as compiled_error:
+        command.validate()
+    assert str(raw_error.value) == str(compiled_error.value)
+
+
 @pytest.mark.parametrize(
     "value,attribute",
     [
@@ -659,3 +1163,302 @@ def test_Command___contains__(value, component):
 )
 def test_Command___contains___negative(value, component):
     assert value not in component
+
+
+alter_mdl = """ALTER Picklist colors__c (
+    label('Colors'),
+    active(true),
+    Picklistentry red__c (value('Red'), order(0)),
+    Picklistentry green__c (value('Green'), order(1)),
+    MODIFY Picklistentry blue__c (value('Blue'));
+    DROP Picklistentry black__c;
+    ADD Picklistentry white__c (value('White'));
+    DROP Picklist grey__c;
+);"""
+
+
+@pytest.mark.parametrize("engine", ["tree", "inline", "fast"])
+def test_name_indexed_access(engine):
+    command = Command.loads(alter_mdl, engine)
+    assert isinstance(command.attributes, NodeList)
+    assert command.attribute("label") == Attribute("label", "Colors")
+    assert command.attribute("nope") is None
+    green = command.component("Picklistentry", "green__c")
+    assert green is command.components[1]
+    assert green.attribute("order") == Attribute("order", 1)
+    assert command.component("Picklistentry", "blue__c") is None
+    assert [c.component_name for c in command.subcommands_by_type("Picklistentry")] == [
+        "blue__c",
+        "black__c",
+        "white__c",
+    ]
+    assert command.subcommands_by_type("Object") == []
+    assert Command("DROP", "Picklist", "grey__c") in command
+    assert Command("DROP", "Picklist", "white__c") not in command
+
+
+def test_name_indexes_follow_mutations():
+    command = Command.loads(alter_mdl)
+    assert command.attribute("active") == Attribute("active", True)
+    command.attributes[1] = Attribute("active", False)
+    assert command.attribute("active") == Attribute("active", False)
+    command.attributes.append(Attribute("description", "Colors"))
+    assert Attribute("description", "Colors") in command
+    del command.attributes[-1]
+    assert Attribute("description", "Colors") not in command
+    command.components += [Component("Picklistentry", "blue__c", [])]
+    assert command.component("Picklistentry", "blue__c") is command.components[-1]
+    command.components.clear()
+    assert command.component("Picklistentry", "red__c") is None
+    # Lists assigned by hand are looked up all the same
+    command.attributes = [Attribute("label", "Hues")]
+    assert command.attribute("label") == Attribute("label", "Hues")
+    command.attributes.append(Attribute("active", True))
+    assert command.attribute("active") == Attribute("active", True)
+
+
+def test_contains_nodes_renamed_in_place():
+    command = Command.loads(alter_mdl)
+    assert Attribute("label", "Colors") in command
+    command.attributes[0].name = "name"
+    assert Attribute("name", "Colors") in command
+    assert Attribute("label", "Colors") not in command
+    assert Attribute("value", "Red") in command.components[0]
+    command.components[0].attributes[0].name = "label"
+    assert Attribute("label", "Red") in command.components[0]
+    assert command.components[0] in command
+    command.components[0].component_name = "pink__c"
+    assert Component("Picklistentry", "pink__c", command.components[0].attributes) in (
+        command
+    )
+    assert Command("DROP", "Picklist", "grey__c") in command
+    command.commands[-1].component_type_name = "Picklistentry"
+    assert Command("DROP", "Picklistentry", "grey__c") in command
+
+
+def test_node_list_copies():
+    command = Command.loads(alter_mdl)
+    command.attribute("label")
+    for copied in [deepcopy(command), pickle.loads(pickle.dumps(command))]:
+        assert copied == command
+        assert isinstance(copied.attributes, NodeList)
+        assert copied.attribute("label") is copied.attributes[0]
+
+
+def test_get_parser_is_cached():
+    assert get_parser("mdl_command") is get_parser("mdl_command")
+    assert get_parser("mdl_command") is not get_parser("attribute")
+
+
+def test_clear_parsers():
+    parser = get_parser("mdl_command")
+    clear_parsers()
+    assert get_parser("mdl_command") is not parser
+
+
+def test_get_parser_is_thread_safe():
+    clear_parsers()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        parsers = list(executor.map(get_parser, ["mdl_command"] * 32))
+    assert all(p is parsers[0] for p in parsers)
+
+
+def test_concurrent_loads():
+    paths = sorted(scrapped_mdl_files, key=path_name)
+    sources = [p.read_text() for p in paths]
+    clear_parsers()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        commands = list(executor.map(Command.loads, sources))
+    assert commands == [Command.loads(s) for s in sources]
+
+
+def test_parser_artifact_is_up_to_date():
+    # Run `scripts/build_artifacts.py` if this fails
+    assert sorted(load_parser_artifact()) == sorted(
+        product(PARSER_ARTIFACT_STARTS, PARSER_ARTIFACT_ENGINES)
+    )
+
+
+def test_stale_parser_artifact_is_ignored(tmp_path):
+    path = tmp_path / "mdl_parsers.pickle"
+    build_parser_artifact(path)
+    assert sorted(load_parser_artifact(path)) == sorted(
+        product(PARSER_ARTIFACT_STARTS, PARSER_ARTIFACT_ENGINES)
+    )
+    dump_artifact(path, digest("some other grammar"), {("mdl_command", "tree"): b""})
+    assert load_parser_artifact(path) == {}
+    assert load_parser_artifact(tmp_path / "missing.pickle") == {}
+
+
+@pytest.mark.parametrize("engine", PARSER_ARTIFACT_ENGINES)
+def test_deserialized_parser(engine):
+    serialized = load_parser_artifact()[("mdl_command", engine)]
+    deserialized = deserialize_parser(serialized)
+    compiled = compile_parser("mdl_command", engine)
+    for path in scrapped_mdl_files:
+        source = path.read_text()
+        assert deserialized.parse(source) == compiled.parse(source)
+
+
+@pytest.mark.parametrize("path", scrapped_mdl_files, ids=path_name)
+def test_inline_engine(path):
+    source = path.read_text()
+    assert Command.loads(source, engine="inline") == Command.loads(source)
+
+
+@pytest.mark.parametrize(
+    "start,source",
+    [
+        ("attribute", "label('Hello')"),
+        ("component", "Picklistentry hello__c (value('hello'), order(0))"),
+        ("attribute_value", "'one string', 'two strings'"),
+    ],
+)
+def test_inline_engine_start_symbols(start, source):
+    assert parse_and_transform(start, source, "inline") == parse_and_transform(
+        start, source
+    )
+
+
+def test_get_parser_per_engine():
+    assert get_parser("mdl_command", "inline") is get_parser("mdl_command", "inline")
+    assert get_parser("mdl_command", "inline") is not get_parser("mdl_command")
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Command.loads("DROP Picklist vmdl_options__c;", engine="nope")  # type: ignore[arg-type]
+
+
+@pytest.fixture
+def many_commands_mdl():
+    return "\n".join(p.read_text() for p in sorted(scrapped_mdl_files, key=path_name))
+
+
+@pytest.fixture
+def many_commands():
+    return [
+        Command.loads(p.read_text()) for p in sorted(scrapped_mdl_files, key=path_name)
+    ]
+
+
+def test_load_many(many_commands_mdl, many_commands):
+    assert list(Command.load_many(many_commands_mdl)) == many_commands
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+def test_split_commands_from_stream(chunk_size, many_commands_mdl):
+    assert list(split_commands(StringIO(many_commands_mdl), chunk_size)) == list(
+        split_commands(many_commands_mdl)
+    )
+
+
+def test_load_many_is_lazy():
+    commands = Command.load_many("DROP Picklist one__c; DROP Picklist (")
+    assert next(commands) == Command("DROP", "Picklist", "one__c")
+    with pytest.raises(UnexpectedInput):
+        next(commands)
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        # Delimiters within strings and XML values
+        (
+            "RECREATE Picklist one__c (label('a; b ( c')); DROP Picklist two__c;",
+            ["RECREATE Picklist one__c (label('a; b ( c'));", " DROP Picklist two__c;"],
+        ),
+        (
+            "RECREATE Picklist one__c (label('It''s; (')) DROP Picklist two__c",
+            ["RECREATE Picklist one__c (label('It''s; (')) ", "DROP Picklist two__c"],
+        ),
+        (
+            "CREATE Pagelayout one__c (layout({<a>);'</a>}));\n\n",
+            ["CREATE Pagelayout one__c (layout({<a>);'</a>}));"],
+        ),
+        # Semicolons within the body of `ALTER` commands
+        (
+            "ALTER Picklist one__c (DROP Picklistentry two__c;);DROP Picklist one__c;",
+            [
+                "ALTER Picklist one__c (DROP Picklistentry two__c;);",
+                "DROP Picklist one__c;",
+            ],
+        ),
+    ],
+)
+def test_split_commands(source, expected):
+    assert list(split_commands(source)) == expected
+
+
+def test_load_file(tmp_path, many_commands_mdl, many_commands):
+    path = tmp_path / "many.mdl"
+    path.write_text(many_commands_mdl)
+    assert list(load_file(path, engine="inline")) == many_commands
+
+
+@pytest.mark.parametrize("path", scrapped_mdl_files, ids=path_name)
+def test_lazy_command(path):
+    commands = list(load_file(path))
+    lazy_commands = list(load_file(path, lazy=True))
+    assert all(isinstance(c, LazyCommand) for c in lazy_commands)
+    for command, lazy_command in zip(commands, lazy_commands):
+        assert lazy_command.command == command.command
+        assert lazy_command.component_type_name == command.component_type_name
+        assert lazy_command.component_name == command.component_name
+        assert lazy_command.logical_operator == command.logical_operator
+        assert not lazy_command.is_loaded
+    assert lazy_commands == commands
+    assert commands == lazy_commands
+    assert all(c.is_loaded for c in lazy_commands)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "DROP Picklist one__c;",
+        "RENAME Picklist one__c TO two__c;",
+        "CREATE Picklist IF NOT EXISTS one__c (label('One'));",
+        "ALTER Picklist IF EXISTS one__c (DROP Picklistentry two__c;);",
+    ],
+)
+def test_lazy_command_header(source):
+    lazy_command = LazyCommand.loads(source)
+    assert asdict(lazy_command.materialize()) == asdict(Command.loads(source))
+    assert lazy_command.is_loaded
+
+
+def test_lazy_command_body_errors_are_deferred():
+    lazy_command = LazyCommand.loads("RECREATE Picklist one__c (label(One));")
+    assert lazy_command.component_name == "one__c"
+    with pytest.raises(UnexpectedInput):
+        _ = lazy_command.attributes
+
+
+def test_lazy_command_assigned_body_fields():
+    source = "RECREATE Picklist one__c (label('One'), Picklistentry a__c (order(0)))"
+    lazy_command = LazyCommand.loads(source)
+    lazy_command.attributes = [Attribute("label", "Two")]
+    assert lazy_command.components == Command.loads(source).components
+    assert lazy_command.attributes == [Attribute("label", "Two")]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "RECREATE Picklist One__c (label('One'));",
+        "DROP Picklist IF EXISTS one__c;",
+        "RENAME Picklist IF EXISTS one__c TO two__c;",
+        "RENAME Picklist one__c;",
+        "DROP Picklist one__c TO two__c;",
+    ],
+)
+def test_lazy_command_header_errors_are_not_deferred(source):
+    with pytest.raises(UnexpectedInput):
+        LazyCommand.loads(source)
+
+
+def test_lazy_command_pickling():
+    source = "RECREATE Picklist one__c (label('One'));"
+    lazy_command = pickle.loads(pickle.dumps(LazyCommand.loads(source)))
+    assert not lazy_command.is_loaded
+    assert lazy_command == Command.loads(source)
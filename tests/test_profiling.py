@@ -0,0 +1,121 @@
+import pickle
+
+import pytest
+from conftest import scrapped_mdl_dir
+
+from meddle import Command, load_directory, profiling
+from meddle.profiling import Profile, profile
+from meddle.validation import ValidationError
+
+source = (
+    scrapped_mdl_dir / "KANBAN-BOARD-CONFIG" / "Picklist.access_request_priority__c.mdl"
+).read_text()
+
+
+@pytest.mark.parametrize(
+    "engine,phases",
+    [
+        ("tree", {"lex", "parse", "transform"}),
+        ("inline", {"lex", "parse"}),
+        ("fast", {"parse"}),
+    ],
+)
+def test_profile_loading(engine, phases):
+    with profile() as p:
+        command = Command.loads(source, engine)
+    assert command == Command.loads(source)
+    stats = p.as_dict()
+    assert set(stats["phases"]) == phases
+    for phase in phases:
+        assert stats["phases"][phase]["calls"] == 1
+        assert stats["phases"][phase]["seconds"] > 0
+        assert stats["phases"][phase]["bytes"] == len(source.encode())
+    assert stats["component_types"] == {command.component_type_name: stats["phases"]}
+
+
+def test_profile_validating_and_dumping():
+    command = Command.loads(source)
+    with profile() as p:
+        command.validate(collect=True)
+        dumped = command.dumps()
+        for component in command.components or []:
+            component.dumps()
+    phases = p.as_dict()["phases"]
+    assert phases["validate"]["calls"] == 1
+    assert phases["dump"]["calls"] == 1 + len(command.components or [])
+    assert phases["dump"]["bytes"] >= len(dumped)
+    assert set(p.component_types) == {
+        command.component_type_name,
+        *(c.component_type_name for c in command.components or []),
+    }
+
+
+def test_profile_validating_by_subcomponent_type():
+    command = Command.loads(source)
+    components = command.components or []
+    assert components
+    with profile() as p:
+        command.validate(collect=True)
+    assert p.phases["validate"].calls == 1
+    by_type = p.component_types
+    assert by_type[command.component_type_name]["validate"].calls == 1
+    for ctn in {c.component_type_name for c in components}:
+        stats = by_type[ctn]["validate"]
+        assert stats.calls == sum(c.component_type_name == ctn for c in components)
+        assert 0 < stats.seconds <= p.phases["validate"].seconds
+
+
+def test_profile_records_failures():
+    command = Command("RECREATE", "Nope", "one__c", [])
+    with profile() as p, pytest.raises(ValidationError):
+        command.validate()
+    assert p.phases["validate"].calls == 1
+
+
+def test_profile_accumulates_and_nests():
+    into = Profile()
+    for _ in range(2):
+        with profile(into):
+            Command.loads(source)
+            with profile() as inner:
+                Command.loads(source)
+            assert profiling.active is into
+    assert profiling.active is None
+    assert into.phases["parse"].calls == 2
+    assert inner.phases["parse"].calls == 1
+
+
+def test_nothing_recorded_outside_profile():
+    p = Profile()
+    with profile(p):
+        pass
+    Command.loads(source).validate(collect=True)
+    assert p.as_dict() == {"phases": {}, "component_types": {}}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_profile_load_directory(workers):
+    """Worker processes record into profiles of their own, merged into the active
+    one
+    """
+    directory = scrapped_mdl_dir / "KANBAN-BOARD-CONFIG"
+    with profile() as expected:
+        for path in sorted(directory.rglob("*.mdl")):
+            list(Command.load_many(path.read_text()))
+    with profile() as p:
+        results = list(load_directory(directory, workers=workers))
+    assert all(r.error is None for r in results)
+    assert all((r.profile is not None) == (workers > 1) for r in results)
+    calls = {k: s.calls for k, s in p.phases.items()}
+    assert calls == {k: s.calls for k, s in expected.phases.items()}
+    assert set(p.component_types) == set(expected.component_types)
+
+
+def test_profile_pickles():
+    with profile() as p:
+        Command.loads(source)
+    unpickled = pickle.loads(pickle.dumps(p))
+    assert unpickled.as_dict() == p.as_dict()
+    unpickled.merge(p)
+    assert unpickled.phases["parse"].calls == 2
+    assert unpickled.phases["parse"].seconds == 2 * p.phases["parse"].seconds
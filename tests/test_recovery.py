@@ -0,0 +1,103 @@
+from io import StringIO
+
+import pytest
+from conftest import path_name, scrapped_mdl_files
+
+from meddle import Command, load_file
+from meddle.recovery import Diagnostic, load_file_with_recovery, parse_with_recovery
+
+
+@pytest.mark.parametrize("path", scrapped_mdl_files, ids=path_name)
+def test_valid_files(path):
+    result = load_file_with_recovery(path)
+    assert result.errors == []
+    assert result.commands == list(load_file(path))
+
+
+def test_every_error_in_one_pass():
+    texts = [p.read_text() for p in sorted(scrapped_mdl_files, key=path_name)]
+    broken = 0
+    for i in range(0, len(texts), 10):
+        if "active(true)" in texts[i]:
+            texts[i] = texts[i].replace("active(true)", "active(ture)", 1)
+            broken += 1
+    source = "\n".join(texts)
+    result = parse_with_recovery(StringIO(source))
+    assert len(result.errors) == broken
+    assert len(result.commands) == len(texts)
+    lines = source.splitlines()
+    for error in result.errors:
+        assert error.message == "Unexpected 'ture'"
+        line = lines[error.line - 1]
+        assert line[error.column - 1 :].startswith("ture")
+
+
+def test_errors_within_a_command():
+    result = parse_with_recovery(
+        "RECREATE Picklist one__c (\n"
+        "    label(One),\n"
+        "    order(#),\n"
+        "    active(true)\n"
+        ");"
+    )
+    assert [(e.line, e.column, e.message) for e in result.errors] == [
+        (2, 11, "Unexpected 'One'"),
+        (3, 11, "Unexpected '#'"),
+    ]
+    assert "')'" in result.errors[0].expected
+    (command,) = result.commands
+    assert [a.name for a in command.attributes] == ["label", "order", "active"]
+
+
+def test_modify_comma():
+    # The closing comma of subcommand `MODIFY`, as in Veeva's documentation. See
+    # README.md
+    result = parse_with_recovery(
+        "ALTER Picklist vmdl_options__c (\n"
+        "label('vMDL Options'),\n"
+        "MODIFY Picklistentry hello_world__c(\n"
+        "  value('Hello World.'),\n"
+        "  order(0)\n"
+        "),\n"
+        "ADD Picklistentry hello_worldv2__c(\n"
+        "  value('ENTER ANY VALUE')\n"
+        ")\n"
+        ");"
+    )
+    assert [(e.line, e.column, e.message) for e in result.errors] == [
+        (6, 2, "Unexpected ','")
+    ]
+    (command,) = result.commands
+    assert [c.command for c in command.commands] == ["MODIFY", "ADD"]
+
+
+def test_missing_closing_parenthesis():
+    result = parse_with_recovery(
+        "RECREATE Picklist one__c (\n"
+        "    label('One')\n"
+        "\n"
+        "RECREATE Picklist two__c (label('Two'));\n"
+        "DROP Picklist three__c;"
+    )
+    assert [(e.line, e.column) for e in result.errors] == [(4, 1)]
+    assert [c.component_name for c in result.commands] == [
+        "one__c",
+        "two__c",
+        "three__c",
+    ]
+    assert result.commands[1] == Command.loads(
+        "RECREATE Picklist two__c (label('Two'));"
+    )
+
+
+def test_unexpected_end():
+    result = parse_with_recovery("RECREATE Picklist one__c (label('One')")
+    assert [e.message for e in result.errors] == ["Unexpected end of command"]
+    assert result.commands == [Command.loads("RECREATE Picklist one__c (label('One'))")]
+
+
+def test_invalid_command():
+    result = parse_with_recovery("DROP Picklist one__c;\nRECREATE Picklist two__c ();")
+    assert result.commands == [Command("DROP", "Picklist", "one__c")]
+    assert [(e.line, e.column) for e in result.errors] == [(2, 1)]
+    assert isinstance(result.errors[0], Diagnostic)
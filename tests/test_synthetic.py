@@ -0,0 +1,59 @@
+import pytest
+from synthetic import CommandGenerator, CorpusShape
+
+from meddle import Command
+from meddle.validation import default_schema
+
+shapes = [
+    CorpusShape(),
+    CorpusShape(attributes=0, fan_out=1, list_length=1),
+    CorpusShape(
+        attributes=100, string_length=1_000, long_string_length=10_000, xml_length=1
+    ),
+]
+
+
+@pytest.mark.parametrize("shape", shapes, ids=["default", "small", "large"])
+def test_generated_commands_are_valid(shape):
+    generator = CommandGenerator(seed=1, shape=shape)
+    for component_type_name in sorted(default_schema().metadata):
+        command = generator.command(component_type_name)
+        assert command.validate()
+        assert Command.loads(command.dumps()) == command
+
+
+def test_generated_commands_are_seeded():
+    assert CommandGenerator(seed=7).commands(5) == CommandGenerator(seed=7).commands(5)
+    assert CommandGenerator(seed=7).commands(5) != CommandGenerator(seed=8).commands(5)
+
+
+def test_generated_commands_scale_with_fan_out():
+    lines = [
+        CommandGenerator(shape=CorpusShape(fan_out=fan_out))
+        .command("Object")
+        .dumps()
+        .count("\n")
+        for fan_out in [10, 100]
+    ]
+    assert 9 * lines[0] < lines[1] < 11 * lines[0]
+
+
+def test_generated_values_respect_constraints():
+    generator = CommandGenerator(shape=CorpusShape(string_length=1_000, list_length=3))
+    schema = default_schema().component("Picklist")
+    assert schema is not None
+    label = generator.value(schema.attributes["label"])
+    assert isinstance(label, str) and 0 < len(label) <= 40
+    object_schema = default_schema().component("Object")
+    assert object_schema is not None
+    for name, attribute_type in object_schema.attributes.items():
+        value = generator.value(attribute_type)
+        if attribute_type.kind == "impossible":
+            assert value is None
+        else:
+            assert attribute_type.check(name, value)
+
+
+def test_unknown_component_type():
+    with pytest.raises(ValueError, match="'Nope' does not exist"):
+        CommandGenerator().command("Nope")
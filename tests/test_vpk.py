@@ -0,0 +1,80 @@
+from io import BytesIO
+from zipfile import ZipFile
+
+import pytest
+from conftest import scrapped_mdl_dir, scrapped_mdl_files
+
+from meddle import load_file
+from meddle.loading import LoadResult
+from meddle.vpk import load_vpk, mdl_members, open_vpk
+
+
+@pytest.fixture
+def vpk_bytes():
+    buffer = BytesIO()
+    with ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("vaultpackage.xml", "<vaultpackage/>")
+        zip_file.writestr("__MACOSX/components/._Picklist.one__c.mdl", b"\0\1")
+        for path in sorted(scrapped_mdl_files):
+            zip_file.write(path, f"components/{path.relative_to(scrapped_mdl_dir)}")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def expected_results():
+    return [
+        LoadResult(p.relative_to(scrapped_mdl_dir), commands=list(load_file(p)))
+        for p in sorted(scrapped_mdl_files)
+    ]
+
+
+def test_mdl_members(vpk_bytes):
+    members = mdl_members(open_vpk(vpk_bytes))
+    assert len(members) == len(scrapped_mdl_files)
+    assert all(m.startswith("components/") for m in members)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_vpk(workers, vpk_bytes, expected_results):
+    results = list(load_vpk(vpk_bytes, workers=workers))
+    for r in results:
+        r.path = r.path.relative_to("components")
+    assert results == expected_results
+
+
+@pytest.mark.parametrize("source_type", ["path", "file"])
+def test_load_vpk_source_types(source_type, vpk_bytes, tmp_path):
+    vpk_path = tmp_path / "package.vpk"
+    vpk_path.write_bytes(vpk_bytes)
+    source = vpk_path if source_type == "path" else vpk_path.open("rb")
+    assert list(load_vpk(source, workers=1)) == list(load_vpk(vpk_bytes, workers=1))
+
+
+def test_load_vpk_errors():
+    buffer = BytesIO()
+    with ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("bad.mdl", "DROP Picklist One__c;")
+        zip_file.writestr("good.mdl", "DROP Picklist one__c;")
+    bad, good = load_vpk(buffer.getvalue(), workers=1)
+    assert bad.commands is None and bad.error is not None
+    assert good.error is None and len(good.commands) == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_vpk_decoding(workers):
+    """Members are decoded as `open` would, each on its own"""
+    buffer = BytesIO()
+    with ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr(
+            "latin1.mdl", "RECREATE Picklist one__c (label('Ñ'));".encode("latin-1")
+        )
+        zip_file.writestr(
+            "crlf.mdl", b"RECREATE Picklist one__c (\r\n  label('A\r\nB')\r\n);"
+        )
+        zip_file.writestr("good.mdl", "DROP Picklist one__c;")
+    latin1, crlf, good = load_vpk(buffer.getvalue(), workers=workers)
+    assert latin1.commands is None and latin1.error is not None
+    assert latin1.error.startswith("UnicodeDecodeError")
+    assert crlf.commands is not None
+    assert crlf.commands[0].attributes[0].value == "A\nB"
+    assert good.error is None and len(good.commands) == 1